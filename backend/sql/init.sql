@@ -2,7 +2,11 @@
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 
 -- Enum types (mapped to text for compatibility/simplicity or strict enums)
-CREATE TYPE source_type AS ENUM ('youtube', 'twitter', 'app_review', 'whatsapp', 'news');
+-- Guarded so the script can be re-applied to an existing database
+DO $$ BEGIN
+    CREATE TYPE source_type AS ENUM ('youtube', 'twitter', 'app_review', 'whatsapp', 'news');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
 
 -- Complaint Table
 CREATE TABLE IF NOT EXISTS complaints (
@@ -20,9 +24,20 @@ CREATE TABLE IF NOT EXISTS complaints (
     
     -- Hardening
     hash_fingerprint TEXT,
-    dedup_confidence FLOAT
+    dedup_confidence FLOAT,
+
+    -- Batch reprocessing
+    processing_status TEXT DEFAULT 'pending',
+    model_version TEXT,
+    processed_at TIMESTAMP WITH TIME ZONE
 );
 
+-- Columns added after the first release: CREATE TABLE IF NOT EXISTS leaves
+-- existing tables as they are, so add them explicitly (idempotent)
+ALTER TABLE complaints ADD COLUMN IF NOT EXISTS processing_status TEXT DEFAULT 'pending';
+ALTER TABLE complaints ADD COLUMN IF NOT EXISTS model_version TEXT;
+ALTER TABLE complaints ADD COLUMN IF NOT EXISTS processed_at TIMESTAMP WITH TIME ZONE;
+
 -- Cluster Table
 CREATE TABLE IF NOT EXISTS clusters (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -95,6 +110,16 @@ CREATE TABLE IF NOT EXISTS trace_logs (
     metadata JSONB
 );
 
+-- Batch job checkpoints (resume point per job)
+CREATE TABLE IF NOT EXISTS batch_checkpoints (
+    job_name TEXT PRIMARY KEY,
+    model_version TEXT NOT NULL,
+    last_id UUID,
+    processed BIGINT NOT NULL DEFAULT 0,
+    failed BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_complaints_source ON complaints(source);
 CREATE INDEX IF NOT EXISTS idx_complaints_trace_id ON complaints(trace_id);
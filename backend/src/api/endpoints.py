@@ -3,6 +3,8 @@ from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
 from typing import List, Dict, Any, Union
 
 from datetime import datetime, timedelta
+import asyncio
+import os
 import random
 from uuid import uuid4
 
@@ -16,6 +18,11 @@ from .core.security import (
 from .middleware.rate_limit import RateLimitMiddleware
 from .core.export import SecureExportManager
 from fastapi import Response, Request
+from ..core.queue import get_async_queue
+from ..clustering.summary import get_summary_store
+from ..config.settings import get_settings
+
+settings = get_settings()
 
 
 
@@ -91,8 +98,9 @@ async def logout(response: Response, token: str = Depends(oauth2_scheme)):
 @router.post("/ingest/voice", tags=["ingestion"], responses=ERROR_RESPONSES)
 async def ingest_voice(file: UploadFile = File(...)):
     """
-    Mock voice ingestion.
-    In real flow: Save file -> Whisper -> Text -> Process.
+    Voice ingestion: save the upload and queue it for transcription.
+    Decoding, the MAX_AUDIO_DURATION_SEC limit and VAD trimming happen once,
+    in the ASR worker (see process/audio_preprocess.py).
     """
     # Validation
     MAX_SIZE = 10 * 1024 * 1024 # 10MB
@@ -101,14 +109,32 @@ async def ingest_voice(file: UploadFile = File(...)):
     if file.content_type not in ALLOWED_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type. Allowed: mp3, wav, m4a")
         
-    # Check size (mock check as we don't want to read whole file into memory if huge, but for demo we can check header/size)
-    # real check happens during read chunking
+    # Reject early when the client sent a size; otherwise enforced while streaming to disk
     if file.size and file.size > MAX_SIZE:
          raise HTTPException(status_code=400, detail="File too large (Max 10MB)")
 
-    # Simulate processing delay or ID generation
-
     trace_id = str(uuid4())
+    ext = os.path.splitext(file.filename or "")[1].lower() or ".audio"
+    await asyncio.to_thread(os.makedirs, settings.AUDIO_UPLOAD_DIR, exist_ok=True)
+    file_path = os.path.join(settings.AUDIO_UPLOAD_DIR, f"{trace_id}{ext}")
+
+    # Disk I/O in worker threads, off the event loop
+    written = 0
+    out = await asyncio.to_thread(open, file_path, "wb")
+    try:
+        while chunk := await file.read(1 << 20):
+            written += len(chunk)
+            if written > MAX_SIZE:
+                break
+            await asyncio.to_thread(out.write, chunk)
+    finally:
+        await asyncio.to_thread(out.close)
+    if written > MAX_SIZE:
+        await asyncio.to_thread(os.remove, file_path)
+        raise HTTPException(status_code=400, detail="File too large (Max 10MB)")
+
+    await get_async_queue().push("asr_jobs", {"file_path": file_path, "trace_id": trace_id})
+
     return {
         "status": "queued",
         "trace_id": trace_id,
@@ -122,15 +148,20 @@ async def ingest_voice(file: UploadFile = File(...)):
 async def get_dashboard_stats():
     """
     Return aggregated stats for the dashboard.
+    Precomputed by the clustering job (ClusterSummaryMaterializer); this is a single read.
     """
-    return {
-        "total_reports": 12345,
-        "reports_trend": 18.2,
-        "active_clusters": 42,
-        "critical_clusters": 5,
-        "avg_trust_score": 0.924,
-        "causal_confidence": 0.87
-    }
+    stats = await get_summary_store().read_dashboard_stats()
+    if stats is None:
+        # Nothing clustered yet
+        return {
+            "total_reports": 0,
+            "reports_trend": 0.0,
+            "active_clusters": 0,
+            "critical_clusters": 0,
+            "avg_trust_score": None,
+            "causal_confidence": None
+        }
+    return stats
 
 
 
@@ -139,32 +170,9 @@ async def get_hot_clusters():
 
     """
     Return top 'hot' clusters for the dashboard.
-    Mocking data to ensure UI has something to render.
+    Summaries are materialized after each clustering run; empty until the first one.
     """
-    # Mock data
-    return [
-        Cluster(
-            title="Pension Scheme Delays - Karnataka",
-            summary="Multiple reports of 3+ month delays provided by elderly citizens in rural districts.",
-            trend_metrics={"count_30d": 142, "growth_rate": 15.5},
-            geo_distribution={"Karnataka": 80, "Rural": 60, "Urban": 20},
-            confidence_score=0.92
-        ),
-        Cluster(
-            title="Ration Card Biometric Failures",
-            summary="Fingerprint scanners failing intermittently in North Zones, causing denial of service.",
-            trend_metrics={"count_30d": 89, "growth_rate": 8.2},
-            geo_distribution={"North Zone": 75, "Bihar": 25},
-            confidence_score=0.88
-        ),
-        Cluster(
-            title="Mid-day Meal Quality Issues",
-            summary="Reports of sub-standard quality grain being supplied in primary schools.",
-            trend_metrics={"count_30d": 56, "growth_rate": -2.1},
-            geo_distribution={"Odisha": 90},
-            confidence_score=0.75
-        )
-    ]
+    return await get_summary_store().read_hot_clusters() or []
 
 @router.get("/graph/archetypes", response_model=Dict[str, Any], tags=["causal"], responses=ERROR_RESPONSES)
 async def get_causal_graph():
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from ..schemas.models import Complaint, SourceType
-from ..core.queue import RedisQueue
+from ..core.queue import get_async_queue
 from ..core.security import hash_phone_number, strip_pii
 from ..core.tracing import generate_trace_id
 from ..core.logging import logger
 from datetime import datetime
 
 router = APIRouter()
-queue = RedisQueue()
+queue = get_async_queue()
 
 @router.post("/webhook/whatsapp")
 async def whatsapp_webhook(request: Request):
@@ -48,7 +48,7 @@ async def whatsapp_webhook(request: Request):
         )
         
         # Push to data stream
-        queue.push("complaint_events", complaint.model_dump(mode='json'))
+        await queue.push("complaint_events", complaint.model_dump(mode='json'))
         
         return {"status": "received"}
         
@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from ..core.logging import logger
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+MODEL_FILE = "model.joblib"
+META_FILE = "meta.json"
+LATEST_FILE = "LATEST"
+
+
+class ClusterArtifactStore:
+    """
+    Versioned store for fitted clustering models (UMAP reducer + HDBSCAN clusterer
+    with prediction data + reference points).
+
+    Layout: <root>/<version>/{model.joblib, meta.json} and <root>/LATEST naming
+    the current version. Versions are written to a temp dir and renamed into
+    place, then LATEST is swapped atomically, so readers never see a partial
+    artifact. Models are dumped uncompressed so numpy arrays inside them can be
+    loaded with mmap_mode="r" and shared between worker processes via the page cache.
+    """
+    def __init__(self, root: Optional[str] = None, keep: Optional[int] = None):
+        self.root = root or settings.CLUSTER_ARTIFACT_DIR
+        self.keep = settings.CLUSTER_ARTIFACT_KEEP if keep is None else keep
+        os.makedirs(self.root, exist_ok=True)
+
+    def _latest_path(self) -> str:
+        return os.path.join(self.root, LATEST_FILE)
+
+    def latest_version(self) -> Optional[str]:
+        try:
+            with open(self._latest_path(), "r") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def list_versions(self) -> List[str]:
+        # Versions start with a UTC timestamp, so lexical order is chronological
+        return sorted(
+            d for d in os.listdir(self.root)
+            if os.path.isfile(os.path.join(self.root, d, MODEL_FILE))
+        )
+
+    def save(self, state: Dict[str, Any], meta: Optional[Dict[str, Any]] = None) -> str:
+        import joblib
+
+        now = time.time()
+        version = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}{int(now * 1000) % 1000:03d}-{uuid.uuid4().hex[:6]}"
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        try:
+            joblib.dump(state, os.path.join(tmp_dir, MODEL_FILE), compress=0)
+            with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+                json.dump({"version": version, "created_at": time.time(), **(meta or {})}, f)
+            os.rename(tmp_dir, os.path.join(self.root, version))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        fd, tmp_latest = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            f.write(version)
+        os.replace(tmp_latest, self._latest_path())
+
+        logger.info("cluster_artifact_saved", version=version, path=self.root)
+        self.prune()
+        return version
+
+    def load(self, version: Optional[str] = None, mmap: bool = True) -> Dict[str, Any]:
+        import joblib
+
+        version = version or self.latest_version()
+        if version is None:
+            raise FileNotFoundError(f"No clustering artifacts in {self.root}")
+        state = joblib.load(os.path.join(self.root, version, MODEL_FILE), mmap_mode="r" if mmap else None)
+        state["version"] = version
+        return state
+
+    def prune(self):
+        """Keep the newest `keep` versions (never the one LATEST points at)."""
+        latest = self.latest_version()
+        versions = self.list_versions()
+        for version in versions[:max(len(versions) - self.keep, 0)]:
+            if version != latest:
+                shutil.rmtree(os.path.join(self.root, version), ignore_errors=True)
@@ -1,48 +1,178 @@
 import numpy as np
-from scipy.spatial.distance import cosine
+from collections import deque
 from scipy.stats import ks_2samp
-from typing import List, Dict
+from typing import Any, Dict, List, Optional
 from ..config.settings import get_settings
 
 settings = get_settings()
 
+
+def _unit_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+
+def _sq_dists(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    d = (a * a).sum(1)[:, None] + (b * b).sum(1)[None, :] - 2.0 * a @ b.T
+    return np.maximum(d, 0.0)
+
+
 class DriftDetector:
-    def __init__(self, reference_embeddings: np.ndarray = None):
-        self.reference_embeddings = reference_embeddings
+    """
+    Embedding drift against a reference set.
+
+    Everything about the reference (unit centroid, sorted distances to it, a
+    random projection sample for MMD) is computed once in set_reference, so a
+    check is one normalized matrix-vector product plus two-sample tests.
+
+    Two modes:
+      - detect_drift(batch): one-shot check of a batch.
+      - update(batch) ... evaluate(): streaming; each batch is reduced to a
+        bounded sample (distances, projected points, centroid sum) and the last
+        DRIFT_WINDOW_BATCHES batches form the window that is tested, each
+        weighted by its row count.
+
+    Tests: KS on the cosine distances to the reference centroid, and an RBF MMD
+    permutation test on a low-dimensional random projection (sensitive to
+    changes in shape that leave the distance distribution intact).
+    """
+    def __init__(self, reference_embeddings: np.ndarray = None, seed: int = 42):
+        self.rng = np.random.default_rng(seed)
+        self.sample_size = settings.DRIFT_SAMPLE_SIZE
+        self.window = deque(maxlen=settings.DRIFT_WINDOW_BATCHES)
+        self.ref_centroid: Optional[np.ndarray] = None
+        self.ref_dists: Optional[np.ndarray] = None
+        self.reference_size = 0
+        if reference_embeddings is not None:
+            self.set_reference(reference_embeddings)
 
     def set_reference(self, embeddings: np.ndarray):
         """
         Set baseline embeddings for drift detection.
         Usually from Training or previous week's data.
+        `embeddings` may be a np.memmap; it is read in chunks and not kept.
         """
-        self.reference_embeddings = embeddings
+        n, dim = embeddings.shape
+        chunk = settings.CLUSTERING_BATCH_SIZE
+        centroid_sum = np.zeros(dim, dtype=np.float64)
+        for start in range(0, n, chunk):
+            centroid_sum += _unit_rows(embeddings[start:start + chunk]).sum(0)
+        self.ref_centroid = (centroid_sum / max(np.linalg.norm(centroid_sum), 1e-12)).astype(np.float32)
 
-    def detect_drift(self, new_embeddings: np.ndarray) -> Dict[str, Any]:
+        self.ref_dists = np.sort(np.concatenate([
+            self.distances(embeddings[start:start + chunk]) for start in range(0, n, chunk)
+        ]))
+
+        # Fixed projection for this reference; MMD runs on a bounded sample of it
+        self.projection = (self.rng.standard_normal((dim, settings.DRIFT_PROJECTION_DIM))
+                           / np.sqrt(settings.DRIFT_PROJECTION_DIM)).astype(np.float32)
+        sample_idx = np.sort(self.rng.choice(n, min(n, self.sample_size), replace=False))
+        self.ref_projected = self.project(embeddings[sample_idx])
+        # Median heuristic bandwidth
+        self.gamma = 1.0 / max(float(np.median(_sq_dists(self.ref_projected, self.ref_projected))), 1e-12)
+
+        self.reference_size = n
+        self.window.clear()
+
+    def distances(self, embeddings: np.ndarray) -> np.ndarray:
+        """Cosine distance of each row to the reference centroid."""
+        return 1.0 - _unit_rows(embeddings) @ self.ref_centroid
+
+    def project(self, embeddings: np.ndarray) -> np.ndarray:
+        return _unit_rows(embeddings) @ self.projection
+
+    def _summarize(self, embeddings: np.ndarray) -> Dict[str, Any]:
+        """Bounded-size summary of a batch: all it contributes to a check."""
+        unit = _unit_rows(embeddings)
+        dists = 1.0 - unit @ self.ref_centroid
+        keep = self.rng.choice(len(unit), min(len(unit), self.sample_size), replace=False)
+        if len(dists) > settings.DRIFT_RESERVOIR_SIZE:
+            dists = self.rng.choice(dists, settings.DRIFT_RESERVOIR_SIZE, replace=False)
+        return {
+            "dists": dists,
+            "projected": unit[keep] @ self.projection,
+            "centroid_sum": unit.sum(0, dtype=np.float64),
+            "count": len(unit),
+        }
+
+    def _weighted_sample(self, samples: List[np.ndarray], counts: List[int], limit: Optional[int] = None) -> np.ndarray:
         """
-        Detect if new batch of embeddings has drifted from reference.
-        Uses Kolmogorov-Smirnov test on cosine distances to mean.
+        Combine per-batch uniform samples into a uniform sample of the whole
+        window: each batch contributes in proportion to its row count, not its
+        (capped) sample size, so small bursty batches don't outweigh large ones.
         """
-        if self.reference_embeddings is None:
+        sizes = np.array([len(x) for x in samples])
+        counts = np.asarray(counts, dtype=np.float64)
+        share = counts / counts.sum()
+        # Largest total every batch can supply at its share
+        target = float(np.min(sizes / share))
+        if limit is not None:
+            target = min(target, limit)
+        take = np.minimum(np.round(target * share).astype(int), sizes)
+        return np.concatenate([
+            x if t == len(x) else x[self.rng.choice(len(x), t, replace=False)] for x, t in zip(samples, take)
+        ])
+
+    def mmd_test(self, projected: np.ndarray) -> Dict[str, float]:
+        """Biased RBF MMD^2 between reference and `projected`, with a permutation p-value."""
+        x, y = self.ref_projected, projected
+        z = np.vstack([x, y])
+        k = np.exp(-self.gamma * _sq_dists(z, z))
+        n = len(x)
+
+        def mmd2(idx: np.ndarray) -> float:
+            a, b = idx[:n], idx[n:]
+            return float(k[np.ix_(a, a)].mean() + k[np.ix_(b, b)].mean() - 2.0 * k[np.ix_(a, b)].mean())
+
+        observed = mmd2(np.arange(len(z)))
+        perms = settings.DRIFT_MMD_PERMUTATIONS
+        exceed = sum(mmd2(self.rng.permutation(len(z))) >= observed for _ in range(perms))
+        return {"mmd": observed, "mmd_p_value": (exceed + 1) / (perms + 1)}
+
+    def _evaluate(self, summaries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if self.ref_centroid is None:
             return {"drift_detected": False, "reason": "No reference data"}
-            
-        # 1. Compute Centroids
-        ref_centroid = np.mean(self.reference_embeddings, axis=0)
-        new_centroid = np.mean(new_embeddings, axis=0)
-        
-        # 2. Compute Distances to *Reference* Centroid
-        # (How far is point P from the 'Normal' center?)
-        ref_dists = [cosine(e, ref_centroid) for e in self.reference_embeddings]
-        new_dists = [cosine(e, ref_centroid) for e in new_embeddings]
-        
-        # 3. K-S Test on Distributions
-        statistic, p_value = ks_2samp(ref_dists, new_dists)
-        
-        # 4. Check Thresholds
-        is_drift = p_value < 0.05 and statistic > settings.DRIFT_THRESHOLD
-        
+        if not summaries:
+            return {"drift_detected": False, "reason": "No data in window"}
+
+        counts = [s["count"] for s in summaries]
+        new_dists = self._weighted_sample([s["dists"] for s in summaries], counts)
+        projected = self._weighted_sample([s["projected"] for s in summaries], counts, limit=self.sample_size)
+        centroid_sum = np.sum([s["centroid_sum"] for s in summaries], axis=0)
+        new_centroid = centroid_sum / max(np.linalg.norm(centroid_sum), 1e-12)
+
+        # K-S Test on Distributions
+        statistic, p_value = ks_2samp(self.ref_dists, new_dists)
+        mmd = self.mmd_test(projected)
+
+        # Check Thresholds
+        ks_drift = p_value < 0.05 and statistic > settings.DRIFT_THRESHOLD
+        mmd_drift = mmd["mmd_p_value"] < settings.DRIFT_MMD_ALPHA
         return {
-            "drift_detected": is_drift,
-            "p_value": p_value,
-            "statistic": statistic,
-            "centroid_shift": cosine(ref_centroid, new_centroid)
+            "drift_detected": bool(ks_drift or mmd_drift),
+            "ks_drift": bool(ks_drift),
+            "mmd_drift": bool(mmd_drift),
+            "p_value": float(p_value),
+            "statistic": float(statistic),
+            "centroid_shift": float(1.0 - new_centroid @ self.ref_centroid),
+            "sample_size": int(sum(s["count"] for s in summaries)),
+            **mmd,
         }
+
+    def detect_drift(self, new_embeddings: np.ndarray) -> Dict[str, Any]:
+        """
+        Detect if new batch of embeddings has drifted from reference.
+        Uses Kolmogorov-Smirnov test on cosine distances to mean, plus MMD.
+        """
+        if self.ref_centroid is None:
+            return {"drift_detected": False, "reason": "No reference data"}
+        return self._evaluate([self._summarize(new_embeddings)])
+
+    def update(self, new_embeddings: np.ndarray):
+        """Streaming mode: add a batch to the window (oldest batch falls out when full)."""
+        if self.ref_centroid is not None and len(new_embeddings):
+            self.window.append(self._summarize(new_embeddings))
+
+    def evaluate(self) -> Dict[str, Any]:
+        """Streaming mode: test the current window against the reference."""
+        return self._evaluate(list(self.window))
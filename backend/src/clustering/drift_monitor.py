@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+import numpy as np
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from ..core.queue import AsyncQueueInterface, get_async_queue
+from ..core.consumer import StreamConsumer
+from ..core.logging import logger
+from ..core.monitoring import (
+    DRIFT_CENTROID_SHIFT, DRIFT_DETECTED, DRIFT_KS_P_VALUE, DRIFT_KS_STATISTIC,
+    DRIFT_MMD, DRIFT_MMD_P_VALUE, DRIFT_REFIT_COUNTER,
+)
+from ..config.settings import get_settings
+from .drift import DriftDetector
+
+settings = get_settings()
+
+Segment = Tuple[str, str]  # ("cluster" | "source" | "language" | "all", key)
+
+DRIFT_GAUGES = (DRIFT_KS_STATISTIC, DRIFT_KS_P_VALUE, DRIFT_MMD, DRIFT_MMD_P_VALUE, DRIFT_CENTROID_SHIFT, DRIFT_DETECTED)
+
+
+def _field(payload: Dict[str, Any], name: str) -> Any:
+    # Nested values arrive JSON-encoded from Redis streams
+    value = payload.get(name)
+    if isinstance(value, str) and value[:1] in "{[":
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def event_language(payload: Dict[str, Any]) -> str:
+    metadata = _field(payload, "transcript_metadata") or {}
+    language = payload.get("language") or (metadata.get("language") if isinstance(metadata, dict) else None)
+    return language or "unknown"
+
+
+class _SegmentState:
+    """Reference (built from the segment's first DRIFT_REFERENCE_SIZE points) + streaming window."""
+    __slots__ = ("detector", "pending")
+
+    def __init__(self):
+        self.detector = DriftDetector()
+        self.pending: List[np.ndarray] = []
+
+    def add(self, embeddings: np.ndarray):
+        if self.detector.ref_centroid is not None:
+            self.detector.update(embeddings)
+            return
+        self.pending.append(embeddings)
+        if sum(len(p) for p in self.pending) >= settings.DRIFT_REFERENCE_SIZE:
+            self.detector.set_reference(np.vstack(self.pending))
+            self.pending = []
+
+
+class DriftMonitor:
+    """
+    Drift monitoring job on the complaint_events stream.
+
+    Events are buffered as they arrive; every DRIFT_EVAL_INTERVAL_SEC the buffer
+    is embedded, assigned to clusters, and fed to one DriftDetector per
+    segment: overall, per cluster, per SourceType and per language. Results are
+    exported as Prometheus gauges. Drift in any segment with enough window
+    data triggers a full ClusterManager refit on the recent embeddings
+    (at most once per DRIFT_REFIT_COOLDOWN_SEC) instead of waiting for the
+    nightly recluster. Cluster references are rebuilt after every refit
+    because cluster ids change.
+    """
+    def __init__(self, embedder, cluster_manager=None, queue: Optional[AsyncQueueInterface] = None):
+        self.embedder = embedder
+        self.cluster_manager = cluster_manager
+        self.queue = queue or get_async_queue()
+        self.segments: Dict[Segment, _SegmentState] = {}
+        # Segments with exported gauges (removed again when the segment is dropped)
+        self.exported: Set[Segment] = set()
+        self.buffer: List[Dict[str, Any]] = []
+        self.recent_embeddings = deque(maxlen=settings.DRIFT_REFIT_BUFFER_SIZE)
+        self.recent_records = deque(maxlen=settings.DRIFT_REFIT_BUFFER_SIZE)
+        self.cluster_version: Optional[str] = None
+        self._last_refit = float("-inf")
+        self.runtime = StreamConsumer(
+            self.queue, "complaint_events", "drift_monitor", self.handle_event,
+            consumer_prefix="drift",
+        )
+
+    async def handle_event(self, msg_id: str, payload: Dict[str, Any]):
+        # Monitoring is statistical; an event lost to a crash between ack and evaluation is acceptable
+        if payload.get("raw_text"):
+            self.buffer.append(payload)
+
+    def _segment(self, segment: Segment) -> _SegmentState:
+        if segment not in self.segments:
+            self.segments[segment] = _SegmentState()
+        return self.segments[segment]
+
+    def _drop_segments(self, predicate: Callable[[Segment], bool]):
+        """Forget matching segments and stop exporting their gauges (no stale drift alerts)."""
+        for segment in [s for s in self.segments if predicate(s)]:
+            del self.segments[segment]
+        for segment in [s for s in self.exported if predicate(s)]:
+            for gauge in DRIFT_GAUGES:
+                try:
+                    gauge.remove(*segment)
+                except KeyError:
+                    pass
+            self.exported.discard(segment)
+
+    def _cluster_labels(self, embeddings: np.ndarray) -> Optional[np.ndarray]:
+        if self.cluster_manager is None or not self.cluster_manager.is_fitted:
+            return None
+        labels, _, _ = self.cluster_manager.predict_batch(embeddings)
+        if self.cluster_manager.version != self.cluster_version:
+            # New model (refit or hot-swap): old cluster references no longer apply
+            self.cluster_version = self.cluster_manager.version
+            self._drop_segments(lambda segment: segment[0] == "cluster")
+        return np.asarray(labels)
+
+    def observe(self, events: List[Dict[str, Any]]):
+        """Embed a batch of events and route it into the segment windows."""
+        embeddings = self.embedder.embed_batch([e["raw_text"] for e in events])
+        self.recent_embeddings.extend(embeddings)
+        self.recent_records.extend(events)
+
+        keys: Dict[str, np.ndarray] = {
+            "source": np.array([str(e.get("source") or "unknown") for e in events]),
+            "language": np.array([event_language(e) for e in events]),
+        }
+        labels = self._cluster_labels(embeddings)
+        if labels is not None:
+            keys["cluster"] = labels.astype(str)
+
+        self._segment(("all", "all")).add(embeddings)
+        for segment, values in keys.items():
+            for key in np.unique(values):
+                self._segment((segment, str(key))).add(embeddings[values == key])
+
+    def evaluate(self) -> Dict[Segment, Dict[str, Any]]:
+        """Test every segment window and export the gauges. Returns the results that were tested."""
+        results = {}
+        for (segment, key), state in self.segments.items():
+            result = state.detector.evaluate()
+            if "reason" in result or result["sample_size"] < settings.DRIFT_MIN_WINDOW_SIZE:
+                continue
+            results[(segment, key)] = result
+            DRIFT_KS_STATISTIC.labels(segment=segment, key=key).set(result["statistic"])
+            DRIFT_KS_P_VALUE.labels(segment=segment, key=key).set(result["p_value"])
+            DRIFT_MMD.labels(segment=segment, key=key).set(result["mmd"])
+            DRIFT_MMD_P_VALUE.labels(segment=segment, key=key).set(result["mmd_p_value"])
+            DRIFT_CENTROID_SHIFT.labels(segment=segment, key=key).set(result["centroid_shift"])
+            DRIFT_DETECTED.labels(segment=segment, key=key).set(int(result["drift_detected"]))
+            self.exported.add((segment, key))
+        return results
+
+    def maybe_refit(self, results: Dict[Segment, Dict[str, Any]]) -> bool:
+        drifted = [segment for segment, result in results.items() if result["drift_detected"]]
+        if not drifted:
+            return False
+        logger.warning("embedding_drift_detected", segments=[f"{s}:{k}" for s, k in drifted])
+        if (not settings.DRIFT_REFIT_ON_ALERT or self.cluster_manager is None
+                or time.monotonic() - self._last_refit < settings.DRIFT_REFIT_COOLDOWN_SEC):
+            return False
+
+        self._last_refit = time.monotonic()
+        DRIFT_REFIT_COUNTER.labels(segment=drifted[0][0]).inc()
+        embeddings = np.asarray(self.recent_embeddings, dtype=np.float32)
+        records = list(self.recent_records)
+        strata = [str(r.get("source") or "unknown") for r in records]
+        logger.info("drift_refit_start", rows=len(embeddings), trigger=f"{drifted[0][0]}:{drifted[0][1]}")
+        self.cluster_manager.fit_transform(embeddings, strata=strata, records=records, full=True)
+
+        # Post-refit data is the new normal for every segment
+        self._drop_segments(lambda segment: True)
+        return True
+
+    def run_once(self, events: Optional[List[Dict[str, Any]]] = None) -> Dict[Segment, Dict[str, Any]]:
+        """Evaluate `events` (default: everything buffered so far)."""
+        if events is None:
+            events, self.buffer = self.buffer, []
+        if events:
+            self.observe(events)
+        results = self.evaluate()
+        self.maybe_refit(results)
+        return results
+
+    async def schedule(self):
+        while True:
+            await asyncio.sleep(settings.DRIFT_EVAL_INTERVAL_SEC)
+            try:
+                # Swapped on the loop, where handle_event appends; embedding, tests
+                # and refits are CPU-bound and run in a thread
+                events, self.buffer = self.buffer, []
+                await asyncio.to_thread(self.run_once, events)
+            except Exception as e:
+                logger.error("drift_evaluation_failed", error=str(e))
+
+    async def run(self):
+        await asyncio.gather(self.runtime.run(), self.schedule())
+
+
+if __name__ == "__main__":
+    from .artifacts import ClusterArtifactStore
+    from .embedder import EmbedderService
+    from .engine import ClusterManager
+
+    monitor = DriftMonitor(EmbedderService(), ClusterManager(artifact_store=ClusterArtifactStore()))
+    asyncio.run(monitor.run())
@@ -1,15 +1,102 @@
-from typing import List, Union
+import numpy as np
+from typing import Any, Dict, List, Optional, Union
 from ..core.model_registry import ModelRegistry, AbstractModel
 from ..config.settings import get_settings
+from .embedding_cache import EmbeddingCache, embedding_key
 
 settings = get_settings()
 
+
+def length_buckets(texts: List[str], max_seq_length: int, token_budget: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Group text indices into batches of similar length.
+    Sorting by length keeps padding low; batch size shrinks for long texts so
+    each forward pass stays under roughly `token_budget` tokens.
+    """
+    # ~4 chars per token is close enough for bucketing; +2 for [CLS]/[SEP]
+    approx_tokens = [min(len(t) // 4 + 2, max_seq_length) for t in texts]
+    order = sorted(range(len(texts)), key=lambda i: approx_tokens[i])
+
+    batches, current, longest = [], [], 0
+    for i in order:
+        longest = max(longest, approx_tokens[i])
+        if current and ((len(current) + 1) * longest > token_budget or len(current) >= max_batch_size):
+            batches.append(current)
+            current, longest = [], approx_tokens[i]
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
 @ModelRegistry.register("embedder")
 class EmbedderService(AbstractModel):
-    def __init__(self):
-        from sentence_transformers import SentenceTransformer
+    def __init__(self, cache: Optional[EmbeddingCache] = None, backend: Optional[str] = None):
         # Load multilingual model for Indic language support
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        self.backend = backend or settings.EMBEDDING_BACKEND
+        if self.backend == "onnx":
+            # ONNX Runtime (optionally int8): CPU-only pods, smaller resident memory
+            from .onnx_encoder import load_onnx_encoder
+            self.model = load_onnx_encoder(settings.EMBEDDING_MODEL)
+            variant = "onnx-int8" if settings.EMBEDDING_ONNX_QUANTIZE else "onnx"
+            # Quantized vectors differ slightly; keep their cache entries apart
+            self.model_name = f"{settings.EMBEDDING_MODEL}@{variant}"
+        elif self.backend == "torch":
+            import torch
+            from sentence_transformers import SentenceTransformer
+            torch.set_num_threads(settings.EMBEDDING_NUM_THREADS)
+            self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+            self.model_name = settings.EMBEDDING_MODEL
+        else:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND '{self.backend}'")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+        # Content-addressed cache: texts seen by earlier runs are never re-encoded
+        if cache is None and settings.EMBEDDING_CACHE_ENABLED:
+            cache = EmbeddingCache(self.model_name, self.dim)
+        self.cache = cache
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        max_seq_length = self.model.max_seq_length or 512
+        for batch in length_buckets(texts, max_seq_length, settings.EMBEDDING_TOKEN_BUDGET, settings.EMBEDDING_MAX_BATCH_SIZE):
+            out[batch] = self.model.encode(
+                [texts[i] for i in batch],
+                batch_size=len(batch),
+                show_progress_bar=False,
+                convert_to_numpy=True,
+            )
+        return out
+
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a list of texts as an (n, dim) float32 array.
+        Identical texts are encoded once, cached texts not at all.
+        """
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        # Dedup inside the batch
+        unique: Dict[str, int] = {}
+        inverse = np.array([unique.setdefault(t, len(unique)) for t in texts], dtype=np.int64)
+        unique_texts = list(unique)
+        vectors = np.empty((len(unique_texts), self.dim), dtype=np.float32)
+
+        if self.cache is None:
+            vectors[:] = self._encode(unique_texts)
+            return vectors[inverse]
+
+        keys = [embedding_key(t, self.model_name) for t in unique_texts]
+        cached, hit = self.cache.get_many(keys)
+        vectors[hit] = cached
+
+        missing = np.flatnonzero(~hit)
+        if len(missing):
+            encoded = self._encode([unique_texts[i] for i in missing])
+            vectors[missing] = encoded
+            self.cache.put_many([keys[i] for i in missing], encoded)
+
+        return vectors[inverse]
 
     def predict(self, text: Union[str, List[str]]) -> Any:
         """
@@ -18,11 +105,11 @@ class EmbedderService(AbstractModel):
         """
         if isinstance(text, str):
             text = [text]
-            
-        embeddings = self.model.encode(text, show_progress_bar=False)
-        
+
+        embeddings = self.embed_batch(text)
+
         # If input was single string, return single embedding
         if len(text) == 1:
             return embeddings[0]
-            
+
         return embeddings
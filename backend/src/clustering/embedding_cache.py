@@ -0,0 +1,146 @@
+import fcntl
+import hashlib
+import os
+import re
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+KEY_BYTES = 16
+SCALE_BYTES = 4
+
+
+def quantize_int8(vectors: np.ndarray) -> np.ndarray:
+    """
+    Symmetric per-row int8 scalar quantization. Each stored row is dim int8
+    codes followed by the row's float32 scale (4 bytes), so rows stay fixed-width.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scale = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+    scale[scale == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+    return np.hstack([codes, scale.astype(np.float32).view(np.int8)])
+
+
+def dequantize_int8(rows: np.ndarray, dim: int) -> np.ndarray:
+    rows = np.asarray(rows)
+    scale = np.ascontiguousarray(rows[:, dim:]).view(np.float32)
+    return rows[:, :dim].astype(np.float32) * scale
+
+
+def embedding_key(text: str, model_name: str) -> bytes:
+    """Content address of an embedding: same text + same model => same vector."""
+    return hashlib.blake2b(f"{model_name}\0{text}".encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, append-only embedding cache for one model.
+
+    On disk (under <cache_dir>/<model>/):
+      - vectors.bin: row-major (n, dim) matrix in `dtype`, read through np.memmap
+                     (int8: per-row quantized, see quantize_int8)
+      - keys.bin:    n * 16-byte content keys; row i of the matrix belongs to key i
+
+    Vectors are appended before their keys, so a crash mid-write leaves at most
+    some orphan rows that are ignored (and overwritten) on the next append.
+    Appends from several processes are serialised with a file lock; readers pick
+    up rows written by other processes on their next lookup.
+    """
+    def __init__(self, model_name: str, dim: int, cache_dir: Optional[str] = None, dtype: Optional[str] = None):
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype or settings.EMBEDDING_CACHE_DTYPE)
+        self.quantized = self.dtype == np.int8
+        self.row_width = dim + SCALE_BYTES if self.quantized else dim
+        slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.path = os.path.join(cache_dir or settings.EMBEDDING_CACHE_DIR, slug)
+        os.makedirs(self.path, exist_ok=True)
+        self.vectors_path = os.path.join(self.path, "vectors.bin")
+        self.keys_path = os.path.join(self.path, "keys.bin")
+        self.lock_path = os.path.join(self.path, ".lock")
+
+        self.index: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._refresh()
+
+    @property
+    def row_bytes(self) -> int:
+        return self.row_width * self.dtype.itemsize
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _refresh(self):
+        """Index keys appended since the last look (possibly by another process)."""
+        try:
+            size = os.path.getsize(self.keys_path)
+        except FileNotFoundError:
+            return
+        n = size // KEY_BYTES
+        start = len(self.index)
+        if n <= start:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(start * KEY_BYTES)
+            raw = f.read((n - start) * KEY_BYTES)
+        for i in range(n - start):
+            self.index.setdefault(raw[i * KEY_BYTES:(i + 1) * KEY_BYTES], start + i)
+        self._vectors = None
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """Zero-copy view of all cached rows, as stored (use decode() for float32)."""
+        if self._vectors is None:
+            n = len(self.index)
+            if n == 0:
+                return np.zeros((0, self.row_width), dtype=self.dtype)
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(n, self.row_width))
+        return self._vectors
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors).reshape(-1, self.dim)
+        if self.quantized:
+            return quantize_int8(vectors)
+        return np.ascontiguousarray(vectors, dtype=self.dtype)
+
+    def decode(self, rows: np.ndarray) -> np.ndarray:
+        if self.quantized:
+            return dequantize_int8(rows, self.dim)
+        return np.asarray(rows, dtype=np.float32)
+
+    def get_many(self, keys: List[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (float32 vectors for the hits, boolean hit mask aligned with `keys`)."""
+        self._refresh()
+        rows = np.array([self.index.get(k, -1) for k in keys], dtype=np.int64)
+        hit = rows >= 0
+        return self.decode(self.vectors[rows[hit]]), hit
+
+    def put_many(self, keys: List[bytes], vectors: np.ndarray):
+        vectors = self.encode(vectors)
+        with open(self.lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh()
+            new = {}
+            for k, v in zip(keys, vectors):
+                if k not in self.index and k not in new:
+                    new[k] = v
+            if not new:
+                return
+            n = len(self.index)
+            with open(self.vectors_path, "r+b" if os.path.exists(self.vectors_path) else "wb") as f:
+                # Drop any orphan rows left by an interrupted append
+                f.truncate(n * self.row_bytes)
+                f.seek(n * self.row_bytes)
+                f.write(np.stack(list(new.values())).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(self.keys_path):
+                os.truncate(self.keys_path, n * KEY_BYTES)
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(new.keys()))
+            for i, k in enumerate(new):
+                self.index[k] = n + i
+            self._vectors = None
@@ -0,0 +1,96 @@
+import hashlib
+import uuid
+import numpy as np
+from typing import Optional, Sequence, Union
+from ..config.settings import get_settings
+from .embedding_cache import KEY_BYTES, EmbeddingCache
+
+settings = get_settings()
+
+
+def id_key(doc_id: Union[str, uuid.UUID]) -> bytes:
+    """16-byte row key of a document id (UUID bytes, or a digest for other ids)."""
+    try:
+        return uuid.UUID(str(doc_id)).bytes
+    except ValueError:
+        return hashlib.blake2b(str(doc_id).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingMatrix:
+    """
+    Read-only (n, dim) float32 view over stored rows, decoded lazily.
+
+    Indexing (int, slice, index array) decodes only the selected rows, so
+    ClusterManager and DriftDetector can walk it chunk by chunk like a np.memmap;
+    nothing is copied until a chunk is taken.
+    """
+    def __init__(self, store: "EmbeddingStore", rows: Optional[np.ndarray] = None):
+        self.store = store
+        self.raw = store.vectors
+        self.rows = rows
+        self.shape = (len(self.raw) if rows is None else len(rows), store.dim)
+        self.dtype = np.dtype(np.float32)
+        self.ndim = 2
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, key) -> np.ndarray:
+        if isinstance(key, tuple):
+            return self[key[0]][(slice(None),) + key[1:]]
+        if self.rows is not None:
+            key = self.rows[key]
+        elif isinstance(key, np.ndarray) and key.dtype == bool:
+            key = np.flatnonzero(key)
+        rows = self.raw[key]
+        if rows.ndim == 1:
+            return self.store.decode(rows[None, :])[0]
+        return self.store.decode(rows)
+
+    def __array__(self, dtype=None, copy=None):
+        out = self[:] if self.rows is None else self[np.arange(len(self))]
+        return out if dtype is None else out.astype(dtype)
+
+
+class EmbeddingStore(EmbeddingCache):
+    """
+    Document embeddings in compact memory-mapped storage, addressed by id.
+
+    Same append-only file layout as EmbeddingCache (float16, or int8 with a
+    per-row scale), keyed by document id instead of text hash. Nightly jobs
+    read `matrix()` views instead of passing float32 matrices or lists
+    between stages, which cuts resident memory 2x (float16) to ~4x (int8).
+    """
+    def __init__(self, name: str, dim: int, store_dir: Optional[str] = None, dtype: Optional[str] = None):
+        super().__init__(name, dim, cache_dir=store_dir or settings.EMBEDDING_STORE_DIR,
+                         dtype=dtype or settings.EMBEDDING_STORE_DTYPE)
+
+    def put(self, ids: Sequence[Union[str, uuid.UUID]], vectors: np.ndarray):
+        """Append vectors for new ids (ids already stored keep their first vector)."""
+        self.put_many([id_key(i) for i in ids], vectors)
+
+    def rows(self, ids: Sequence[Union[str, uuid.UUID]]) -> np.ndarray:
+        """Row numbers of `ids`; raises KeyError for unknown ids."""
+        self._refresh()
+        rows = np.empty(len(ids), dtype=np.int64)
+        for n, doc_id in enumerate(ids):
+            row = self.index.get(id_key(doc_id))
+            if row is None:
+                raise KeyError(f"No stored embedding for id {doc_id}")
+            rows[n] = row
+        return rows
+
+    def get(self, ids: Sequence[Union[str, uuid.UUID]]) -> np.ndarray:
+        return self.decode(self.vectors[self.rows(ids)])
+
+    def matrix(self, ids: Optional[Sequence[Union[str, uuid.UUID]]] = None) -> EmbeddingMatrix:
+        """Lazy float32 view of all rows (store order) or of `ids` (in the given order)."""
+        self._refresh()
+        return EmbeddingMatrix(self, None if ids is None else self.rows(ids))
+
+    def iter_chunks(self, chunk_size: Optional[int] = None, ids: Optional[Sequence[Union[str, uuid.UUID]]] = None):
+        """Yield (start, float32 chunk) pairs; only one chunk is decoded at a time."""
+        matrix = self.matrix(ids)
+        chunk_size = chunk_size or settings.CLUSTERING_BATCH_SIZE
+        for start in range(0, len(matrix), chunk_size):
+            yield start, matrix[start:start + chunk_size]
@@ -1,107 +1,332 @@
+import threading
+import time
+import warnings
 import numpy as np
 import pandas as pd
-from typing import List, Dict, Any
+from collections import deque
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 # Lazy imports for heavy libs handled inside methods or class init
 from ..core.model_registry import ModelRegistry
+from ..core.logging import logger
 from ..config.settings import get_settings
+from .artifacts import ClusterArtifactStore
+from .knn_graph import build_knn_graph
+from .summary import ClusterSummaryMaterializer, label_mapping
+
+def stratified_sample_indices(n: int, sample_size: int, strata: Optional[Sequence] = None,
+                              min_per_stratum: int = 50, seed: int = 42) -> np.ndarray:
+    """
+    Sorted row indices for the fit sample. With `strata` (e.g. source type or
+    language per row) each stratum is sampled proportionally, but small strata
+    keep at least `min_per_stratum` rows so rare groups can still form clusters.
+    """
+    rng = np.random.default_rng(seed)
+    if sample_size >= n:
+        return np.arange(n)
+    if strata is None:
+        return np.sort(rng.choice(n, sample_size, replace=False))
+
+    _, inverse, counts = np.unique(np.asarray(strata), return_inverse=True, return_counts=True)
+    alloc = np.maximum(counts * sample_size // n, np.minimum(counts, min_per_stratum))
+    picks = [rng.choice(np.flatnonzero(inverse == i), alloc[i], replace=False) for i in range(len(counts))]
+    return np.sort(np.concatenate(picks))
+
 
 class ClusterManager:
-    def __init__(self):
+    """
+    UMAP + HDBSCAN clustering.
+    With an artifact store, fitted models are persisted after every (re)fit,
+    loaded on start-up, and newer versions published by other processes are
+    hot-swapped in (checked every CLUSTER_ARTIFACT_POLL_SEC).
+    With a materializer, cluster summaries for the dashboard are refreshed
+    after every fit and incremental batch that comes with `records`, carried
+    over to the new ids on partial refits, and restored with the artifacts.
+    """
+    def __init__(self, artifact_store: Optional[ClusterArtifactStore] = None,
+                 materializer: Optional[ClusterSummaryMaterializer] = None):
         self.settings = get_settings()
-        import umap
-        import hdbscan
 
-        
         # Initialize UMAP for dimension reduction
-        self.reducer = umap.UMAP(
+        self.umap_params = dict(
             n_neighbors=15,
             n_components=5,
             metric='cosine',
             random_state=42
         )
+        self.reducer = self._new_reducer()
+        # Shared ANN kNN graph reused across UMAP fits (None: UMAP builds its own each fit)
+        self.knn_graph = build_knn_graph()
         
         # Initialize HDBSCAN for density-based clustering
-        self.clusterer = hdbscan.HDBSCAN(
+        self.hdbscan_params = dict(
             min_cluster_size=5,
             min_samples=2,
             metric='euclidean',
             cluster_selection_method='eom',
             prediction_data=True
         )
+        self.clusterer = self._new_clusterer()
         
         self.is_fitted = False
+        # Reduced points the current clusterer was fitted on (basis for partial refits)
+        self.reference_reduced: Optional[np.ndarray] = None
+        # Reduced points that landed in noise since the last (re)fit
+        self.outlier_buffer = deque(maxlen=self.settings.CLUSTER_OUTLIER_BUFFER_SIZE)
+
+        # Model swaps happen under this lock so readers never mix reducer/clusterer versions
+        self._lock = threading.Lock()
+        # Held while fitting; hot reloads are skipped meanwhile so a fit is not swapped out mid-way
+        self._fit_lock = threading.Lock()
+        self.artifact_store = artifact_store
+        self.materializer = materializer
+        self.version: Optional[str] = None
+        self._last_poll = time.monotonic()
+        if artifact_store is not None and artifact_store.latest_version():
+            self.load_artifacts()
 
-    def fit_transform(self, embeddings: np.ndarray) -> Dict[str, Any]:
+    def _new_reducer(self, precomputed_knn=None):
+        import umap
+        if precomputed_knn is None:
+            return umap.UMAP(**self.umap_params)
+        return umap.UMAP(**self.umap_params, precomputed_knn=precomputed_knn)
+
+    def _new_clusterer(self):
+        import hdbscan
+        return hdbscan.HDBSCAN(**self.hdbscan_params)
+
+    def _swap(self, reducer, clusterer, reference_reduced: np.ndarray, version: Optional[str] = None):
+        with self._lock:
+            self.reducer = reducer
+            self.clusterer = clusterer
+            self.reference_reduced = reference_reduced
+            self.version = version
+            self.is_fitted = True
+        self.outlier_buffer.clear()
+
+    def _maybe_prune_graph(self):
         """
-        Fit the clustering model on a batch of embeddings.
-        Returns cluster labels and probabilities.
+        Bound the shared kNN graph (it is extended by every batch and stored in
+        every artifact). The rebuilt graph replaces ours; reducers fitted on the
+        old one keep searching it, and it is no longer mutated.
         """
-        if len(embeddings) < 10:
-             # Not enough data to cluster meaningfully
-             return {"labels": [-1] * len(embeddings), "probs": [0.0] * len(embeddings)}
+        if len(self.knn_graph) > self.settings.UMAP_KNN_MAX_NODES:
+            keep = int(self.settings.UMAP_KNN_MAX_NODES * self.settings.UMAP_KNN_PRUNE_TO)
+            self.knn_graph = self.knn_graph.pruned(keep)
 
-        # Optimization: Batch Limit
-        if len(embeddings) > self.settings.CLUSTERING_BATCH_SIZE:
-             # Trim for demo/performance (in production we'd chunk or sample)
-             embeddings = embeddings[:self.settings.CLUSTERING_BATCH_SIZE]
+    def _current(self):
+        with self._lock:
+            return self.reducer, self.clusterer
 
-        # Optimization: Incremental Mode
-        if not self.settings.FULL_RECLUSTER and self.is_fitted:
-             # Use prediction for speed instead of re-fitting everything
-             # Note: This returns labels for the input batch based on existing structure
+    def save_artifacts(self) -> Optional[str]:
+        if self.artifact_store is None or not self.is_fitted:
+            return None
+        reducer, clusterer = self._current()
+        version = self.artifact_store.save(
+            {"reducer": reducer, "clusterer": clusterer, "reference_reduced": self.reference_reduced, "knn_graph": self.knn_graph},
+            meta={"reference_size": len(self.reference_reduced), "umap": self.umap_params, "hdbscan": self.hdbscan_params},
+        )
+        self.version = version
+        return version
+
+    def load_artifacts(self, version: Optional[str] = None):
+        """Load a stored model (memory-mapped) and swap it in; in-flight predictions finish on the old one."""
+        state = self.artifact_store.load(version)
+        graph = state.get("knn_graph")
+        if graph is not None and self.knn_graph is not None and type(graph.index) is type(self.knn_graph.index):
+            # Keep extending the stored graph (unless UMAP_KNN_BACKEND has since changed)
+            self.knn_graph = graph
+        self._swap(state["reducer"], state["clusterer"], state["reference_reduced"], state["version"])
+        if self.materializer is not None:
+            # Continue the persisted summaries of this version (ids are per version)
+            self.materializer.restore(state["version"])
+        logger.info("cluster_artifact_loaded", version=state["version"])
+
+    def maybe_reload(self):
+        """Hot-swap to the newest stored version if another process published one."""
+        if self.artifact_store is None:
+            return
+        now = time.monotonic()
+        if now - self._last_poll < self.settings.CLUSTER_ARTIFACT_POLL_SEC:
+            return
+        self._last_poll = now
+        if not self._fit_lock.acquire(blocking=False):
+            return  # Our own fit is about to publish; the next poll picks up anything newer
+        try:
+            latest = self.artifact_store.latest_version()
+            if latest is not None and latest != self.version:
+                try:
+                    self.load_artifacts(latest)
+                except Exception as e:
+                    # Keep serving the current model
+                    logger.error("cluster_artifact_reload_failed", version=latest, error=str(e))
+        finally:
+            self._fit_lock.release()
+
+    def fit_transform(self, embeddings: np.ndarray, strata: Optional[Sequence] = None,
+                      records: Optional[Sequence[Dict[str, Any]]] = None, full: bool = False) -> Dict[str, Any]:
+        """
+        Fit the clustering model on a batch of embeddings.
+        Returns cluster labels and probabilities for every input row (numpy arrays).
+
+        Large inputs (more than CLUSTERING_FIT_SAMPLE_SIZE rows) are fitted on a
+        (stratified) sample; the remaining rows are assigned with approximate_predict
+        in chunks of CLUSTERING_BATCH_SIZE, so `embeddings` may be a np.memmap or
+        an EmbeddingStore.matrix() view larger than RAM.
+
+        `records` (complaint dicts aligned with the rows) feed the cluster summaries.
+        `full` forces a complete refit even when incremental mode would apply.
+        """
+        # Optimization: Incremental Mode (any batch size once fitted)
+        if not (full or self.settings.FULL_RECLUSTER) and self.is_fitted:
+             # Assign against the existing structure instead of re-fitting everything
              try:
-                 labels = []
-                 probs = []
-                 for emb in embeddings:
-                     try:
-                         l = self.predict(emb)
-                         labels.append(l)
-                         probs.append(0.8) # Mock prob for fast path
-                     except Exception:
-                         labels.append(-1)
-                         probs.append(0.0)
-                 return {
-                     "labels": labels,
-                     "probabilities": probs,
-                     "reduced_data": [] # Skip reduction for speed/bandwidth
-                 }
+                 result = self.partial_fit(embeddings)
+                 if self.materializer is not None and records is not None:
+                     self.materializer.update(result["labels"], result["probabilities"], records)
+                 return result
              except Exception as e:
-                 print(f"Incremental prediction failed, falling back to full fit: {e}")
-                 pass
+                 logger.warning("incremental_clustering_failed", error=str(e))
+
+        n = len(embeddings)
+        if n < 10:
+             # Not enough data to cluster meaningfully
+             return {"labels": np.full(n, -1, dtype=np.int64), "probabilities": np.zeros(n), "reduced_data": None}
 
-        # 1. Reduce Dimensions
+        with self._fit_lock:
+            return self._full_fit(embeddings, strata, records)
 
-        reduced_data = self.reducer.fit_transform(embeddings)
+    def _full_fit(self, embeddings: np.ndarray, strata: Optional[Sequence],
+                  records: Optional[Sequence[Dict[str, Any]]]) -> Dict[str, Any]:
+        n = len(embeddings)
+        fit_idx = stratified_sample_indices(n, self.settings.CLUSTERING_FIT_SAMPLE_SIZE, strata)
+
+        # 1. Reduce Dimensions (on the fit sample); fresh objects so readers keep the old model meanwhile
+        fit_data = np.asarray(embeddings[fit_idx], dtype=np.float32)
+        precomputed_knn = None
+        if self.knn_graph is not None:
+            self._maybe_prune_graph()
+            # Only rows the graph hasn't seen need a neighbour search
+            rows = self.knn_graph.extend(fit_data)
+            precomputed_knn = self.knn_graph.subset(rows, self.umap_params["n_neighbors"])
+        reducer = self._new_reducer(precomputed_knn)
+        with warnings.catch_warnings():
+            # UMAP warns that non-NNDescent indexes can't transform; ours implement query() and can
+            warnings.filterwarnings("ignore", message=r"precomputed_knn\[2\]")
+            reduced_fit = reducer.fit_transform(fit_data)
         
         # 2. Cluster
-        labels = self.clusterer.fit_predict(reduced_data)
-        probabilities = self.clusterer.probabilities_
+        clusterer = self._new_clusterer()
+        clusterer.fit(reduced_fit)
         
-        self.is_fitted = True
+        self._swap(reducer, clusterer, reduced_fit)
+        self.save_artifacts()
+
+        labels = np.empty(n, dtype=np.int64)
+        probabilities = np.empty(n, dtype=np.float64)
+        reduced_data = np.empty((n, reduced_fit.shape[1]), dtype=np.float32)
+        labels[fit_idx] = clusterer.labels_
+        probabilities[fit_idx] = clusterer.probabilities_
+        reduced_data[fit_idx] = reduced_fit
+
+        # 3. Assign everything outside the sample, chunk by chunk (bounded memory)
+        if len(fit_idx) < n:
+            rest = np.setdiff1d(np.arange(n), fit_idx, assume_unique=True)
+            chunk_size = self.settings.CLUSTERING_BATCH_SIZE
+            logger.info("cluster_assign_start", fitted=len(fit_idx), remaining=len(rest), chunk_size=chunk_size)
+            for start in range(0, len(rest), chunk_size):
+                chunk = rest[start:start + chunk_size]
+                # Pinned to the model just fitted, whatever is published meanwhile
+                chunk_labels, chunk_strengths, chunk_reduced = self._predict_with(reducer, clusterer, embeddings[chunk])
+                labels[chunk] = chunk_labels
+                probabilities[chunk] = chunk_strengths
+                reduced_data[chunk] = chunk_reduced
+
+        if self.materializer is not None:
+            # Cluster ids are new after a full fit
+            if records is not None:
+                self.materializer.reset(labels, probabilities, records, model_version=self.version)
+            else:
+                self.materializer.mark_stale(self.version)
         
         return {
-            "labels": labels.tolist(),
-            "probabilities": probabilities.tolist(),
-            "reduced_data": reduced_data.tolist()
+            "labels": labels,
+            "probabilities": probabilities,
+            "reduced_data": reduced_data
+        }
+
+    def predict_batch(self, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Assign a batch to the fitted clusters with one UMAP transform and one
+        approximate_predict call. Returns (labels, membership strengths, reduced points).
+        """
+        self.maybe_reload()
+        if not self.is_fitted:
+            raise ValueError("ClusterManager is not fitted yet.")
+
+        reducer, clusterer = self._current()
+        return self._predict_with(reducer, clusterer, embeddings)
+
+    def _predict_with(self, reducer, clusterer, embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        import hdbscan
+
+        reduced = reducer.transform(np.asarray(embeddings, dtype=np.float32))
+        labels, strengths = hdbscan.approximate_predict(clusterer, reduced)
+        return labels, strengths, reduced
+
+    def partial_fit(self, embeddings: np.ndarray) -> Dict[str, Any]:
+        """
+        Incremental step: assign the batch, buffer the outliers, and once enough
+        outliers have accumulated refit HDBSCAN on reference + outliers so new
+        topics can form clusters. UMAP is not refitted.
+        """
+        import hdbscan
+
+        labels, strengths, reduced = self.predict_batch(embeddings)
+        if self.knn_graph is not None:
+            # Keep the graph current so the next full fit starts from it
+            self.knn_graph.extend(embeddings)
+            self._maybe_prune_graph()
+
+        outliers = labels == -1
+        if outliers.any():
+            self.outlier_buffer.extend(reduced[outliers])
+            if len(self.outlier_buffer) >= self.settings.CLUSTER_OUTLIER_REFIT_THRESHOLD:
+                self.refit_with_outliers()
+                labels, strengths = hdbscan.approximate_predict(self.clusterer, reduced)
+
+        return {
+            "labels": labels,
+            "probabilities": strengths,
+            "reduced_data": None # Skip reduction for speed/bandwidth
         }
 
+    def refit_with_outliers(self):
+        """
+        Re-cluster the reduced reference points plus the buffered outliers (cluster ids may change).
+        The refit set is capped at CLUSTERING_FIT_SAMPLE_SIZE: all outliers are kept and the
+        reference is randomly subsampled to make room, so it doesn't grow with every refit.
+        """
+        with self._fit_lock:
+            outliers = np.asarray(self.outlier_buffer, dtype=self.reference_reduced.dtype)
+            room = max(self.settings.CLUSTERING_FIT_SAMPLE_SIZE - len(outliers), 0)
+            kept = np.arange(len(self.reference_reduced))
+            if len(kept) > room:
+                kept = np.sort(np.random.default_rng(len(kept)).choice(len(kept), room, replace=False))
+            data = np.vstack([self.reference_reduced[kept], outliers])
+            logger.info("cluster_partial_refit", reference=len(kept), dropped=len(self.reference_reduced) - len(kept), outliers=len(outliers))
+            old_labels = self.clusterer.labels_[kept]  # labels_ is aligned with reference_reduced
+            clusterer = self._new_clusterer()
+            clusterer.fit(data)
+            self._swap(self.reducer, clusterer, data)
+            self.save_artifacts()
+            if self.materializer is not None:
+                # Carry the summaries over to the new cluster ids instead of mixing old and new
+                self.materializer.relabel(label_mapping(old_labels, clusterer.labels_[:len(kept)]), model_version=self.version)
+
     def predict(self, embedding: np.ndarray) -> int:
         """
         Predict cluster for a new single embedding.
         Requires model to be fitted.
         """
-        import hdbscan
-        
-        if not self.is_fitted:
-            raise ValueError("ClusterManager is not fitted yet.")
-            
-        # Transform using fitted reducer
-        reduced_point = self.reducer.transform(embedding.reshape(1, -1))
-        
-        # Predict using fuzzy logic from HDBSCAN (using approximate_predict if available, else re-fit)
-        # Note: approximate_predict requires all points_to_predict
-        # For strict stream clustering, we might need a separate mechanism or online clustering
-        # Here we assume soft-clustering assignment or nearest centroid for simplicity in phase 2A
-        
-        labels, strengths = hdbscan.approximate_predict(self.clusterer, reduced_point)
+        labels, _, _ = self.predict_batch(embedding.reshape(1, -1))
         return labels[0]
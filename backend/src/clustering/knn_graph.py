@@ -0,0 +1,343 @@
+import hashlib
+import threading
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from ..core.logging import logger
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+
+class ANNIndex(ABC):
+    """
+    Cosine nearest-neighbour index over rows 0..n-1, in insertion order.
+    query() has UMAP's search-index signature, so an index can be handed to
+    UMAP as precomputed_knn[2] and used by UMAP.transform.
+    """
+    # UMAP.transform reads this to pick its search epsilon; cosine is angular
+    _angular_trees = True
+
+    @abstractmethod
+    def add(self, vectors: np.ndarray):
+        pass
+
+    @abstractmethod
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (row ids, cosine distances), each (n, min(k, len(self))), nearest first."""
+        pass
+
+    @abstractmethod
+    def get_vectors(self, ids: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def empty_like(self) -> "ANNIndex":
+        """A new, empty index with the same parameters."""
+        pass
+
+    def query(self, vectors: np.ndarray, k: int, epsilon: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        return self.search(vectors, k)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+class ExactCosineIndex(ANNIndex):
+    """
+    Brute-force matrix search; exact, fine up to tens of thousands of rows.
+    Searches consolidate pending blocks, so (like HNSWIndex) it is not safe
+    for concurrent use on its own; KNNGraph serializes access.
+    """
+    def __init__(self, chunk_size: int = 1024):
+        self.chunk_size = chunk_size
+        self._blocks: List[np.ndarray] = []
+        self._data: Optional[np.ndarray] = None
+
+    def empty_like(self) -> "ExactCosineIndex":
+        return ExactCosineIndex(self.chunk_size)
+
+    @property
+    def data(self) -> np.ndarray:
+        if self._blocks:
+            parts = ([self._data] if self._data is not None else []) + self._blocks
+            self._data = np.vstack(parts)
+            self._blocks = []
+        return self._data if self._data is not None else np.zeros((0, 0), dtype=np.float32)
+
+    def add(self, vectors: np.ndarray):
+        self._blocks.append(_normalize(vectors))
+
+    def __len__(self) -> int:
+        return (0 if self._data is None else len(self._data)) + sum(len(b) for b in self._blocks)
+
+    def get_vectors(self, ids: np.ndarray) -> np.ndarray:
+        return self.data[ids]
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        data = self.data
+        k = min(k, len(data))
+        queries = _normalize(vectors)
+        ids = np.empty((len(queries), k), dtype=np.int64)
+        dists = np.empty((len(queries), k), dtype=np.float32)
+        for start in range(0, len(queries), self.chunk_size):
+            sims = queries[start:start + self.chunk_size] @ data.T
+            top = np.argpartition(-sims, k - 1, axis=1)[:, :k] if k < len(data) else np.tile(np.arange(len(data)), (len(sims), 1))
+            top_sims = np.take_along_axis(sims, top, axis=1)
+            order = np.argsort(-top_sims, axis=1)
+            ids[start:start + len(sims)] = np.take_along_axis(top, order, axis=1)
+            dists[start:start + len(sims)] = 1.0 - np.take_along_axis(top_sims, order, axis=1)
+        return ids, np.clip(dists, 0.0, None)
+
+
+class HNSWIndex(ANNIndex):
+    """hnswlib HNSW graph; supports incremental inserts and is picklable."""
+    def __init__(self, m: Optional[int] = None, ef_construction: Optional[int] = None, ef_search: Optional[int] = None):
+        self.m = m or settings.HNSW_M
+        self.ef_construction = ef_construction or settings.HNSW_EF_CONSTRUCTION
+        self.ef_search = ef_search or settings.HNSW_EF_SEARCH
+        self.index = None
+        self.capacity = 0
+
+    def __len__(self) -> int:
+        return 0 if self.index is None else self.index.get_current_count()
+
+    def empty_like(self) -> "HNSWIndex":
+        return HNSWIndex(self.m, self.ef_construction, self.ef_search)
+
+    def add(self, vectors: np.ndarray):
+        import hnswlib
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n = len(self)
+        if self.index is None:
+            self.index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            self.capacity = max(len(vectors), 1024)
+            self.index.init_index(max_elements=self.capacity, M=self.m, ef_construction=self.ef_construction)
+        elif n + len(vectors) > self.capacity:
+            # Grow geometrically so repeated small inserts stay amortised O(1)
+            self.capacity = max(2 * self.capacity, n + len(vectors))
+            self.index.resize_index(self.capacity)
+        self.index.add_items(vectors, np.arange(n, n + len(vectors)))
+
+    def get_vectors(self, ids: np.ndarray) -> np.ndarray:
+        return np.asarray(self.index.get_items(ids), dtype=np.float32)
+
+    def search(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, len(self))
+        self.index.set_ef(max(self.ef_search, k))
+        ids, dists = self.index.knn_query(np.asarray(vectors, dtype=np.float32), k=k)
+        return ids.astype(np.int64), dists.astype(np.float32)
+
+
+def row_keys(vectors: np.ndarray) -> List[bytes]:
+    """Content keys for embedding rows, so the same complaint maps to the same graph node across fits."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in vectors]
+
+
+def _first_k_valid(ids: np.ndarray, dists: np.ndarray, positions: np.ndarray, k: int,
+                   exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Map graph ids to subset positions and keep the k nearest members per row.
+    Missing slots are -1 / inf (UMAP treats them as disconnected). Returns
+    (indices, dists, rows that came up short).
+    """
+    mapped = positions[ids]
+    valid = mapped >= 0
+    if exclude is not None:
+        valid &= mapped != exclude[:, None]
+    order = np.argsort(~valid, axis=1, kind="stable")[:, :k]
+    out_ids = np.take_along_axis(mapped, order, axis=1)
+    out_dists = np.take_along_axis(dists, order, axis=1).astype(np.float32)
+    ok = np.take_along_axis(valid, order, axis=1)
+    out_ids[~ok] = -1
+    out_dists[~ok] = np.inf
+    if out_ids.shape[1] < k:
+        pad = k - out_ids.shape[1]
+        out_ids = np.pad(out_ids, ((0, 0), (0, pad)), constant_values=-1)
+        out_dists = np.pad(out_dists, ((0, 0), (0, pad)), constant_values=np.inf)
+    return out_ids, out_dists, ok.sum(axis=1) < k
+
+
+class KNNGraph:
+    """
+    Persistent kNN graph over every embedding the clusterer has seen.
+
+    Rows are keyed by content, so a point's neighbour list is computed once and
+    reused by later UMAP fits. extend() inserts new points into the ANN index,
+    queries their neighbours and also offers each new point to the lists of its
+    neighbours (reverse update), keeping old lists current without a rebuild.
+
+    The graph is shared by the fitting thread (extend) and concurrent
+    UMAP.transform calls (SubsetSearchIndex), and neither ANN index supports
+    inserts during searches, so index access is serialized by a lock. Size is
+    bounded by pruned(), which builds a new graph and leaves this one to the
+    reducers still referencing it.
+    """
+    def __init__(self, index: ANNIndex, k: Optional[int] = None):
+        self.index = index
+        self.k = k or settings.UMAP_KNN_K
+        self.keys: Dict[bytes, int] = {}
+        # Over-allocated neighbour arrays; rows [0, len(self)) are live
+        self._indices = np.zeros((0, self.k), dtype=np.int64)
+        self._dists = np.zeros((0, self.k), dtype=np.float32)
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def indices(self) -> np.ndarray:
+        return self._indices[:len(self)]
+
+    @property
+    def dists(self) -> np.ndarray:
+        return self._dists[:len(self)]
+
+    def __getstate__(self):
+        with self._lock:
+            state = self.__dict__.copy()
+            state["_indices"], state["_dists"] = self.indices, self.dists
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        # Artifacts may be loaded memory-mapped (read-only); the graph keeps growing, so own a copy
+        self.__dict__.update(state)
+        self._indices = np.array(self._indices)
+        self._dists = np.array(self._dists)
+        self._lock = threading.RLock()
+
+    def _reserve(self, n: int):
+        if n > len(self._indices):
+            capacity = max(n, 2 * len(self._indices))
+            self._indices = np.resize(self._indices, (capacity, self.k))
+            self._dists = np.resize(self._dists, (capacity, self.k))
+
+    def extend(self, vectors: np.ndarray, keys: Optional[List[bytes]] = None) -> np.ndarray:
+        """Add unseen rows; returns the graph row of every input row."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys = keys if keys is not None else row_keys(vectors)
+        with self._lock:
+            return self._extend(vectors, keys)
+
+    def _extend(self, vectors: np.ndarray, keys: List[bytes]) -> np.ndarray:
+        start = len(self)
+        pending: Dict[bytes, int] = {}
+        new_rows = []
+        for i, key in enumerate(keys):
+            if key not in self.keys and key not in pending:
+                pending[key] = start + len(new_rows)
+                new_rows.append(i)
+        rows = np.array([self.keys.get(key, pending.get(key)) for key in keys], dtype=np.int64)
+        if not new_rows:
+            return rows
+
+        new_vectors = vectors[new_rows]
+        self.index.add(new_vectors)
+        n_new, n = len(new_rows), len(self.index)
+        new_ids = np.arange(start, start + n_new)
+
+        # Searched wider than k: the extra candidates feed the reverse update below
+        width = self.k * settings.UMAP_KNN_REVERSE_FACTOR + 1
+        ids, dists = self.index.search(new_vectors, width)
+        positions = np.arange(n)
+        knn_ids, knn_dists, _ = _first_k_valid(ids, dists, positions, width - 1, exclude=new_ids)
+        self._reserve(n)
+        self._indices[start:n] = knn_ids[:, :self.k]
+        self._dists[start:n] = knn_dists[:, :self.k]
+
+        # Reverse update: a new point may now be among an old point's k nearest
+        for p, neighbours, distances in zip(new_ids, knn_ids, knn_dists):
+            for q, d in zip(neighbours, distances):
+                if 0 <= q < start and d < self._dists[q, -1]:
+                    j = np.searchsorted(self._dists[q], d)
+                    self._indices[q, j + 1:] = self._indices[q, j:-1].copy()
+                    self._dists[q, j + 1:] = self._dists[q, j:-1].copy()
+                    self._indices[q, j], self._dists[q, j] = p, d
+
+        self.keys.update(pending)
+        logger.info("knn_graph_extended", added=n_new, size=n)
+        return rows
+
+    def search_within(self, vectors: np.ndarray, positions: np.ndarray, k: int,
+                      exclude: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """kNN restricted to a subset (positions[graph_row] >= 0), widening the search for rows that come up short."""
+        width = 2 * k
+        with self._lock:
+            while True:
+                ids, dists = self.index.search(vectors, width)
+                out_ids, out_dists, short = _first_k_valid(ids, dists, positions, k, exclude)
+                if not short.any() or width >= len(self.index):
+                    return out_ids, out_dists
+                width = min(width * 4, len(self.index))
+
+    def subset(self, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray, "SubsetSearchIndex"]:
+        """
+        UMAP precomputed_knn for fitting on `rows` (in that order): neighbour
+        lists come from the stored graph, re-searched only for rows whose stored
+        neighbours mostly fall outside the subset. As in UMAP's own kNN, column 0
+        is the point itself at distance 0, followed by its k - 1 nearest members.
+        """
+        with self._lock:
+            positions = np.full(len(self), -1, dtype=np.int64)
+            positions[rows] = np.arange(len(rows))
+            own = np.arange(len(rows))
+            knn_ids, knn_dists, short = _first_k_valid(self.indices[rows], self.dists[rows], positions, k - 1, exclude=own)
+            if short.any():
+                vectors = self.index.get_vectors(rows[short])
+                knn_ids[short], knn_dists[short] = self.search_within(vectors, positions, k - 1, exclude=own[short])
+        knn_ids = np.hstack([own[:, None], knn_ids])
+        knn_dists = np.hstack([np.zeros((len(rows), 1), dtype=np.float32), knn_dists])
+        return knn_ids, knn_dists, SubsetSearchIndex(self, positions)
+
+    def pruned(self, keep: int) -> "KNNGraph":
+        """New graph over the `keep` most recently added rows (neighbour lists recomputed among them)."""
+        with self._lock:
+            keep = min(keep, len(self))
+            rows = np.arange(len(self) - keep, len(self))
+            keys_by_row = [None] * len(self)
+            for key, row in self.keys.items():
+                keys_by_row[row] = key
+            vectors = self.index.get_vectors(rows)
+        graph = KNNGraph(self.index.empty_like(), self.k)
+        graph.extend(vectors, keys=[keys_by_row[r] for r in rows])
+        logger.info("knn_graph_pruned", size=len(self), kept=len(graph))
+        return graph
+
+
+class SubsetSearchIndex:
+    """UMAP.transform search over just the rows a reducer was fitted on, backed by the shared graph index."""
+    _angular_trees = True
+
+    def __init__(self, graph: KNNGraph, positions: np.ndarray):
+        self.graph = graph
+        self.positions = positions
+
+    def query(self, vectors: np.ndarray, k: int, epsilon: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        # Graph rows added after the fit map to -1 and are skipped
+        with self.graph._lock:
+            positions = self.positions
+            if len(positions) < len(self.graph):
+                positions = np.pad(positions, (0, len(self.graph) - len(positions)), constant_values=-1)
+            return self.graph.search_within(np.asarray(vectors, dtype=np.float32), positions, k)
+
+
+def build_knn_graph(backend: Optional[str] = None) -> Optional[KNNGraph]:
+    """KNNGraph for UMAP_KNN_BACKEND ("hnsw", "exact"); None keeps UMAP's own NN-descent per fit."""
+    backend = backend or settings.UMAP_KNN_BACKEND
+    if backend == "nndescent":
+        return None
+    if backend == "hnsw":
+        return KNNGraph(HNSWIndex())
+    if backend == "exact":
+        return KNNGraph(ExactCosineIndex())
+    raise ValueError(f"Unknown UMAP_KNN_BACKEND '{backend}'")
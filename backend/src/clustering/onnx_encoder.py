@@ -0,0 +1,165 @@
+import os
+import re
+import tempfile
+import numpy as np
+from typing import List, Optional
+from ..core.logging import logger
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+# Mixed-language complaint snippets used to validate an export against PyTorch
+PARITY_TEXTS = [
+    "Ration shop closed for three days, no grain distributed",
+    "PM Kisan installment not received this year",
+    "पेंशन तीन महीने से नहीं मिली",
+    "ಕುಡಿಯುವ ನೀರಿನ ಪೈಪ್ ಒಡೆದಿದೆ",
+    "Hospital refused treatment under Ayushman Bharat card",
+    "ok",
+]
+
+
+def hf_model_id(model_name: str) -> str:
+    # SentenceTransformer resolves bare names under the sentence-transformers org
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Mean over non-padding tokens, as in the MiniLM sentence-transformers pooling config."""
+    mask = attention_mask[..., None].astype(np.float32)
+    return (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def check_parity(candidate, reference, texts: Optional[List[str]] = None, threshold: Optional[float] = None) -> float:
+    """
+    Compare two encoders on the same texts; returns the worst per-text cosine.
+    Raises ValueError below `threshold` (EMBEDDING_ONNX_MIN_COSINE).
+    """
+    texts = texts or PARITY_TEXTS
+    threshold = settings.EMBEDDING_ONNX_MIN_COSINE if threshold is None else threshold
+    got = candidate.encode(texts, batch_size=len(texts), show_progress_bar=False, convert_to_numpy=True)
+    expected = reference.encode(texts, batch_size=len(texts), show_progress_bar=False, convert_to_numpy=True)
+    worst = float(cosine_rows(np.asarray(got, dtype=np.float32), np.asarray(expected, dtype=np.float32)).min())
+    if worst < threshold:
+        raise ValueError(f"ONNX embedder parity check failed: min cosine {worst:.4f} < {threshold}")
+    return worst
+
+
+def export_onnx(model_name: str, out_dir: str, quantize: bool) -> str:
+    """
+    Export the transformer to ONNX (and optionally dynamic-int8 quantize it).
+    The export is validated against the PyTorch SentenceTransformer before it
+    is published, so a bad export never reaches the workers.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_id = hf_model_id(model_name)
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    tokenizer.save_pretrained(out_dir)
+    model = AutoModel.from_pretrained(model_id).eval()
+
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    # Everything is written under temp names and only renamed into place once
+    # the parity check passes, so load_onnx_encoder never finds an unchecked model
+    tmp_paths = []
+    for _ in range(2 if quantize else 1):
+        fd, tmp = tempfile.mkstemp(dir=out_dir, suffix=".onnx.tmp")
+        os.close(fd)
+        tmp_paths.append(tmp)
+    try:
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"]),
+                tmp_paths[0],
+                input_names=["input_ids", "attention_mask"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "last_hidden_state": {0: "batch", 1: "sequence"},
+                },
+                opset_version=14,
+            )
+
+        if quantize:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(tmp_paths[0], tmp_paths[1], weight_type=QuantType.QInt8)
+
+        worst = check_parity(OnnxSentenceEncoder(tmp_paths[-1], out_dir), SentenceTransformer(model_name))
+
+        os.replace(tmp_paths[0], fp32_path)
+        if quantize:
+            os.replace(tmp_paths[1], int8_path)
+    finally:
+        for tmp in tmp_paths:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    path = int8_path if quantize else fp32_path
+    logger.info("onnx_embedder_exported", model=model_name, path=path, quantized=quantize, min_cosine=worst)
+    return path
+
+
+class OnnxSentenceEncoder:
+    """
+    ONNX Runtime stand-in for SentenceTransformer.encode (tokenize -> transformer -> mean pool).
+    Thread counts are set explicitly so several worker processes on one node don't
+    oversubscribe the CPU.
+    """
+    def __init__(self, model_path: str, tokenizer_dir: str, num_threads: Optional[int] = None, max_seq_length: int = 128):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or settings.EMBEDDING_NUM_THREADS
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir)
+        self.max_seq_length = max_seq_length
+        self._dim = None
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dim is None:
+            self._dim = self.encode(["dimension probe"]).shape[1]
+        return self._dim
+
+    def encode(self, sentences: List[str], batch_size: int = 32, show_progress_bar: bool = False, convert_to_numpy: bool = True) -> np.ndarray:
+        out = []
+        for start in range(0, len(sentences), batch_size):
+            batch = self.tokenizer(
+                sentences[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            (hidden,) = self.session.run(
+                ["last_hidden_state"],
+                {"input_ids": batch["input_ids"].astype(np.int64), "attention_mask": batch["attention_mask"].astype(np.int64)},
+            )
+            out.append(mean_pool(hidden, batch["attention_mask"]))
+        return np.concatenate(out).astype(np.float32)
+
+
+def load_onnx_encoder(model_name: str, quantize: Optional[bool] = None) -> OnnxSentenceEncoder:
+    """Load the exported model from MODEL_CACHE_DIR, exporting (and parity-checking) it on first use."""
+    quantize = settings.EMBEDDING_ONNX_QUANTIZE if quantize is None else quantize
+    out_dir = os.path.join(settings.MODEL_CACHE_DIR, "onnx", re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name))
+    path = os.path.join(out_dir, "model.int8.onnx" if quantize else "model.onnx")
+    if not os.path.exists(path):
+        path = export_onnx(model_name, out_dir, quantize)
+    return OnnxSentenceEncoder(path, out_dir)
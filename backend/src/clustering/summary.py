@@ -0,0 +1,363 @@
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import NAMESPACE_URL, uuid5
+from ..core.logging import logger
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+HOT_CLUSTERS_KEY = "summary:clusters:hot"
+DASHBOARD_STATS_KEY = "summary:dashboard:stats"
+# Materializer aggregates, so a restarted process continues the totals
+SUMMARY_STATE_KEY = "summary:clusters:state"
+WINDOW_DAYS = 30
+
+
+def _day(value: Any) -> int:
+    """Date ordinal of a record's created_at (datetime, ISO string or missing => today)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    return datetime.now(timezone.utc).date().toordinal()
+
+
+def _region(location: Optional[Dict[str, Any]]) -> str:
+    if not location:
+        return "Unknown"
+    return location.get("state") or location.get("district") or "Unknown"
+
+
+def _growth(current: int, previous: int) -> float:
+    return round(100.0 * (current - previous) / max(previous, 1), 1)
+
+
+class SummaryStore(ABC):
+    """Precomputed dashboard payloads; the API only ever reads them."""
+    @abstractmethod
+    def write(self, hot_clusters: List[Dict[str, Any]], stats: Dict[str, Any], state: Optional[Dict[str, Any]] = None):
+        pass
+
+    @abstractmethod
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def read_hot_clusters(self) -> Optional[List[Dict[str, Any]]]:
+        pass
+
+    @abstractmethod
+    async def read_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        pass
+
+
+class RedisSummaryStore(SummaryStore):
+    def __init__(self, redis_url: Optional[str] = None):
+        import redis
+        import redis.asyncio as aioredis
+        from ..core.queue import get_async_pool
+        redis_url = redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        # Writers are the (sync) clustering jobs; readers are the async API handlers
+        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.async_client = aioredis.Redis(connection_pool=get_async_pool(redis_url))
+
+    def write(self, hot_clusters: List[Dict[str, Any]], stats: Dict[str, Any], state: Optional[Dict[str, Any]] = None):
+        pipe = self.client.pipeline()
+        pipe.set(HOT_CLUSTERS_KEY, json.dumps(hot_clusters, default=str))
+        pipe.set(DASHBOARD_STATS_KEY, json.dumps(stats, default=str))
+        if state is not None:
+            pipe.set(SUMMARY_STATE_KEY, json.dumps(state))
+        pipe.execute()
+
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(SUMMARY_STATE_KEY)
+        return json.loads(raw) if raw else None
+
+    async def _read(self, key: str) -> Any:
+        raw = await self.async_client.get(key)
+        return json.loads(raw) if raw else None
+
+    async def read_hot_clusters(self) -> Optional[List[Dict[str, Any]]]:
+        return await self._read(HOT_CLUSTERS_KEY)
+
+    async def read_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        return await self._read(DASHBOARD_STATS_KEY)
+
+
+class InMemorySummaryStore(SummaryStore):
+    """Single-process store (QUEUE_BACKEND=memory, tests)."""
+    def __init__(self):
+        self.hot_clusters: Optional[List[Dict[str, Any]]] = None
+        self.stats: Optional[Dict[str, Any]] = None
+        self.state: Optional[Dict[str, Any]] = None
+
+    def write(self, hot_clusters: List[Dict[str, Any]], stats: Dict[str, Any], state: Optional[Dict[str, Any]] = None):
+        self.hot_clusters, self.stats = hot_clusters, stats
+        if state is not None:
+            # Round-trip through JSON like the Redis store
+            self.state = json.loads(json.dumps(state))
+
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        return self.state
+
+    async def read_hot_clusters(self) -> Optional[List[Dict[str, Any]]]:
+        return self.hot_clusters
+
+    async def read_dashboard_stats(self) -> Optional[Dict[str, Any]]:
+        return self.stats
+
+
+_summary_store: Optional[SummaryStore] = None
+
+
+def get_summary_store() -> SummaryStore:
+    """Store matching QUEUE_BACKEND: Redis keys, or process memory for the "memory" backend."""
+    global _summary_store
+    if _summary_store is None:
+        _summary_store = InMemorySummaryStore() if settings.QUEUE_BACKEND == "memory" else RedisSummaryStore()
+    return _summary_store
+
+
+def label_mapping(old_labels: Sequence[int], new_labels: Sequence[int]) -> Dict[int, int]:
+    """
+    Old cluster id -> new cluster id for a refit over the same points: each old
+    cluster goes to the label most of its points received (-1 if it dissolved).
+    """
+    votes: Dict[int, Counter] = defaultdict(Counter)
+    for old, new in zip(old_labels, new_labels):
+        if int(old) != -1:
+            votes[int(old)][int(new)] += 1
+    return {old: counts.most_common(1)[0][0] for old, counts in votes.items()}
+
+
+class _ClusterAggregate:
+    __slots__ = ("days", "regions", "schemes", "prob_sum", "n")
+
+    def __init__(self):
+        self.days: Counter = Counter()
+        self.regions: Counter = Counter()
+        self.schemes: Counter = Counter()
+        self.prob_sum = 0.0
+        self.n = 0
+
+    def merge(self, other: "_ClusterAggregate"):
+        self.days.update(other.days)
+        self.regions.update(other.regions)
+        self.schemes.update(other.schemes)
+        self.prob_sum += other.prob_sum
+        self.n += other.n
+
+    def to_dict(self) -> Dict[str, Any]:
+        # JSON object keys are strings; day ordinals are restored in from_dict
+        return {"days": {str(d): n for d, n in self.days.items()}, "regions": dict(self.regions),
+                "schemes": dict(self.schemes), "prob_sum": self.prob_sum, "n": self.n}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_ClusterAggregate":
+        agg = cls()
+        agg.days = Counter({int(d): n for d, n in data["days"].items()})
+        agg.regions = Counter(data["regions"])
+        agg.schemes = Counter(data["schemes"])
+        agg.prob_sum = data["prob_sum"]
+        agg.n = data["n"]
+        return agg
+
+
+class ClusterSummaryMaterializer:
+    """
+    Running per-cluster aggregates (daily counts, regions, schemes, confidence)
+    fed by ClusterManager after every fit (reset), partial refit (relabel) and
+    incremental batch (update). Each change rewrites the precomputed
+    /clusters/hot and /dashboard/stats payloads, so the endpoints are single
+    key reads, and persists the aggregates next to them so a restarted
+    process continues the totals instead of starting from zero.
+
+    `records` are complaint dicts aligned with the clustered rows, using the
+    Complaint fields created_at, location, detected_scheme and quality_score.
+    """
+    def __init__(self, store: Optional[SummaryStore] = None, hot_limit: Optional[int] = None):
+        self.store = store
+        self.hot_limit = hot_limit or settings.CLUSTER_HOT_LIMIT
+        self._lock = threading.Lock()
+        self._clear()
+        # Aggregates don't belong to the loaded model; publishing them would
+        # overwrite the dashboard with partial totals until the next reset()
+        self.stale = False
+
+    def _clear(self):
+        self.clusters: Dict[int, _ClusterAggregate] = defaultdict(_ClusterAggregate)
+        self.all_days: Counter = Counter()
+        self.quality_sum = 0.0
+        self.quality_n = 0
+        self.model_version: Optional[str] = None
+
+    def _add(self, labels: Sequence[int], probabilities: Sequence[float], records: Sequence[Dict[str, Any]]):
+        for label, prob, record in zip(labels, probabilities, records):
+            day = _day(record.get("created_at"))
+            self.all_days[day] += 1
+            if record.get("quality_score") is not None:
+                self.quality_sum += record["quality_score"]
+                self.quality_n += 1
+            label = int(label)
+            if label == -1:
+                continue
+            agg = self.clusters[label]
+            agg.days[day] += 1
+            agg.regions[_region(record.get("location"))] += 1
+            agg.schemes.update(record.get("detected_scheme") or [])
+            agg.prob_sum += float(prob)
+            agg.n += 1
+
+    def reset(self, labels: Sequence[int], probabilities: Sequence[float], records: Sequence[Dict[str, Any]],
+              model_version: Optional[str] = None):
+        """After a full fit: cluster ids are new, rebuild from scratch."""
+        with self._lock:
+            self._clear()
+            self.model_version = model_version
+            self._add(labels, probabilities, records)
+            self.stale = False
+        self.publish()
+
+    def update(self, labels: Sequence[int], probabilities: Sequence[float], records: Sequence[Dict[str, Any]]):
+        """After an incremental batch: fold the new assignments in."""
+        with self._lock:
+            self._add(labels, probabilities, records)
+        self.publish()
+
+    def relabel(self, mapping: Dict[int, int], model_version: Optional[str] = None):
+        """
+        After a refit that renumbers clusters (see label_mapping): move each
+        aggregate to its new id, merging clusters that were combined. Clusters
+        that dissolved into noise are dropped; complaints of newly formed
+        clusters were counted as noise before and only new ones are added.
+        """
+        with self._lock:
+            clusters = self.clusters
+            self.clusters = defaultdict(_ClusterAggregate)
+            for label, agg in clusters.items():
+                new_label = mapping.get(label, -1)
+                if new_label != -1:
+                    self.clusters[new_label].merge(agg)
+            self.model_version = model_version
+        self.publish()
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model_version": self.model_version,
+                "clusters": {str(label): agg.to_dict() for label, agg in self.clusters.items()},
+                "all_days": {str(d): n for d, n in self.all_days.items()},
+                "quality_sum": self.quality_sum,
+                "quality_n": self.quality_n,
+            }
+
+    def mark_stale(self, model_version: Optional[str]):
+        """Cluster ids changed without records to rebuild from: stop publishing until reset()."""
+        with self._lock:
+            self._clear()
+            self.model_version = model_version
+            self.stale = True
+        logger.warning("cluster_summary_stale", model_version=model_version)
+
+    def restore(self, model_version: Optional[str]) -> bool:
+        """
+        Load the persisted aggregates for `model_version` (e.g. after a restart
+        from artifacts). If there are none for that version, the materializer
+        is marked stale and publishes nothing until the next reset().
+        """
+        state = None
+        if self.store is not None:
+            try:
+                state = self.store.load_state()
+            except Exception as e:
+                logger.error("cluster_summary_restore_failed", error=str(e))
+        if state is None or state["model_version"] != model_version:
+            self.mark_stale(model_version)
+            return False
+        with self._lock:
+            self._clear()
+            self.model_version = model_version
+            self.clusters.update({int(label): _ClusterAggregate.from_dict(agg) for label, agg in state["clusters"].items()})
+            self.all_days = Counter({int(d): n for d, n in state["all_days"].items()})
+            self.quality_sum = state["quality_sum"]
+            self.quality_n = state["quality_n"]
+            self.stale = False
+        logger.info("cluster_summary_restored", model_version=model_version, clusters=len(self.clusters))
+        return True
+
+    @staticmethod
+    def _window_counts(days: Counter, today: int) -> Tuple[int, int]:
+        current = sum(n for d, n in days.items() if today - WINDOW_DAYS < d <= today)
+        previous = sum(n for d, n in days.items() if today - 2 * WINDOW_DAYS < d <= today - WINDOW_DAYS)
+        return current, previous
+
+    def compute(self, today: Optional[date] = None) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """(hot clusters in the Cluster schema, dashboard stats)."""
+        today_ord = (today or datetime.now(timezone.utc).date()).toordinal()
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            summaries = []
+            for label, agg in self.clusters.items():
+                count_30d, count_prev = self._window_counts(agg.days, today_ord)
+                top_schemes = [s for s, _ in agg.schemes.most_common(3)]
+                top_region = agg.regions.most_common(1)[0][0] if agg.regions else "Unknown"
+                headline = top_schemes[0] if top_schemes else f"Cluster {label}"
+                summaries.append({
+                    "id": str(uuid5(NAMESPACE_URL, f"drishti-cluster:{self.model_version}:{label}")),
+                    "title": f"{headline} - {top_region}",
+                    "summary": f"{agg.n} complaints, {count_30d} in the last {WINDOW_DAYS} days, mostly from {top_region}.",
+                    "trend_metrics": {
+                        "count_total": agg.n,
+                        "count_30d": count_30d,
+                        "count_prev_30d": count_prev,
+                        "growth_rate": _growth(count_30d, count_prev),
+                    },
+                    "geo_distribution": dict(agg.regions.most_common(10)),
+                    "linked_scheme_ids": top_schemes,
+                    "confidence_score": round(agg.prob_sum / agg.n, 3),
+                    "cluster_label": label,
+                    "last_updated": now,
+                })
+
+            total_30d, total_prev = self._window_counts(self.all_days, today_ord)
+            critical = [
+                s for s in summaries
+                if s["trend_metrics"]["count_30d"] >= settings.CLUSTER_CRITICAL_MIN_COUNT
+                and s["trend_metrics"]["growth_rate"] >= settings.CLUSTER_CRITICAL_GROWTH
+            ]
+            stats = {
+                "total_reports": sum(self.all_days.values()),
+                "reports_trend": _growth(total_30d, total_prev),
+                "active_clusters": sum(1 for s in summaries if s["trend_metrics"]["count_30d"] > 0),
+                "critical_clusters": len(critical),
+                "avg_trust_score": round(self.quality_sum / self.quality_n, 3) if self.quality_n else None,
+                "causal_confidence": None, # Not produced by the clustering stage
+                "model_version": self.model_version,
+                "last_updated": now,
+            }
+
+        # Hot = most recent volume, weighted up by growth
+        summaries.sort(
+            key=lambda s: s["trend_metrics"]["count_30d"] * (1 + max(s["trend_metrics"]["growth_rate"], 0) / 100),
+            reverse=True,
+        )
+        return summaries[:self.hot_limit], stats
+
+    def publish(self):
+        if self.store is None or self.stale:
+            return
+        hot, stats = self.compute()
+        try:
+            self.store.write(hot, stats, self.state())
+        except Exception as e:
+            # Dashboard keeps serving the previous snapshot
+            logger.error("cluster_summary_publish_failed", error=str(e))
+            return
+        logger.info("cluster_summary_published", clusters=len(self.clusters), hot=len(hot))
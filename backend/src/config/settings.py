@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Dict, List
 
 class Settings(BaseSettings):
     # Application
@@ -15,6 +16,13 @@ class Settings(BaseSettings):
     WHISPER_MODEL: str = "faster-whisper-medium"
     EMBEDDING_MODEL: str = "paraphrase-multilingual-MiniLM-L12-v2"
     NER_MODEL: str = "xx_ent_wiki_sm"
+    NER_BATCH_SIZE: int = 64
+    NER_DISABLED_PIPES: List[str] = ["parser", "senter", "textcat"]
+    SCHEME_FUZZY_CUTOFF: float = 70.0  # window vs. scheme name (rapidfuzz ratio)
+    SCHEME_ANCHOR_CUTOFF: float = 80.0  # text token vs. scheme-name token
+    SCHEME_ANCHOR_MAX_DF: int = 20  # name tokens in more schemes than this are not anchors
+    SCHEME_MIN_FUZZY_TOKEN_LEN: int = 4
+    SCHEME_MATCH_WORKERS: int = 1  # cdist threads; -1 uses all cores
     
     # Feature Flags
     ENABLE_STREAM_PROCESSING: bool = True
@@ -23,6 +31,18 @@ class Settings(BaseSettings):
     MAX_AUDIO_DURATION_SEC: int = 300
     MIN_CONFIDENCE_THRESHOLD: float = 0.6
     DRIFT_THRESHOLD: float = 0.15
+    DRIFT_SAMPLE_SIZE: int = 256  # points per side in the MMD test
+    DRIFT_RESERVOIR_SIZE: int = 2000  # distances kept per streamed batch
+    DRIFT_WINDOW_BATCHES: int = 12
+    DRIFT_PROJECTION_DIM: int = 32
+    DRIFT_MMD_PERMUTATIONS: int = 100
+    DRIFT_MMD_ALPHA: float = 0.01
+    DRIFT_EVAL_INTERVAL_SEC: int = 300
+    DRIFT_REFERENCE_SIZE: int = 2000  # first points of a segment become its reference
+    DRIFT_MIN_WINDOW_SIZE: int = 200  # segments with fewer window points are not tested
+    DRIFT_REFIT_ON_ALERT: bool = True
+    DRIFT_REFIT_COOLDOWN_SEC: int = 3600
+    DRIFT_REFIT_BUFFER_SIZE: int = 50000  # recent embeddings kept for drift-triggered refits
 
     # API Keys
     OPENAI_API_KEY: str = ""
@@ -30,12 +50,89 @@ class Settings(BaseSettings):
     # Patch 7: Clustering Optimization
     FULL_RECLUSTER: bool = False
     LSH_ENABLED: bool = True
-    CLUSTERING_BATCH_SIZE: int = 1000
+    CLUSTERING_BATCH_SIZE: int = 10000  # rows per assignment chunk (bounds peak memory)
+    CLUSTERING_FIT_SAMPLE_SIZE: int = 50000  # larger inputs are fitted on a sample, the rest assigned
+    CLUSTER_OUTLIER_BUFFER_SIZE: int = 20000
+    CLUSTER_OUTLIER_REFIT_THRESHOLD: int = 2000  # buffered noise points that trigger a partial refit
+    UMAP_KNN_BACKEND: str = "nndescent"  # "nndescent" (rebuilt per fit) | "hnsw" | "exact" (shared graph)
+    UMAP_KNN_K: int = 30  # neighbours stored per node (>= UMAP n_neighbors)
+    UMAP_KNN_REVERSE_FACTOR: int = 3  # new points are offered to the lists of their k * factor nearest
+    UMAP_KNN_MAX_NODES: int = 200000  # larger graphs are rebuilt over their most recent rows
+    UMAP_KNN_PRUNE_TO: float = 0.75  # fraction of UMAP_KNN_MAX_NODES kept by a rebuild
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 200
+    HNSW_EF_SEARCH: int = 64
+    CLUSTER_ARTIFACT_DIR: str = "/data/cluster_artifacts"
+    CLUSTER_ARTIFACT_KEEP: int = 5
+    CLUSTER_ARTIFACT_POLL_SEC: int = 60
+    CLUSTER_HOT_LIMIT: int = 10
+    CLUSTER_CRITICAL_GROWTH: float = 50.0  # % growth (30d vs previous 30d) that marks a cluster critical
+    CLUSTER_CRITICAL_MIN_COUNT: int = 20
+
+    # Embeddings
+    EMBEDDING_BACKEND: str = "torch"  # "torch" | "onnx"
+    EMBEDDING_ONNX_QUANTIZE: bool = True  # dynamic int8 weights
+    EMBEDDING_ONNX_MIN_COSINE: float = 0.99  # parity vs PyTorch, checked at export
+    EMBEDDING_NUM_THREADS: int = 4
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_DIR: str = "/data/embedding_cache"
+    EMBEDDING_CACHE_DTYPE: str = "float16"  # "float32" | "float16" | "int8" (per-row scalar quantized)
+    EMBEDDING_STORE_DIR: str = "/data/embedding_store"
+    EMBEDDING_STORE_DTYPE: str = "float16"
+    EMBEDDING_MAX_BATCH_SIZE: int = 128
+    EMBEDDING_TOKEN_BUDGET: int = 8192  # approx tokens per forward pass
     
+    # Pipeline Stage Graph
+    PIPELINE_THREAD_WORKERS: int = 4
+    PIPELINE_EMBED_ENABLED: bool = True
+    # Seconds per stage name; stages not listed have no timeout
+    PIPELINE_STAGE_TIMEOUTS: Dict[str, float] = {"asr": 600.0, "extraction": 60.0, "schemes": 10.0, "severity": 10.0, "embedding": 30.0}
+
+    # Batch Reprocessing
+    PIPELINE_MODEL_VERSION: str = "1"  # bump after a model swap to reprocess the corpus
+    BATCH_JOB_MICRO_BATCH: int = 256
+    BATCH_JOB_FETCH_SIZE: int = 2000  # server-side cursor prefetch
+
     # Patch 8: ASR Scaling
     ASR_WORKER_POOL_SIZE: int = 2
     ASR_GPU_ENABLED: bool = False
     ASR_CONCURRENCY_LIMIT: int = 5
+    ASR_CLAIM_IDLE_MS: int = 900000  # above PIPELINE_STAGE_TIMEOUTS["asr"] (600s)
+    ASR_CACHE_MAX_ENTRIES: int = 10000
+    ASR_CACHE_TTL_SEC: int = 7 * 24 * 3600
+    ASR_CACHE_SHARED_BACKEND: str = "none"  # "none" | "redis" | "disk"
+    ASR_CACHE_DIR: str = "/data/asr_cache"
+    ASR_STREAM_PARTIALS: bool = True  # publish per-segment "partial" results before "completed"
+
+    # Audio Pre-processing (VAD)
+    VAD_ENABLED: bool = True
+    VAD_THRESHOLD: float = 0.5
+    VAD_MIN_SILENCE_MS: int = 500
+    VAD_SPEECH_PAD_MS: int = 200
+    AUDIO_UPLOAD_DIR: str = "/data/uploads"
+
+    # Queue
+    QUEUE_BACKEND: str = "redis"  # "redis" | "memory" (single process, no Redis)
+    REDIS_MAX_CONNECTIONS: int = 50
+    MEMORY_QUEUE_MAXLEN: int = 100000
+
+    # Consumer Runtime (pending-entry recovery)
+    CONSUMER_CLAIM_IDLE_MS: int = 300000
+    CONSUMER_CLAIM_INTERVAL_SEC: int = 30
+    CONSUMER_HEARTBEAT_SEC: int = 60  # in-flight entries have their idle time reset this often
+    CONSUMER_MAX_DELIVERIES: int = 5
+
+    # Ingestion Worker Batching
+    INGEST_READ_COUNT: int = 10
+    INGEST_BLOCK_MS: int = 5000
+    INGEST_MAX_INFLIGHT_JOBS: int = 4
+
+    # Dedup Index (used when LSH_ENABLED)
+    DEDUP_BACKEND: str = ""  # "redis" (shared by all ingestion replicas) | "memory" (single process); unset follows QUEUE_BACKEND
+    DEDUP_INDEX_PATH: str = "/data/dedup_index.pkl"  # snapshot of the "memory" backend
+    DEDUP_SIMHASH_DISTANCE: int = 3
+    DEDUP_MINHASH_THRESHOLD: float = 0.8
+    DEDUP_SNAPSHOT_EVERY: int = 1000
 
 
 
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from .queue import AsyncQueueInterface
+from .logging import logger
+from .monitoring import DEAD_LETTER_COUNTER, REDELIVERY_COUNTER
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+Handler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def make_consumer_name(prefix: str) -> str:
+    """Unique per process: pod hostname + pid + random suffix (pids repeat across pods)."""
+    return f"{prefix}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class StreamConsumer:
+    """
+    Consumer-group runtime shared by the pipeline workers.
+
+    - Messages are acked only after the handler returns; a raised exception
+      leaves the entry pending so it is redelivered.
+    - Entries idle longer than claim_idle_ms (e.g. from a crashed replica) are
+      claimed by this consumer and processed again. A heartbeat resets the
+      idle time of entries still being handled every heartbeat_sec, so only
+      entries of dead consumers go idle; claim_idle_ms must exceed heartbeat_sec.
+    - Entries delivered more than max_deliveries times are moved to a
+      dead-letter stream ("<stream>:dlq") and acked.
+    """
+    def __init__(
+        self,
+        queue: AsyncQueueInterface,
+        stream: str,
+        group: str,
+        handler: Handler,
+        consumer_prefix: str,
+        read_count: int = 10,
+        block_ms: int = 5000,
+        max_inflight: int = 4,
+        claim_idle_ms: Optional[int] = None,
+        max_deliveries: Optional[int] = None,
+        heartbeat_sec: Optional[float] = None,
+    ):
+        self.queue = queue
+        self.stream = stream
+        self.group = group
+        self.handler = handler
+        self.consumer = make_consumer_name(consumer_prefix)
+        self.read_count = read_count
+        self.block_ms = block_ms
+        self.max_inflight = max_inflight
+        self.claim_idle_ms = settings.CONSUMER_CLAIM_IDLE_MS if claim_idle_ms is None else claim_idle_ms
+        self.max_deliveries = settings.CONSUMER_MAX_DELIVERIES if max_deliveries is None else max_deliveries
+        self.heartbeat_sec = settings.CONSUMER_HEARTBEAT_SEC if heartbeat_sec is None else heartbeat_sec
+        self.dead_letter_stream = f"{stream}:dlq"
+
+        self.tasks = set()
+        self.inflight_ids = set()
+        self.pending_acks: List[str] = []
+        self.last_errors: Dict[str, str] = {}
+        self._last_reclaim = 0.0
+
+    def _start(self, msg_id: str, payload: Dict[str, Any]):
+        self.inflight_ids.add(msg_id)
+        task = asyncio.create_task(self._handle(msg_id, payload))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _handle(self, msg_id: str, payload: Dict[str, Any]):
+        try:
+            await self.handler(msg_id, payload)
+        except Exception as e:
+            # Left pending; reclaim() will redeliver it after claim_idle_ms
+            self.last_errors[msg_id] = str(e)
+            logger.error("consumer_handler_failed", stream=self.stream, msg_id=msg_id, error=str(e))
+            return
+        finally:
+            self.inflight_ids.discard(msg_id)
+        self.last_errors.pop(msg_id, None)
+        self.pending_acks.append(msg_id)
+
+    async def flush_acks(self):
+        if self.pending_acks:
+            acks, self.pending_acks = self.pending_acks, []
+            await self.queue.ack(self.stream, self.group, acks)
+
+    async def _dead_letter(self, msg_id: str, payload: Dict[str, Any], deliveries: int):
+        await self.queue.push(self.dead_letter_stream, {
+            **payload,
+            "dlq_original_stream": self.stream,
+            "dlq_original_id": msg_id,
+            "dlq_deliveries": deliveries,
+            "dlq_error": self.last_errors.pop(msg_id, ""),
+        })
+        await self.queue.ack(self.stream, self.group, [msg_id])
+        DEAD_LETTER_COUNTER.labels(stream=self.stream).inc()
+        logger.warning("message_dead_lettered", stream=self.stream, msg_id=msg_id, deliveries=deliveries)
+
+    async def reclaim(self, free: int) -> int:
+        """Claim stale pending entries (up to `free`) and dispatch them. Returns the number started."""
+        claimed = await self.queue.claim(self.stream, self.group, self.consumer, self.claim_idle_ms, count=free)
+        if not claimed:
+            return 0
+
+        deliveries = {
+            p["message_id"]: p["times_delivered"]
+            for p in await self.queue.pending(self.stream, self.group, count=max(100, len(claimed) * 4), consumer=self.consumer)
+        }
+        started = 0
+        for msg_id, payload in claimed:
+            if msg_id in self.inflight_ids:
+                # Our own slow handler; claiming only refreshed its idle time
+                continue
+            count = deliveries.get(msg_id, 1)
+            if count > self.max_deliveries:
+                await self._dead_letter(msg_id, payload, count)
+                continue
+            REDELIVERY_COUNTER.labels(stream=self.stream).inc()
+            logger.info("message_reclaimed", stream=self.stream, msg_id=msg_id, deliveries=count)
+            self._start(msg_id, payload)
+            started += 1
+        return started
+
+    async def heartbeat(self):
+        """Reset the idle time of in-flight entries so other replicas don't reclaim them."""
+        if self.inflight_ids:
+            await self.queue.touch(self.stream, self.group, self.consumer, list(self.inflight_ids))
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_sec)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error("consumer_heartbeat_failed", stream=self.stream, error=str(e))
+
+    async def run(self):
+        logger.info("consumer_started", stream=self.stream, group=self.group, consumer=self.consumer,
+                    read_count=self.read_count, max_inflight=self.max_inflight)
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            await self._loop()
+        finally:
+            heartbeat.cancel()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.flush_acks()
+
+                # Only pull as many messages as there are free slots
+                free = self.max_inflight - len(self.tasks)
+                if free <= 0:
+                    await asyncio.wait(set(self.tasks), return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                now = time.monotonic()
+                if now - self._last_reclaim >= settings.CONSUMER_CLAIM_INTERVAL_SEC:
+                    self._last_reclaim = now
+                    free -= await self.reclaim(free)
+                    if free <= 0:
+                        continue
+
+                # Blocking XREADGROUP; in-flight handlers keep running meanwhile
+                messages = await self.queue.read_group(
+                    self.stream, self.group, self.consumer,
+                    count=min(self.read_count, free), block=self.block_ms,
+                )
+                for _, msgs in messages:
+                    for msg_id, payload in msgs:
+                        self._start(msg_id, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("consumer_loop_error", stream=self.stream, error=str(e))
+                await asyncio.sleep(1)
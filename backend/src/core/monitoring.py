@@ -21,5 +21,17 @@ QUEUE_DEPTH = Gauge("queue_depth_count", "Current depth of ingestion queue", ["q
 
 DEDUP_HIT_RATE = Counter("dedup_hit_total", "Total duplicate content detected", ["method"])
 
+REDELIVERY_COUNTER = Counter("queue_redelivered_total", "Pending entries reclaimed from idle consumers", ["stream"])
+DEAD_LETTER_COUNTER = Counter("queue_dead_letter_total", "Messages moved to a dead-letter stream", ["stream"])
+
+# Embedding drift, per segment ("all", "cluster", "source", "language") and key
+DRIFT_KS_STATISTIC = Gauge("embedding_drift_ks_statistic", "KS statistic of distances to the reference centroid", ["segment", "key"])
+DRIFT_KS_P_VALUE = Gauge("embedding_drift_ks_p_value", "KS test p-value", ["segment", "key"])
+DRIFT_MMD = Gauge("embedding_drift_mmd", "MMD^2 on the random projection", ["segment", "key"])
+DRIFT_MMD_P_VALUE = Gauge("embedding_drift_mmd_p_value", "MMD permutation test p-value", ["segment", "key"])
+DRIFT_CENTROID_SHIFT = Gauge("embedding_drift_centroid_shift", "Cosine distance between window and reference centroids", ["segment", "key"])
+DRIFT_DETECTED = Gauge("embedding_drift_detected", "1 if the last evaluation flagged drift", ["segment", "key"])
+DRIFT_REFIT_COUNTER = Counter("embedding_drift_refits_total", "Clustering refits triggered by drift", ["segment"])
+
 def metrics_endpoint(request):
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
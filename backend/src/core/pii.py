@@ -1,31 +1,126 @@
 import re
 import hashlib
-from typing import Dict, Any, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+DEFAULT_FIELDS = ("text", "description")
+
+# 10-digit numbers (3-3-4 or 5-5 grouping)
+_NUMBER = r'(?:\d{3}[-.]?\d{3}[-.]?\d{4}|\d{5}[-\s]\d{5})\b'
+
+# Every PII class in one pattern. The word-boundary check is hoisted in front
+# of the alternation so positions inside words are rejected after one test
+# instead of once per class; at a given start, earlier alternatives win.
+PII_REGEX = re.compile(
+    r'\b(?:'
+    r'(?P<email>[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)'
+    r'|(?P<phone>' + _NUMBER + r')'
+    # Indian Aadhaar (Mock 12 digit)
+    r'|(?P<aadhaar>\d{4}\s\d{4}\s\d{4}\b)'
+    r')'
+    r'|(?P<phone_cc>\+91[-\s]?' + _NUMBER + r')'
+)
+
+# Regex group -> PII type
+PII_TYPES = {"email": "email", "phone": "phone", "phone_cc": "phone", "aadhaar": "aadhaar"}
+REPLACEMENTS = {group: f"[REDACTED_{pii_type.upper()}]" for group, pii_type in PII_TYPES.items()}
+
+# Every match contains one of these; text without them is returned untouched
+_TRIGGER = re.compile(r'[@\d]')
+
 
 class PIIRedactor:
-    def __init__(self):
-        # Basic patterns (Mock for demo)
-        self.patterns = {
-            "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            "phone": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
-            # Indian Aadhaar (Mock 12 digit)
-            "aadhaar": r'\b\d{4}\s\d{4}\s\d{4}\b'
-        }
+    """
+    Single-pass PII redaction: one compiled pattern finds every PII class
+    (email, phone, Aadhaar) in a single scan of the text.
+    """
+    def __init__(self, stream_overlap: int = 256):
+        self.regex = PII_REGEX
+        self.replacements = REPLACEMENTS
+        # Longest match redact_stream guarantees to catch across chunk boundaries
+        self.stream_overlap = stream_overlap
         self.salt = "somesalt" # In prod, rotate from Vault
 
+    def _replace(self, match: "re.Match") -> str:
+        return self.replacements[match.lastgroup]
+
     def redact_text(self, text: str) -> str:
-        for name, pattern in self.patterns.items():
-            text = re.sub(pattern, f"[REDACTED-{name.upper()}]", text)
-        return text
+        if not _TRIGGER.search(text):
+            return text
+        return self.regex.sub(self._replace, text)
+
+    def find(self, text: str) -> List[Dict[str, Any]]:
+        """PII spans as {type, start, end}."""
+        return [{"type": PII_TYPES[m.lastgroup], "start": m.start(), "end": m.end()} for m in self.regex.finditer(text)]
+
+    def redact_many(self, texts: Iterable[str]) -> List[str]:
+        sub, replace, trigger = self.regex.sub, self._replace, _TRIGGER.search
+        return [sub(replace, t) if trigger(t) else t for t in texts]
+
+    def redact_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Redact a long transcript arriving in chunks. Text is held back until it
+        is at least `stream_overlap` characters behind the newest input and cut
+        at a space or newline outside any match, so PII split across chunks is
+        still found.
+        """
+        buf = ""
+        for chunk in chunks:
+            buf += chunk
+            limit = len(buf) - self.stream_overlap
+            if limit <= 0:
+                continue
+            # Cut after the last space/newline before the held-back tail
+            cut = max(buf.rfind(" ", 0, limit), buf.rfind("\n", 0, limit)) + 1
+            if not cut:
+                continue
+            out = []
+            pos = 0
+            for m in self.regex.finditer(buf, 0, len(buf)):
+                if m.start() >= cut:
+                    break
+                if m.end() > cut:
+                    # Match straddles the cut: hold it back whole
+                    cut = m.start()
+                    break
+                out.append(buf[pos:m.start()])
+                out.append(self.replacements[m.lastgroup])
+                pos = m.end()
+            out.append(buf[pos:cut])
+            buf = buf[cut:]
+            if cut:
+                yield "".join(out)
+        if buf:
+            yield self.redact_text(buf)
 
     def tokenize(self, value: str) -> str:
         """Deterministic tokenization for analytics without revealing raw value."""
         return hashlib.sha256((value + self.salt).encode()).hexdigest()
 
-    def process_document(self, doc: Dict[str, Any], fields_to_scrub: list = ["text", "description"]) -> Dict[str, Any]:
-        """Scrub specified fields in a document."""
-        new_doc = doc.copy()
+    def process_document(self, doc: Dict[str, Any], fields_to_scrub: Sequence[str] = DEFAULT_FIELDS,
+                         inplace: bool = False) -> Dict[str, Any]:
+        """Scrub specified fields in a document (copied only if something is redacted, unless inplace)."""
+        new_doc = doc
         for field in fields_to_scrub:
-            if field in new_doc and isinstance(new_doc[field], str):
-                new_doc[field] = self.redact_text(new_doc[field])
+            value = doc.get(field)
+            if isinstance(value, str):
+                redacted = self.redact_text(value)
+                if redacted != value:
+                    if new_doc is doc and not inplace:
+                        new_doc = doc.copy()
+                    new_doc[field] = redacted
         return new_doc
+
+    def process_documents(self, docs: Iterable[Dict[str, Any]], fields_to_scrub: Sequence[str] = DEFAULT_FIELDS,
+                          inplace: bool = False) -> List[Dict[str, Any]]:
+        return [self.process_document(doc, fields_to_scrub, inplace) for doc in docs]
+
+
+_default_redactor: Optional[PIIRedactor] = None
+
+
+def get_redactor() -> PIIRedactor:
+    """Process-wide redactor (patterns are compiled once)."""
+    global _default_redactor
+    if _default_redactor is None:
+        _default_redactor = PIIRedactor()
+    return _default_redactor
@@ -1,19 +1,40 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import bisect
 import json
 import os
+import time
 import redis
+import redis.asyncio as aioredis
 from tenacity import retry, stop_after_attempt, wait_exponential
 from .logging import logger
 from .tracing import get_trace_id
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+
+def _flatten(payload: Dict[str, Any]) -> Dict[str, str]:
+    if "trace_id" not in payload:
+        payload["trace_id"] = get_trace_id()
+        
+    # Redis streams store keys/values as strings. Serialize JSON if needed or store flat.
+    # Here we store flat string items. Complex nested objects should be JSON dumped.
+    return {k: json.dumps(v) if isinstance(v, (dict, list)) else str(v) 
+            for k, v in payload.items()}
 
 class QueueInterface(ABC):
     @abstractmethod
     def push(self, stream: str, payload: Dict[str, Any]) -> str:
         pass
         
+    def push_many(self, stream: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """Push several messages; backends override this to batch the round-trips."""
+        return [self.push(stream, payload) for payload in payloads]
+
     @abstractmethod
-    def read_group(self, stream: str, group: str, consumer: str, count: int = 1) -> list:
+    def read_group(self, stream: str, group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
         pass
 
     @abstractmethod
@@ -24,35 +45,53 @@ class RedisQueue(QueueInterface):
     def __init__(self):
         self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
         self.client = redis.from_url(self.redis_url, decode_responses=True)
+        self._groups = set()  # (stream, group) pairs already created
         logger.info("connected_to_redis", url=self.redis_url)
 
+    def _ensure_group(self, stream: str, group: str):
+        if (stream, group) in self._groups:
+            return
+        try:
+            self.client.xgroup_create(stream, group, mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add((stream, group))
+
     @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
     def push(self, stream: str, payload: Dict[str, Any]) -> str:
         """Push a message to a Redis Stream with trace ID auto-injection."""
-        if "trace_id" not in payload:
-            payload["trace_id"] = get_trace_id()
-            
-        # Redis streams store keys/values as strings. Serialize JSON if needed or store flat.
-        # Here we store flat string items. Complex nested objects should be JSON dumped.
-        flat_payload = {k: json.dumps(v) if isinstance(v, (dict, list)) else str(v) 
-                        for k, v in payload.items()}
-        
+        flat_payload = _flatten(payload)
         msg_id = self.client.xadd(stream, flat_payload)
         logger.info("queue_push", stream=stream, msg_id=msg_id, trace_id=payload["trace_id"])
         return msg_id
 
-    def read_group(self, stream: str, group: str, consumer: str, count: int = 1) -> list:
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    def push_many(self, stream: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """XADD a batch of messages in a single pipelined round-trip."""
+        if not payloads:
+            return []
+        pipe = self.client.pipeline(transaction=False)
+        for payload in payloads:
+            pipe.xadd(stream, _flatten(payload))
+        msg_ids = pipe.execute()
+        logger.info("queue_push_many", stream=stream, count=len(msg_ids))
+        return msg_ids
+
+    def read_group(self, stream: str, group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
         try:
-            # Create group if not exists
-            try:
-                self.client.xgroup_create(stream, group, mkstream=True)
-            except redis.exceptions.ResponseError as e:
-                if "BUSYGROUP" not in str(e):
-                    raise
+            # Create group if not exists (cached after first success)
+            self._ensure_group(stream, group)
             
-            # Read new messages
-            messages = self.client.xreadgroup(group, consumer, {stream: ">"}, count=count)
+            # Read new messages (block is in ms; None returns immediately)
+            messages = self.client.xreadgroup(group, consumer, {stream: ">"}, count=count, block=block)
             return messages
+        except redis.exceptions.ResponseError as e:
+            # Stream/group vanished (e.g. Redis restarted without persistence); recreate next poll
+            if "NOGROUP" in str(e):
+                self._groups.discard((stream, group))
+            logger.error("queue_read_error", error=str(e), stream=stream)
+            return []
         except Exception as e:
             logger.error("queue_read_error", error=str(e), stream=stream)
             return []
@@ -60,3 +99,344 @@ class RedisQueue(QueueInterface):
     def ack(self, stream: str, group: str, message_ids: list):
         if message_ids:
             self.client.xack(stream, group, *message_ids)
+
+
+class AsyncQueueInterface(ABC):
+    """Async counterpart of QueueInterface for code running on the event loop."""
+    @abstractmethod
+    async def push(self, stream: str, payload: Dict[str, Any]) -> str:
+        pass
+
+    async def push_many(self, stream: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        return [await self.push(stream, payload) for payload in payloads]
+
+    @abstractmethod
+    async def read_group(self, stream: str, group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
+        pass
+
+    async def read_many(self, streams: List[str], group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
+        """Read new messages from several streams; same shape as read_group."""
+        messages = []
+        for stream in streams:
+            messages.extend(await self.read_group(stream, group, consumer, count))
+        return messages
+
+    @abstractmethod
+    async def ack(self, stream: str, group: str, message_ids: list):
+        pass
+
+    async def ack_many(self, group: str, acks: Dict[str, list]):
+        """Ack message ids for several streams ({stream: [ids]})."""
+        for stream, message_ids in acks.items():
+            await self.ack(stream, group, message_ids)
+
+    @abstractmethod
+    async def pending(self, stream: str, group: str, count: int = 100, consumer: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Pending (delivered, un-acked) entries, oldest first, in redis-py's xpending_range shape:
+        message_id, consumer, time_since_delivered (ms), times_delivered.
+        """
+        pass
+
+    @abstractmethod
+    async def claim(self, stream: str, group: str, consumer: str, min_idle_time: int, count: int = 100) -> list:
+        """Take over entries idle for at least min_idle_time ms (XAUTOCLAIM). Returns [(msg_id, fields)]."""
+        pass
+
+    @abstractmethod
+    async def touch(self, stream: str, group: str, consumer: str, message_ids: list):
+        """
+        Reset the idle time of entries `consumer` is still processing (XCLAIM ... JUSTID),
+        so other consumers don't reclaim them. Delivery counts are not incremented.
+        """
+        pass
+
+
+# One pool per Redis URL, shared by every AsyncRedisQueue in the process
+_async_pools: Dict[str, aioredis.ConnectionPool] = {}
+
+
+def get_async_pool(redis_url: str) -> aioredis.ConnectionPool:
+    if redis_url not in _async_pools:
+        _async_pools[redis_url] = aioredis.ConnectionPool.from_url(
+            redis_url, decode_responses=True, max_connections=settings.REDIS_MAX_CONNECTIONS
+        )
+    return _async_pools[redis_url]
+
+
+class AsyncRedisQueue(AsyncQueueInterface):
+    """Redis Streams queue on redis.asyncio, so pushes and reads never block the event loop."""
+    def __init__(self):
+        self.redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.client = aioredis.Redis(connection_pool=get_async_pool(self.redis_url))
+        self._groups = set()  # (stream, group) pairs already created
+
+    async def _ensure_group(self, stream: str, group: str):
+        if (stream, group) in self._groups:
+            return
+        try:
+            await self.client.xgroup_create(stream, group, mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._groups.add((stream, group))
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def push(self, stream: str, payload: Dict[str, Any]) -> str:
+        """Push a message to a Redis Stream with trace ID auto-injection."""
+        msg_id = await self.client.xadd(stream, _flatten(payload))
+        logger.info("queue_push", stream=stream, msg_id=msg_id, trace_id=payload["trace_id"])
+        return msg_id
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    async def push_many(self, stream: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        """XADD a batch of messages in a single pipelined round-trip."""
+        if not payloads:
+            return []
+        async with self.client.pipeline(transaction=False) as pipe:
+            for payload in payloads:
+                pipe.xadd(stream, _flatten(payload))
+            msg_ids = await pipe.execute()
+        logger.info("queue_push_many", stream=stream, count=len(msg_ids))
+        return msg_ids
+
+    async def read_group(self, stream: str, group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
+        return await self.read_many([stream], group, consumer, count, block)
+
+    async def read_many(self, streams: List[str], group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
+        """One XREADGROUP across all streams (block is in ms; None returns immediately)."""
+        try:
+            for stream in streams:
+                await self._ensure_group(stream, group)
+            return await self.client.xreadgroup(group, consumer, {s: ">" for s in streams}, count=count, block=block)
+        except redis.exceptions.ResponseError as e:
+            if "NOGROUP" in str(e):
+                self._groups = {(s, g) for s, g in self._groups if g != group}
+            logger.error("queue_read_error", error=str(e), streams=streams)
+            return []
+        except Exception as e:
+            logger.error("queue_read_error", error=str(e), streams=streams)
+            return []
+
+    async def ack(self, stream: str, group: str, message_ids: list):
+        if message_ids:
+            await self.client.xack(stream, group, *message_ids)
+
+    async def pending(self, stream: str, group: str, count: int = 100, consumer: Optional[str] = None) -> List[Dict[str, Any]]:
+        await self._ensure_group(stream, group)
+        return await self.client.xpending_range(stream, group, min="-", max="+", count=count, consumername=consumer)
+
+    async def claim(self, stream: str, group: str, consumer: str, min_idle_time: int, count: int = 100) -> list:
+        await self._ensure_group(stream, group)
+        result = await self.client.xautoclaim(stream, group, consumer, min_idle_time, start_id="0-0", count=count)
+        # [next_start_id, [(msg_id, fields), ...], deleted_ids]
+        return [entry for entry in result[1] if entry[1] is not None]
+
+    async def touch(self, stream: str, group: str, consumer: str, message_ids: list):
+        if message_ids:
+            await self.client.xclaim(stream, group, consumer, 0, list(message_ids), justid=True)
+
+    async def ack_many(self, group: str, acks: Dict[str, list]):
+        """XACK for several streams in one pipelined round-trip."""
+        acks = {stream: ids for stream, ids in acks.items() if ids}
+        if not acks:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for stream, message_ids in acks.items():
+                pipe.xack(stream, group, *message_ids)
+            await pipe.execute()
+
+
+class _PendingEntry:
+    __slots__ = ("consumer", "delivered_at", "times_delivered")
+
+    def __init__(self, consumer: str):
+        self.consumer = consumer
+        self.delivered_at = time.monotonic()
+        self.times_delivered = 1
+
+
+class _ConsumerGroup:
+    def __init__(self, last_delivered: Tuple[int, int]):
+        self.last_delivered = last_delivered
+        self.pending: Dict[Tuple[int, int], _PendingEntry] = {}
+
+
+class _Stream:
+    def __init__(self):
+        self.ids: List[Tuple[int, int]] = []  # sorted, like a Redis stream
+        self.entries: Dict[Tuple[int, int], Dict[str, str]] = {}
+        self.last_id: Tuple[int, int] = (0, 0)
+        self.groups: Dict[str, _ConsumerGroup] = {}
+
+
+def _format_id(msg_id: Tuple[int, int]) -> str:
+    return f"{msg_id[0]}-{msg_id[1]}"
+
+
+def _parse_id(msg_id: str) -> Tuple[int, int]:
+    ms, _, seq = msg_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class InMemoryQueue(AsyncQueueInterface):
+    """
+    asyncio-native Redis Streams emulation for tests and single-node deployments.
+    Follows XADD/XREADGROUP/XACK/XPENDING/XAUTOCLAIM semantics: "ms-seq" ids,
+    groups created at "$", a per-group pending entries list with delivery
+    counts, and payloads flattened to strings exactly as AsyncRedisQueue stores them.
+    """
+    def __init__(self, maxlen: Optional[int] = None):
+        self.maxlen = settings.MEMORY_QUEUE_MAXLEN if maxlen is None else maxlen
+        self._streams: Dict[str, _Stream] = {}
+        self._new_entries = asyncio.Condition()
+
+    def _stream(self, name: str) -> _Stream:
+        if name not in self._streams:
+            self._streams[name] = _Stream()
+        return self._streams[name]
+
+    def _group(self, stream: str, group: str) -> _ConsumerGroup:
+        s = self._stream(stream)
+        if group not in s.groups:
+            s.groups[group] = _ConsumerGroup(last_delivered=s.last_id)
+        return s.groups[group]
+
+    def _next_id(self, s: _Stream) -> Tuple[int, int]:
+        ms = int(time.time() * 1000)
+        if ms > s.last_id[0]:
+            return ms, 0
+        return s.last_id[0], s.last_id[1] + 1
+
+    def _append(self, stream: str, payload: Dict[str, Any]) -> str:
+        s = self._stream(stream)
+        msg_id = self._next_id(s)
+        s.ids.append(msg_id)
+        s.entries[msg_id] = _flatten(payload)
+        s.last_id = msg_id
+
+        # MAXLEN trimming; pending references to trimmed entries are dropped
+        if self.maxlen and len(s.ids) > self.maxlen:
+            trimmed, s.ids = s.ids[:-self.maxlen], s.ids[-self.maxlen:]
+            for old_id in trimmed:
+                del s.entries[old_id]
+                for g in s.groups.values():
+                    g.pending.pop(old_id, None)
+        return _format_id(msg_id)
+
+    async def _notify(self):
+        async with self._new_entries:
+            self._new_entries.notify_all()
+
+    async def push(self, stream: str, payload: Dict[str, Any]) -> str:
+        msg_id = self._append(stream, payload)
+        await self._notify()
+        return msg_id
+
+    async def push_many(self, stream: str, payloads: List[Dict[str, Any]]) -> List[str]:
+        msg_ids = [self._append(stream, payload) for payload in payloads]
+        if msg_ids:
+            await self._notify()
+        return msg_ids
+
+    def _deliver(self, streams: List[str], group: str, consumer: str, count: int) -> list:
+        messages = []
+        for name in streams:
+            s = self._stream(name)
+            g = self._group(name, group)
+            start = bisect.bisect_right(s.ids, g.last_delivered)
+            new_ids = s.ids[start:start + count] if count else s.ids[start:]
+            if not new_ids:
+                continue
+            for msg_id in new_ids:
+                g.pending[msg_id] = _PendingEntry(consumer)
+            g.last_delivered = new_ids[-1]
+            messages.append([name, [(_format_id(i), dict(s.entries[i])) for i in new_ids]])
+        return messages
+
+    async def read_group(self, stream: str, group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
+        return await self.read_many([stream], group, consumer, count, block)
+
+    async def read_many(self, streams: List[str], group: str, consumer: str, count: int = 1, block: Optional[int] = None) -> list:
+        """block is in ms like XREADGROUP: None returns immediately, 0 waits forever."""
+        messages = self._deliver(streams, group, consumer, count)
+        if messages or block is None:
+            return messages
+
+        deadline = None if block == 0 else time.monotonic() + block / 1000
+        async with self._new_entries:
+            while True:
+                messages = self._deliver(streams, group, consumer, count)
+                if messages:
+                    return messages
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return []
+                try:
+                    await asyncio.wait_for(self._new_entries.wait(), timeout)
+                except asyncio.TimeoutError:
+                    return []
+
+    async def ack(self, stream: str, group: str, message_ids: list) -> int:
+        g = self._group(stream, group)
+        return sum(1 for msg_id in message_ids if g.pending.pop(_parse_id(msg_id), None) is not None)
+
+    async def pending(self, stream: str, group: str, count: int = 100, consumer: Optional[str] = None) -> List[Dict[str, Any]]:
+        g = self._group(stream, group)
+        now = time.monotonic()
+        result = []
+        for msg_id in sorted(g.pending):
+            entry = g.pending[msg_id]
+            if consumer is not None and entry.consumer != consumer:
+                continue
+            result.append({
+                "message_id": _format_id(msg_id),
+                "consumer": entry.consumer,
+                "time_since_delivered": int((now - entry.delivered_at) * 1000),
+                "times_delivered": entry.times_delivered,
+            })
+            if len(result) >= count:
+                break
+        return result
+
+    async def claim(self, stream: str, group: str, consumer: str, min_idle_time: int, count: int = 100) -> list:
+        s = self._stream(stream)
+        g = self._group(stream, group)
+        now = time.monotonic()
+        claimed = []
+        for msg_id in sorted(g.pending):
+            entry = g.pending[msg_id]
+            if (now - entry.delivered_at) * 1000 < min_idle_time:
+                continue
+            # XAUTOCLAIM resets idle time and counts a new delivery
+            entry.consumer = consumer
+            entry.delivered_at = now
+            entry.times_delivered += 1
+            claimed.append((_format_id(msg_id), dict(s.entries[msg_id])))
+            if len(claimed) >= count:
+                break
+        return claimed
+
+    async def touch(self, stream: str, group: str, consumer: str, message_ids: list):
+        g = self._group(stream, group)
+        now = time.monotonic()
+        for msg_id in message_ids:
+            entry = g.pending.get(_parse_id(msg_id))
+            if entry is not None:
+                # XCLAIM JUSTID: new owner and idle time, same delivery count
+                entry.consumer = consumer
+                entry.delivered_at = now
+
+
+# Process-wide in-memory queue so every stage in the process shares the same streams
+_memory_queue: Optional[InMemoryQueue] = None
+
+
+def get_async_queue() -> AsyncQueueInterface:
+    """Queue backend selected by QUEUE_BACKEND ("redis" or "memory")."""
+    global _memory_queue
+    if settings.QUEUE_BACKEND == "memory":
+        if _memory_queue is None:
+            _memory_queue = InMemoryQueue()
+        return _memory_queue
+    return AsyncRedisQueue()
@@ -4,6 +4,8 @@ from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
+import re
+from .pii import get_redactor
 
 # Configuration (Hardcoded for Demo/Phase 3 speed)
 SECRET_KEY = "reality_gap_demo_secret_key_change_in_prod"
@@ -111,3 +113,14 @@ def require_role(allowed_roles: List[str]):
             )
         return user
     return role_checker
+
+
+# --- PII helpers for inbound channels (same engine as PIIRedactor) ---
+def strip_pii(text: str) -> str:
+    """Redact phone numbers, emails and Aadhaar numbers from free text."""
+    return get_redactor().redact_text(text or "")
+
+def hash_phone_number(number: str) -> str:
+    """Stable pseudonymous sender id: formatting and the +91 prefix don't change the hash."""
+    digits = re.sub(r"\D", "", number or "")
+    return get_redactor().tokenize(digits[-10:])
@@ -1,6 +1,9 @@
-from typing import List, Dict
+from typing import Any, List, Dict, Optional, Sequence
 import numpy as np
 import math
+from ..config.settings import get_settings
+
+settings = get_settings()
 
 class ActiveLearningSampler:
     def __init__(self):
@@ -36,3 +39,34 @@ class ActiveLearningSampler:
         scored_candidates.sort(key=lambda x: x['uncertainty_score'], reverse=True)
         
         return scored_candidates[:batch_size]
+
+    def sample_from_store(self,
+                          ids: Sequence[str],
+                          embeddings,
+                          cluster_probabilities: np.ndarray,
+                          ner_confidence: Optional[np.ndarray] = None,
+                          drift_detector=None,
+                          batch_size: int = 20) -> List[Dict[str, Any]]:
+        """
+        Array version of sample_for_labeling for nightly runs.
+        `embeddings` is an EmbeddingStore.matrix(ids) view (or any array aligned
+        with `ids`); it is only read, chunk by chunk, when a drift detector is
+        given, to weight up points far out in the reference distance distribution.
+        """
+        probs = np.asarray(cluster_probabilities, dtype=np.float32)
+        ner = np.ones_like(probs) if ner_confidence is None else np.asarray(ner_confidence, dtype=np.float32)
+        uncertainty = 1 - ner * probs
+
+        if drift_detector is not None and drift_detector.ref_dists is not None:
+            # 3. Drifted Samples: fraction of reference points closer to the centroid
+            novelty = np.empty(len(ids), dtype=np.float32)
+            chunk = settings.CLUSTERING_BATCH_SIZE
+            for start in range(0, len(ids), chunk):
+                dists = drift_detector.distances(embeddings[start:start + chunk])
+                novelty[start:start + chunk] = np.searchsorted(drift_detector.ref_dists, dists) / len(drift_detector.ref_dists)
+            uncertainty = np.maximum(uncertainty, novelty)
+
+        k = min(batch_size, len(ids))
+        top = np.argpartition(-uncertainty, k - 1)[:k] if k else np.array([], dtype=np.int64)
+        top = top[np.argsort(-uncertainty[top])]
+        return [{"id": ids[i], "row": int(i), "uncertainty_score": float(uncertainty[i])} for i in top]
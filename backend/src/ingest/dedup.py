@@ -1,8 +1,43 @@
 from simhash import Simhash
 from datasketch import MinHash
-from typing import List, Union
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+import hashlib
+import struct
+import numpy as np
 import re
 
+# MinHash universal hashing constants (same as datasketch)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Bit counts for every byte value, used when np.bitwise_count is unavailable (numpy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+@lru_cache(maxsize=8)
+def _minhash_permutations(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Permutation parameters shared by every document; identical to datasketch.MinHash(seed=1)."""
+    gen = np.random.RandomState(seed)
+    a, b = np.array(
+        [
+            (gen.randint(1, _MERSENNE_PRIME, dtype=np.uint64), gen.randint(0, _MERSENNE_PRIME, dtype=np.uint64))
+            for _ in range(num_perm)
+        ],
+        dtype=np.uint64,
+    ).T
+    return a, b
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Vectorized popcount over a uint64 array (any shape)."""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values).astype(np.uint8)
+    as_bytes = values.view(np.uint8).reshape(values.shape + (8,))
+    return _POPCOUNT_TABLE[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
 class FingerprintService:
     @staticmethod
     def get_features(text: str) -> List[str]:
@@ -11,7 +46,11 @@ class FingerprintService:
         text = text.lower()
         text = re.sub(r'[^\w\s]', '', text)
         tokens = text.split()
-        return [tokens[i:i+width] for i in range(max(0, len(tokens)-width+1))]
+        if len(tokens) < width:
+            # Short texts become a single shingle instead of an empty (all-zero) hash
+            return [" ".join(tokens)] if tokens else []
+        # Join shingles into strings; Simhash treats non-string features as (feature, weight) pairs
+        return [" ".join(tokens[i:i+width]) for i in range(max(0, len(tokens)-width+1))]
 
     @staticmethod
     def compute_simhash(text: str) -> str:
@@ -31,11 +70,122 @@ class FingerprintService:
         """
         Returns True if hamming distance <= threshold.
         """
-        h1 = int(hash1)
-        h2 = int(hash2)
-        x = (h1 ^ h2) & ((1 << 64) - 1)
-        ans = 0
-        while x:
-            ans += 1
-            x &= x - 1
-        return ans <= threshold
+        x = (int(hash1) ^ int(hash2)) & ((1 << 64) - 1)
+        return x.bit_count() <= threshold
+
+    # --- Batch API (backfills / bulk ingestion) ---
+
+    @staticmethod
+    def compute_simhash_batch(texts: List[str], batch_size: int = 1024) -> np.ndarray:
+        """
+        SimHash for many texts at once. Returns a uint64 array of len(texts).
+        Bit-for-bit identical to compute_simhash: each distinct shingle is hashed
+        once (md5, as the simhash package does) and per-document bit votes are
+        summed with a single reduceat over the whole chunk.
+        """
+        out = np.zeros(len(texts), dtype=np.uint64)
+        shingle_hashes: Dict[str, bytes] = {}
+
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            rows, lengths, digests = [], [], []
+            for i, text in enumerate(chunk):
+                features = FingerprintService.get_features(text)
+                if not features:
+                    continue
+                for f in features:
+                    h = shingle_hashes.get(f)
+                    if h is None:
+                        h = hashlib.md5(f.encode("utf-8")).digest()[-8:]
+                        shingle_hashes[f] = h
+                    digests.append(h)
+                rows.append(start + i)
+                lengths.append(len(features))
+
+            if not rows:
+                continue
+
+            # (n_shingles, 64) bit matrix, most significant bit first
+            bits = np.unpackbits(np.frombuffer(b"".join(digests), dtype=np.uint8).reshape(-1, 8), axis=1)
+            counts = np.asarray(lengths)
+            offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            votes = np.add.reduceat(bits, offsets, axis=0, dtype=np.int32)
+
+            packed = np.packbits(votes > (counts[:, None] / 2), axis=1)
+            out[rows] = packed.view(">u8").ravel()
+
+        return out
+
+    @staticmethod
+    def compute_minhash_batch(texts: List[str], num_perm: int = 128, batch_size: int = 256) -> np.ndarray:
+        """
+        MinHash signatures for many texts. Returns a (len(texts), num_perm) uint64 array.
+        Permutations are generated once and shared; token hashes for a chunk are
+        permuted as one matrix and min-reduced per document. Matches compute_minhash.
+        """
+        a, b = _minhash_permutations(num_perm)
+        out = np.full((len(texts), num_perm), _MAX_HASH, dtype=np.uint64)
+        token_hashes: Dict[str, int] = {}
+
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            rows, lengths, hvs = [], [], []
+            for i, text in enumerate(chunk):
+                features = set(text.lower().split())
+                if not features:
+                    continue
+                for f in features:
+                    hv = token_hashes.get(f)
+                    if hv is None:
+                        hv = struct.unpack("<I", hashlib.sha1(f.encode("utf8")).digest()[:4])[0]
+                        token_hashes[f] = hv
+                    hvs.append(hv)
+                rows.append(start + i)
+                lengths.append(len(features))
+
+            if not rows:
+                continue
+
+            hv = np.asarray(hvs, dtype=np.uint64)[:, None]
+            # uint64 wrap-around on a * hv is intentional and mirrors datasketch
+            phv = np.bitwise_and((a * hv + b) % _MERSENNE_PRIME, _MAX_HASH)
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            out[rows] = np.minimum.reduceat(phv, offsets, axis=0)
+
+        return out
+
+    @staticmethod
+    def hamming_distance_matrix(
+        hashes_a: Union[np.ndarray, List[int]],
+        hashes_b: Optional[Union[np.ndarray, List[int]]] = None,
+        chunk_size: int = 2048,
+    ) -> np.ndarray:
+        """
+        Pairwise Hamming distances between two sets of 64-bit hashes, shape (len(a), len(b)).
+        Rows are processed in chunks to bound the XOR intermediate.
+        """
+        a = np.asarray(hashes_a, dtype=np.uint64)
+        b = a if hashes_b is None else np.asarray(hashes_b, dtype=np.uint64)
+        out = np.empty((len(a), len(b)), dtype=np.uint8)
+        for start in range(0, len(a), chunk_size):
+            block = a[start:start + chunk_size, None] ^ b[None, :]
+            out[start:start + chunk_size] = popcount64(block)
+        return out
+
+    @staticmethod
+    def find_duplicate_pairs(hashes: Union[np.ndarray, List[int]], threshold: int = 3, chunk_size: int = 2048) -> np.ndarray:
+        """
+        All (i, j) index pairs with i < j and Hamming distance <= threshold.
+        Returns an (n_pairs, 2) int64 array.
+        """
+        h = np.asarray(hashes, dtype=np.uint64)
+        pairs = []
+        for start in range(0, len(h), chunk_size):
+            block = popcount64(h[start:start + chunk_size, None] ^ h[None, :])
+            i, j = np.nonzero(block <= threshold)
+            i = i + start
+            keep = i < j
+            pairs.append(np.stack([i[keep], j[keep]], axis=1))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.concatenate(pairs).astype(np.int64)
@@ -0,0 +1,479 @@
+import asyncio
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import numpy as np
+import redis.asyncio as aioredis
+from .dedup import FingerprintService
+from ..core.logging import logger
+from ..core.queue import get_async_pool
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+
+class MinHashLSHIndex:
+    """
+    Banded LSH over MinHash signatures.
+    A signature of `num_perm` values is split into `bands` slices of `rows` values;
+    two documents become candidates when any slice matches exactly.
+    Signatures live in one growing uint64 matrix (8 bytes per value); band
+    keys are the raw bytes of each slice.
+    """
+    def __init__(self, num_perm: int = 128, bands: int = 32, threshold: float = 0.8):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.tables: List[Dict[bytes, Set[int]]] = [defaultdict(set) for _ in range(bands)]
+        self.doc_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.signatures = np.empty((0, num_perm), dtype=np.uint64)
+
+    def _as_signature(self, signature: Sequence[int]) -> np.ndarray:
+        signature = np.asarray(signature, dtype=np.uint64)
+        if signature.shape != (self.num_perm,):
+            raise ValueError(f"Expected signature of length {self.num_perm}, got {len(signature)}")
+        return signature
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def insert(self, doc_id: str, signature: Sequence[int]):
+        signature = self._as_signature(signature)
+        row = self.positions.get(doc_id)
+        if row is None:
+            row = len(self.doc_ids)
+            if row == len(self.signatures):
+                # Amortized doubling instead of a copy per insert
+                grown = np.empty((max(1024, 2 * row), self.num_perm), dtype=np.uint64)
+                grown[:row] = self.signatures[:row]
+                self.signatures = grown
+            self.doc_ids.append(doc_id)
+            self.positions[doc_id] = row
+        self.signatures[row] = signature
+        for table, key in zip(self.tables, self._band_keys(signature)):
+            table[key].add(row)
+
+    def _candidate_rows(self, signature: np.ndarray) -> Set[int]:
+        found: Set[int] = set()
+        for table, key in zip(self.tables, self._band_keys(signature)):
+            bucket = table.get(key)
+            if bucket:
+                found |= bucket
+        return found
+
+    def candidates(self, signature: Sequence[int]) -> Set[str]:
+        return {self.doc_ids[row] for row in self._candidate_rows(self._as_signature(signature))}
+
+    def query(self, signature: Sequence[int]) -> List[Tuple[str, float]]:
+        """
+        Returns (doc_id, estimated_jaccard) for candidates above threshold, best first.
+        Candidates are verified against the stored signature to drop band collisions.
+        """
+        signature = self._as_signature(signature)
+        rows = np.fromiter(self._candidate_rows(signature), dtype=np.int64)
+        if not len(rows):
+            return []
+        scores = (self.signatures[rows] == signature).mean(axis=1)
+        keep = scores >= self.threshold
+        results = [(self.doc_ids[row], float(score)) for row, score in zip(rows[keep], scores[keep])]
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results
+
+    def __getstate__(self):
+        # Don't pickle the unused tail of the matrix
+        state = self.__dict__.copy()
+        state["signatures"] = self.signatures[:len(self.doc_ids)]
+        return state
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+
+class SimHashIndex:
+    """
+    Permuted-table index for Hamming distance <= k over 64-bit SimHashes.
+    The hash is split into k+1 blocks; by pigeonhole, any hash within distance k
+    matches at least one block exactly, so each block gets its own lookup table.
+    """
+    HASH_BITS = 64
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        self.num_blocks = max_distance + 1
+        if self.num_blocks > self.HASH_BITS:
+            raise ValueError("max_distance too large for 64-bit hashes")
+
+        # Spread the 64 bits as evenly as possible across blocks
+        base, extra = divmod(self.HASH_BITS, self.num_blocks)
+        self.blocks: List[Tuple[int, int]] = []
+        offset = 0
+        for i in range(self.num_blocks):
+            width = base + (1 if i < extra else 0)
+            self.blocks.append((offset, (1 << width) - 1))
+            offset += width
+
+        self.tables: List[Dict[int, Set[str]]] = [defaultdict(set) for _ in range(self.num_blocks)]
+        self.hashes: Dict[str, int] = {}
+
+    def _block_keys(self, value: int) -> List[int]:
+        return [(value >> shift) & mask for shift, mask in self.blocks]
+
+    def insert(self, doc_id: str, simhash: int):
+        value = int(simhash)
+        self.hashes[doc_id] = value
+        for table, key in zip(self.tables, self._block_keys(value)):
+            table[key].add(doc_id)
+
+    def query(self, simhash: int) -> List[Tuple[str, int]]:
+        """Returns (doc_id, hamming_distance) within max_distance, closest first."""
+        value = int(simhash)
+        candidates: Set[str] = set()
+        for table, key in zip(self.tables, self._block_keys(value)):
+            bucket = table.get(key)
+            if bucket:
+                candidates |= bucket
+
+        results = []
+        for doc_id in candidates:
+            distance = (value ^ self.hashes[doc_id]).bit_count()
+            if distance <= self.max_distance:
+                results.append((doc_id, distance))
+        results.sort(key=lambda x: x[1])
+        return results
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+
+Fingerprint = Tuple[int, np.ndarray]
+
+
+def compute_fingerprint(text: str, num_perm: int = 128) -> Optional[Fingerprint]:
+    """(simhash, minhash) of a text; None for texts without tokens, which are never matched or indexed."""
+    if not FingerprintService.get_features(text):
+        return None
+    simhash = int(FingerprintService.compute_simhash(text))
+    minhash = np.asarray(FingerprintService.compute_minhash(text, num_perm=num_perm), dtype=np.uint64)
+    return simhash, minhash
+
+
+class DedupIndex:
+    """
+    Near-duplicate lookup over the complaint corpus.
+    Combines a SimHash table index (near-identical text) with MinHash LSH
+    (high word overlap), and snapshots itself to disk so restarts stay warm.
+    In-process: only sees what this process indexed, so multi-replica
+    deployments use RedisDedupIndex.
+    """
+    def __init__(
+        self,
+        snapshot_path: Optional[str] = None,
+        simhash_distance: Optional[int] = None,
+        minhash_threshold: Optional[float] = None,
+        num_perm: int = 128,
+        bands: int = 32,
+    ):
+        self.snapshot_path = snapshot_path or settings.DEDUP_INDEX_PATH
+        self.num_perm = num_perm
+        self.bands = bands
+        self.simhash_index = SimHashIndex(
+            max_distance=settings.DEDUP_SIMHASH_DISTANCE if simhash_distance is None else simhash_distance
+        )
+        self.minhash_index = MinHashLSHIndex(
+            num_perm=num_perm,
+            bands=bands,
+            threshold=settings.DEDUP_MINHASH_THRESHOLD if minhash_threshold is None else minhash_threshold,
+        )
+        self._unsaved_inserts = 0
+        # While a snapshot is being written in a thread, inserts go here instead
+        self._deferred: Optional["DedupIndex"] = None
+
+    def empty_like(self) -> "DedupIndex":
+        """Empty in-memory index with the same parameters (e.g. for one job's documents)."""
+        return DedupIndex(
+            snapshot_path=self.snapshot_path,
+            simhash_distance=self.simhash_index.max_distance,
+            minhash_threshold=self.minhash_index.threshold,
+            num_perm=self.num_perm,
+            bands=self.bands,
+        )
+
+    def fingerprint(self, text: str) -> Optional[Fingerprint]:
+        return compute_fingerprint(text, self.num_perm)
+
+    def insert(self, doc_id: str, text: str):
+        fingerprint = self.fingerprint(text)
+        if fingerprint is not None:
+            self.add(doc_id, fingerprint)
+
+    def add(self, doc_id: str, fingerprint: Fingerprint):
+        if self._deferred is not None:
+            self._deferred.add(doc_id, fingerprint)
+            return
+        simhash, minhash = fingerprint
+        self.simhash_index.insert(doc_id, simhash)
+        self.minhash_index.insert(doc_id, minhash)
+        self._unsaved_inserts += 1
+
+    def match(self, fingerprint: Fingerprint) -> Optional[Dict]:
+        """Best existing match for a fingerprint, or None (see query)."""
+        simhash, minhash = fingerprint
+        near = self.simhash_index.query(simhash)
+        if near:
+            doc_id, distance = near[0]
+            return {
+                "doc_id": doc_id,
+                "method": "simhash",
+                "score": 1.0 - distance / SimHashIndex.HASH_BITS,
+            }
+
+        similar = self.minhash_index.query(minhash)
+        if similar:
+            doc_id, jaccard = similar[0]
+            return {"doc_id": doc_id, "method": "minhash", "score": jaccard}
+
+        if self._deferred is not None:
+            return self._deferred.match(fingerprint)
+        return None
+
+    async def match_async(self, fingerprint: Fingerprint) -> Optional[Dict]:
+        return self.match(fingerprint)
+
+    async def add_many_async(self, items: List[Tuple[str, Fingerprint]]):
+        """Index (doc_id, fingerprint) pairs, snapshotting every DEDUP_SNAPSHOT_EVERY inserts."""
+        for doc_id, fingerprint in items:
+            self.add(doc_id, fingerprint)
+        await self.maybe_snapshot()
+
+    def query(self, text: str) -> Optional[Dict]:
+        """
+        Returns the best matching existing document, or None.
+        Result dict has 'doc_id', 'method' ('simhash' or 'minhash') and 'score' in [0, 1].
+        """
+        fingerprint = self.fingerprint(text)
+        return None if fingerprint is None else self.match(fingerprint)
+
+    def _fingerprint_batch(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        simhashes = FingerprintService.compute_simhash_batch(texts)
+        minhashes = FingerprintService.compute_minhash_batch(texts, num_perm=self.num_perm)
+        return simhashes, minhashes
+
+    def batch_query(self, texts: List[str]) -> List[Optional[Dict]]:
+        simhashes, minhashes = self._fingerprint_batch(texts)
+        return [
+            self.match((int(simhash), minhash)) if FingerprintService.get_features(text) else None
+            for text, simhash, minhash in zip(texts, simhashes, minhashes)
+        ]
+
+    def insert_many(self, doc_ids: List[str], texts: List[str]):
+        """Bulk load (e.g. backfilling from the complaints table)."""
+        simhashes, minhashes = self._fingerprint_batch(texts)
+        for doc_id, text, simhash, minhash in zip(doc_ids, texts, simhashes, minhashes):
+            if FingerprintService.get_features(text):
+                self.add(doc_id, (int(simhash), minhash))
+
+    def check_and_insert(self, doc_id: str, text: str) -> Optional[Dict]:
+        """
+        Query then index in one pass (fingerprints computed once).
+        Duplicates are not inserted, so the index keeps one representative per group.
+        Texts without any tokens are neither matched nor indexed.
+        """
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            return None
+        match = self.match(fingerprint)
+        if match is None:
+            self.add(doc_id, fingerprint)
+        return match
+
+    def __len__(self) -> int:
+        return len(self.simhash_index) + (len(self._deferred) if self._deferred is not None else 0)
+
+    # --- Persistence ---
+
+    def snapshot(self, path: Optional[str] = None):
+        """Atomically write the index to disk (temp file + rename)."""
+        path = path or self.snapshot_path
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        state = {
+            "num_perm": self.num_perm,
+            "simhash_index": self.simhash_index,
+            "minhash_index": self.minhash_index,
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._unsaved_inserts = 0
+        logger.info("dedup_index_snapshot", path=path, size=len(self.simhash_index))
+
+    async def snapshot_async(self, path: Optional[str] = None):
+        """
+        snapshot() in a worker thread. The tables are not mutated meanwhile:
+        inserts made on the event loop are deferred (but still matched) and
+        applied once the file is written.
+        """
+        if self._deferred is not None:
+            return  # A snapshot is already being written
+        self._deferred = self.empty_like()
+        try:
+            await asyncio.to_thread(self.snapshot, path)
+        finally:
+            deferred, self._deferred = self._deferred, None
+            minhash = deferred.minhash_index
+            for doc_id, row in minhash.positions.items():
+                self.add(doc_id, (deferred.simhash_index.hashes[doc_id], minhash.signatures[row]))
+
+    async def maybe_snapshot(self, every: Optional[int] = None):
+        every = every or settings.DEDUP_SNAPSHOT_EVERY
+        if self._unsaved_inserts >= every:
+            await self.snapshot_async()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "DedupIndex":
+        """Load the snapshot if one exists, otherwise start an empty index."""
+        path = path or settings.DEDUP_INDEX_PATH
+        index = cls(snapshot_path=path)
+        if not os.path.exists(path):
+            logger.info("dedup_index_empty", path=path)
+            return index
+
+        try:
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+            index.num_perm = state["num_perm"]
+            index.simhash_index = state["simhash_index"]
+            index.minhash_index = state["minhash_index"]
+            index.bands = index.minhash_index.bands
+            logger.info("dedup_index_loaded", path=path, size=len(index))
+        except Exception as e:
+            logger.error("dedup_index_load_failed", path=path, error=str(e))
+        return index
+
+
+class RedisDedupIndex:
+    """
+    DedupIndex tables kept in Redis, shared by every ingestion replica and
+    surviving restarts without snapshots. Same block/band layout as the
+    in-memory indexes: one set of doc ids per SimHash block and MinHash band
+    value, plus a hash of each document's fingerprint to verify candidates.
+    A lookup is two round-trips at most.
+    """
+    def __init__(
+        self,
+        client: Optional[aioredis.Redis] = None,
+        prefix: str = "dedup",
+        simhash_distance: Optional[int] = None,
+        minhash_threshold: Optional[float] = None,
+        num_perm: int = 128,
+        bands: int = 32,
+    ):
+        if client is None:
+            client = aioredis.Redis(connection_pool=get_async_pool(os.getenv("REDIS_URL", "redis://localhost:6379/0")))
+        self.client = client
+        self.prefix = prefix
+        self.num_perm = num_perm
+        # Only used for their key layout; the tables themselves live in Redis
+        self.simhash_index = SimHashIndex(
+            max_distance=settings.DEDUP_SIMHASH_DISTANCE if simhash_distance is None else simhash_distance
+        )
+        self.minhash_index = MinHashLSHIndex(
+            num_perm=num_perm,
+            bands=bands,
+            threshold=settings.DEDUP_MINHASH_THRESHOLD if minhash_threshold is None else minhash_threshold,
+        )
+
+    def empty_like(self) -> DedupIndex:
+        """Empty in-memory index with the same parameters (e.g. for one job's documents)."""
+        return DedupIndex(
+            simhash_distance=self.simhash_index.max_distance,
+            minhash_threshold=self.minhash_index.threshold,
+            num_perm=self.num_perm,
+            bands=self.minhash_index.bands,
+        )
+
+    def fingerprint(self, text: str) -> Optional[Fingerprint]:
+        return compute_fingerprint(text, self.num_perm)
+
+    def _bucket_keys(self, fingerprint: Fingerprint) -> Tuple[List[str], List[str]]:
+        simhash, minhash = fingerprint
+        blocks = [f"{self.prefix}:sh:{b}:{key}" for b, key in enumerate(self.simhash_index._block_keys(int(simhash)))]
+        bands = [
+            f"{self.prefix}:mh:{b}:{hashlib.blake2b(key, digest_size=8).hexdigest()}"
+            for b, key in enumerate(self.minhash_index._band_keys(self.minhash_index._as_signature(minhash)))
+        ]
+        return blocks, bands
+
+    async def match_async(self, fingerprint: Fingerprint) -> Optional[Dict]:
+        """Best indexed match for a fingerprint, or None (result shape as DedupIndex.match)."""
+        simhash, minhash = int(fingerprint[0]), self.minhash_index._as_signature(fingerprint[1])
+        blocks, bands = self._bucket_keys(fingerprint)
+        pipe = self.client.pipeline(transaction=False)
+        for key in blocks + bands:
+            pipe.smembers(key)
+        buckets = await pipe.execute()
+        near = sorted(set().union(*buckets[:len(blocks)]))
+        similar = sorted(set().union(*buckets[len(blocks):]))
+
+        if near:
+            values = await self.client.hmget(f"{self.prefix}:simhash", near)
+            distances = [(doc_id, (simhash ^ int(v)).bit_count()) for doc_id, v in zip(near, values) if v is not None]
+            doc_id, distance = min(distances, key=lambda x: x[1], default=(None, SimHashIndex.HASH_BITS))
+            if distance <= self.simhash_index.max_distance:
+                return {"doc_id": doc_id, "method": "simhash", "score": 1.0 - distance / SimHashIndex.HASH_BITS}
+
+        if similar:
+            values = await self.client.hmget(f"{self.prefix}:minhash", similar)
+            found = [(doc_id, v) for doc_id, v in zip(similar, values) if v is not None]
+            if found:
+                signatures = np.stack([np.frombuffer(bytes.fromhex(v), dtype=np.uint64) for _, v in found])
+                scores = (signatures == minhash).mean(axis=1)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.minhash_index.threshold:
+                    return {"doc_id": found[best][0], "method": "minhash", "score": float(scores[best])}
+        return None
+
+    async def add_many_async(self, items: List[Tuple[str, Fingerprint]]):
+        """Index (doc_id, fingerprint) pairs in one pipelined round-trip."""
+        if not items:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for doc_id, fingerprint in items:
+            blocks, bands = self._bucket_keys(fingerprint)
+            for key in blocks + bands:
+                pipe.sadd(key, doc_id)
+            pipe.hset(f"{self.prefix}:simhash", doc_id, str(int(fingerprint[0])))
+            pipe.hset(f"{self.prefix}:minhash", doc_id, self.minhash_index._as_signature(fingerprint[1]).tobytes().hex())
+        await pipe.execute()
+
+    async def size(self) -> int:
+        return await self.client.hlen(f"{self.prefix}:simhash")
+
+
+def get_dedup_index():
+    """
+    Index selected by DEDUP_BACKEND: "redis" is shared by all ingestion
+    replicas; "memory" is per process, restored from DEDUP_INDEX_PATH.
+    Unset follows QUEUE_BACKEND.
+    """
+    backend = settings.DEDUP_BACKEND or ("memory" if settings.QUEUE_BACKEND == "memory" else "redis")
+    if backend == "memory":
+        return DedupIndex.load()
+    if backend == "redis":
+        return RedisDedupIndex()
+    raise ValueError(f"Unknown DEDUP_BACKEND '{backend}'")
@@ -1,7 +1,7 @@
 import yaml
 import os
 from typing import List
-from ..core.queue import QueueInterface, RedisQueue
+from ..core.queue import AsyncQueueInterface, get_async_queue
 from .registry import ScraperRegistry
 from ..core.logging import logger
 from ..core.tracing import generate_trace_id
@@ -9,7 +9,7 @@ from ..core.tracing import generate_trace_id
 class ScraperRouter:
     def __init__(self, config_path: str = "src/config/sources.yml"):
         self.config_path = config_path
-        self.queue: QueueInterface = RedisQueue()
+        self.queue: AsyncQueueInterface = get_async_queue()
         self.config = self._load_config()
 
     def _load_config(self) -> dict:
@@ -35,7 +35,7 @@ class ScraperRouter:
                     "trace_id": trace_id
                 }
                 
-                msg_id = self.queue.push("ingestion_jobs", job_payload)
+                msg_id = await self.queue.push("ingestion_jobs", job_payload)
                 logger.info("job_dispatched", scraper=scraper_name, msg_id=msg_id, trace_id=trace_id)
             else:
                 logger.warning("scraper_not_configured", scraper=scraper_name)
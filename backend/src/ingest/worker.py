@@ -1,26 +1,40 @@
 import asyncio
 import json
-from typing import Dict, Any
-from ..core.queue import RedisQueue
+from typing import Dict, Any, Optional
+from ..core.queue import AsyncQueueInterface, get_async_queue
+from ..core.consumer import StreamConsumer
 from ..core.logging import logger
 from ..core.tracing import set_trace_id, get_trace_id, TraceContext
 from .registry import ScraperRegistry
 from .registry import ScraperRegistry
 # Ensure scrapers are registered
 import src.ingest.scrapers
-from ..core.pii import PIIRedactor
+from ..core.pii import get_redactor
+from ..core.monitoring import DEDUP_HIT_RATE
+from ..config.settings import get_settings
+from .dedup_index import get_dedup_index
+
+settings = get_settings()
 
 
 class IngestionWorker:
-    def __init__(self):
-        self.queue = RedisQueue()
+    def __init__(self, queue: Optional[AsyncQueueInterface] = None):
+        self.queue = queue or get_async_queue()
         self.job_stream = "ingestion_jobs"
         self.data_stream = "complaint_events"
         self.group = "ingestion_workers"
-        self.group = "ingestion_workers"
-        self.consumer = "worker_1" # In prod, unique ID
-        self.redactor = PIIRedactor()
-
+        self.redactor = get_redactor()
+        # Batched consumption with ack-after-processing and stale-entry reclaim
+        self.runtime = StreamConsumer(
+            self.queue, self.job_stream, self.group, self.process_job,
+            consumer_prefix="ingest",
+            read_count=settings.INGEST_READ_COUNT,
+            block_ms=settings.INGEST_BLOCK_MS,
+            max_inflight=settings.INGEST_MAX_INFLIGHT_JOBS,
+        )
+        self.consumer = self.runtime.consumer
+        # Near-duplicate index (shared across replicas with the Redis backend)
+        self.dedup_index = get_dedup_index() if settings.LSH_ENABLED else None
 
     async def process_job(self, msg_id: str, payload: Dict[str, Any]):
         trace_id = payload.get("trace_id")
@@ -39,38 +53,44 @@ class IngestionWorker:
                 scraper = scraper_cls(config)
                 complaints = await scraper.run()
                 
+                batch = []
+                # This job's new complaints; indexed only after the push (a retried
+                # job must not be matched against its own earlier attempt)
+                job_index = self.dedup_index.empty_like() if self.dedup_index is not None else None
+                new_fingerprints = []
                 for complaint in complaints:
                      # Ensure trace_id propagates
                     complaint.trace_id = get_trace_id()
-                    
-                    complaint.trace_id = get_trace_id()
+
+                    # Near-duplicate check against the indexed corpus and the rest of this job
+                    if self.dedup_index is not None:
+                        fingerprint = self.dedup_index.fingerprint(complaint.raw_text)
+                        if fingerprint is not None:
+                            match = await self.dedup_index.match_async(fingerprint) or job_index.match(fingerprint)
+                            if match:
+                                DEDUP_HIT_RATE.labels(method=match["method"]).inc()
+                                logger.info("duplicate_skipped", duplicate_of=match["doc_id"], method=match["method"], score=match["score"])
+                                continue
+                            job_index.add(str(complaint.id), fingerprint)
+                            new_fingerprints.append((str(complaint.id), fingerprint))
                     
                     # PII Scrubbing
-                    safe_data = self.redactor.process_document(complaint.model_dump(mode='json'))
-                    
-                    # Push standard complaint to data stream
-                    self.queue.push(self.data_stream, safe_data)
+                    batch.append(self.redactor.process_document(complaint.model_dump(mode='json'), inplace=True))
 
-                
-                logger.info("job_completed", count=len(complaints))
+                # Push all complaints from this job to the data stream in one round-trip
+                await self.queue.push_many(self.data_stream, batch)
+
+                if self.dedup_index is not None:
+                    await self.dedup_index.add_many_async(new_fingerprints)
+
+                logger.info("job_completed", count=len(complaints), pushed=len(batch))
             except Exception as e:
                 logger.error("job_failed", error=str(e))
+                # Leave the job pending so it is retried (and dead-lettered after repeated failures)
+                raise
 
     async def run(self):
-        logger.info("ingestion_worker_started")
-        while True:
-            try:
-                # Read from generic job stream
-                messages = self.queue.read_group(self.job_stream, self.group, self.consumer)
-                for stream, msgs in messages:
-                    for msg_id, data in msgs:
-                        await self.process_job(msg_id, data)
-                        self.queue.ack(stream, self.group, [msg_id])
-                
-                await asyncio.sleep(0.1)
-            except Exception as e:
-                logger.error("worker_loop_error", error=str(e))
-                await asyncio.sleep(1)
+        await self.runtime.run()
 
 if __name__ == "__main__":
     worker = IngestionWorker()
@@ -1,12 +1,83 @@
+import re
+from collections import Counter, defaultdict, deque
 from rapidfuzz import process, fuzz
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 from ..core.model_registry import ModelRegistry, AbstractModel
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+_TOKEN = re.compile(r"\w+")
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """Lowercased word tokens; punctuation and spacing differences disappear."""
+    return _TOKEN.findall(text.lower())
+
+
+class TokenAutomaton:
+    """
+    Aho-Corasick automaton over word tokens: finds every phrase occurrence
+    (single- or multi-word) in one left-to-right pass over the text tokens,
+    independent of how many phrases there are.
+    """
+    def __init__(self, phrases: Dict[Tuple[str, ...], str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, str]]] = [[]]  # (phrase length, value) ending at this state
+
+        for phrase, value in phrases.items():
+            state = 0
+            for token in phrase:
+                nxt = self.goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][token] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(phrase), value))
+
+        # Failure links, breadth-first (depth-1 states fall back to the root)
+        todo = deque(self.goto[0].values())
+        while todo:
+            state = todo.popleft()
+            for token, nxt in self.goto[state].items():
+                todo.append(nxt)
+                if state == 0:
+                    continue
+                f = self.fail[state]
+                while f and token not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(token, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, tokens: Sequence[str]) -> Iterator[Tuple[int, int, str]]:
+        """Yields (start token, end token exclusive, value) for every occurrence."""
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            for length, value in self.out[state]:
+                yield i + 1 - length, i + 1, value
+
 
 @ModelRegistry.register("scheme_matcher")
 class SchemeMatcher(AbstractModel):
-    def __init__(self):
+    """
+    Compiled scheme matcher, built once per catalog:
+      1. Exact: token Aho-Corasick over aliases and normalized scheme names
+         (multi-word aliases such as "PM Kisan" included) -> score 100.
+      2. Fuzzy: text tokens are compared (rapidfuzz cdist) with the
+         distinctive tokens of scheme names; only the windows around those
+         anchors are scored against the names they could belong to. Cost grows
+         with text length and catalog size separately, not with their product.
+    """
+    def __init__(self, schemes: Optional[List[str]] = None, aliases: Optional[Dict[str, str]] = None):
         # In a real app, load this from DB or Config
-        self.known_schemes = [
+        self.known_schemes = schemes or [
             "Pradhan Mantri Awas Yojana",
             "Mahatma Gandhi National Rural Employment Guarantee Act",
             "PM Kisan Samman Nidhi",
@@ -14,50 +85,96 @@ class SchemeMatcher(AbstractModel):
             "Swachh Bharat Mission",
             "Jal Jeevan Mission"
         ]
-        
-        self.aliases = {
+
+        self.aliases = aliases or {
             "PMAY": "Pradhan Mantri Awas Yojana",
             "MNREGA": "Mahatma Gandhi National Rural Employment Guarantee Act",
             "MGNREGA": "Mahatma Gandhi National Rural Employment Guarantee Act",
             "PM Kisan": "PM Kisan Samman Nidhi"
         }
+        self._compile()
 
-    def predict(self, text: str) -> dict:
-        """
-        Identify scheme mentions in text using fuzzy matching.
-        """
-        # 1. Direct Alias Lookup (Fastest)
-        found_schemes = {}
-        for word in text.split():
-            clean_word = word.strip(".,!?").upper()
-            if clean_word in self.aliases:
-                target = self.aliases[clean_word]
-                found_schemes[target] = 100.0
-
-        # 2. Fuzzy Match against Known Schemes
-        # Extract best match from the whole string (simple approach) or sliding window
-        # Here we just check if any scheme is plausibly mentioned
-        
-        # Using extraction based on scheme list
-        results = process.extract(
-            text, 
-            self.known_schemes, 
-            scorer=fuzz.partial_ratio, 
-            limit=3,
-            score_cutoff=70
+    def _compile(self):
+        self.scheme_tokens = [normalize_tokens(s) for s in self.known_schemes]
+        self.scheme_norm = [" ".join(t) for t in self.scheme_tokens]
+
+        phrases: Dict[Tuple[str, ...], str] = {}
+        for name, tokens in zip(self.known_schemes, self.scheme_tokens):
+            phrases[tuple(tokens)] = name
+        for alias, name in self.aliases.items():
+            phrases[tuple(normalize_tokens(alias))] = name
+        self.automaton = TokenAutomaton(phrases)
+
+        # Fuzzy anchors: tokens shared by few schemes ("kisan", not "yojana"),
+        # falling back to all tokens for names made only of common words
+        min_len = settings.SCHEME_MIN_FUZZY_TOKEN_LEN
+        df = Counter(t for tokens in self.scheme_tokens for t in set(tokens))
+        anchors = defaultdict(list)  # vocab token -> [(scheme index, position in name)]
+        for idx, tokens in enumerate(self.scheme_tokens):
+            positions = [(p, t) for p, t in enumerate(tokens) if len(t) >= min_len]
+            rare = [(p, t) for p, t in positions if df[t] <= settings.SCHEME_ANCHOR_MAX_DF]
+            for p, t in rare or positions:
+                anchors[t].append((idx, p))
+        self.anchor_vocab = list(anchors)
+        self.anchor_targets = [anchors[t] for t in self.anchor_vocab]
+
+    def _anchor_hits(self, unique_tokens: List[str]) -> Dict[str, List[int]]:
+        """Text token -> indices into anchor_vocab it fuzzily matches (one cdist call)."""
+        candidates = [t for t in unique_tokens if len(t) >= settings.SCHEME_MIN_FUZZY_TOKEN_LEN]
+        if not candidates or not self.anchor_vocab:
+            return {}
+        scores = process.cdist(
+            candidates, self.anchor_vocab, scorer=fuzz.ratio,
+            score_cutoff=settings.SCHEME_ANCHOR_CUTOFF, workers=settings.SCHEME_MATCH_WORKERS,
         )
-        
-        for scheme_name, score, _ in results:
+        return {tok: row.nonzero()[0].tolist() for tok, row in zip(candidates, scores) if row.any()}
+
+    def _match(self, tokens: List[str], hits: Dict[str, List[int]]) -> List[dict]:
+        found_schemes: Dict[str, float] = {}
+
+        # 1. Exact aliases / names
+        for _, _, scheme in self.automaton.iter_matches(tokens):
+            found_schemes[scheme] = 100.0
+
+        # 2. Fuzzy Match on the windows around anchor tokens
+        fuzzy: Dict[int, float] = {}
+        seen = set()
+        for i, token in enumerate(tokens):
+            for v in hits.get(token, ()):
+                for idx, pos in self.anchor_targets[v]:
+                    start = max(i - pos, 0)
+                    key = (idx, start)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    window = " ".join(tokens[start:start + len(self.scheme_tokens[idx])])
+                    score = fuzz.ratio(window, self.scheme_norm[idx], score_cutoff=settings.SCHEME_FUZZY_CUTOFF)
+                    if score > fuzzy.get(idx, 0.0):
+                        fuzzy[idx] = score
+        for idx, score in sorted(fuzzy.items(), key=lambda kv: -kv[1])[:3]:
+            scheme_name = self.known_schemes[idx]
             if scheme_name not in found_schemes or score > found_schemes[scheme_name]:
                 found_schemes[scheme_name] = score
 
         # Format output
         matches = []
-        for scheme, score in found_schemes.items():
+        for scheme, score in sorted(found_schemes.items(), key=lambda kv: -kv[1]):
             matches.append({
                 "scheme_name": scheme,
                 "confidence_score": score,
                 "is_confident": score > 85
             })
-            
-        return {"matches": matches}
+        return matches
+
+    def predict(self, text: str) -> dict:
+        """
+        Identify scheme mentions in text using alias lookup and fuzzy matching.
+        """
+        tokens = normalize_tokens(text)
+        return {"matches": self._match(tokens, self._anchor_hits(list(set(tokens))))}
+
+    def predict_batch(self, texts: List[str]) -> List[dict]:
+        """predict() for many texts with a single cdist over all their distinct tokens."""
+        token_lists = [normalize_tokens(t) for t in texts]
+        hits = self._anchor_hits(list({t for tokens in token_lists for t in tokens}))
+        return [{"matches": self._match(tokens, hits)} for tokens in token_lists]
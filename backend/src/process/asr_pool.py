@@ -0,0 +1,124 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Optional, Tuple
+from ..core.logging import logger
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+# Per-process Whisper instance, created once by the pool initializer
+_processor = None
+
+
+def _init_worker():
+    global _processor
+    from .audio import WhisperAudioProcessor
+    _processor = WhisperAudioProcessor()
+    _processor.warm_up()
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _transcribe(file_path: str) -> dict:
+    return _processor.predict(file_path)
+
+
+def _transcribe_stream(file_path: str, channel) -> None:
+    # Events go through a manager queue as they decode; the future only signals completion
+    segments, info = _processor.predict_stream(file_path)
+    channel.put(("info", info))
+    for segment in segments:
+        channel.put(("segment", segment))
+    channel.put(("done", None))
+
+
+class ASRProcessPool:
+    """
+    Whisper inference in a pool of worker processes.
+    Each process loads and warms the model once; submissions are bounded by
+    ASR_CONCURRENCY_LIMIT so the queue consumer gets backpressure instead of an
+    unbounded executor backlog. A crashed process breaks the pool, which is
+    then replaced, and the failing job surfaces BrokenProcessPool for retry.
+    """
+    def __init__(self, size: Optional[int] = None, max_pending: Optional[int] = None):
+        self.size = size or settings.ASR_WORKER_POOL_SIZE
+        self.semaphore = asyncio.Semaphore(max_pending or settings.ASR_CONCURRENCY_LIMIT)
+        # spawn: CTranslate2/OpenMP state is not fork-safe
+        self._context = multiprocessing.get_context("spawn")
+        self.executor = self._create()
+        self._manager = None
+
+    def _create(self) -> ProcessPoolExecutor:
+        logger.info("asr_pool_starting", size=self.size)
+        return ProcessPoolExecutor(max_workers=self.size, mp_context=self._context, initializer=_init_worker)
+
+    def _replace(self, broken: ProcessPoolExecutor):
+        # Concurrent jobs may all observe the same broken pool; replace it once
+        if self.executor is broken:
+            logger.error("asr_pool_broken_restarting", size=self.size)
+            broken.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._create()
+
+    async def start(self):
+        """Spawn and warm every worker up front instead of on the first jobs."""
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(*[loop.run_in_executor(self.executor, _ping) for _ in range(self.size)])
+        logger.info("asr_pool_ready", size=self.size, workers=len(set(pids)))
+
+    async def transcribe(self, file_path: str) -> dict:
+        async with self.semaphore:
+            executor = self.executor
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(executor, _transcribe, file_path)
+            except BrokenProcessPool:
+                self._replace(executor)
+                raise
+
+    async def transcribe_stream(self, file_path: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Yields ("info", dict) and then ("segment", dict) events as the worker decodes them.
+        A crashed worker surfaces BrokenProcessPool, as in transcribe().
+        The permit is held until the worker job finishes, not across the yields,
+        so a consumer that stops iterating early never keeps it.
+        """
+        if self._manager is None:
+            self._manager = self._context.Manager()
+        await self.semaphore.acquire()
+        try:
+            executor = self.executor
+            loop = asyncio.get_running_loop()
+            channel = self._manager.Queue()
+            future = loop.run_in_executor(executor, _transcribe_stream, file_path, channel)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        future.add_done_callback(lambda _: self.semaphore.release())
+        try:
+            while True:
+                try:
+                    kind, data = await asyncio.to_thread(channel.get, True, 0.5)
+                except queue.Empty:
+                    # Nothing new; if the job ended without "done" it raised (or the pool broke)
+                    if future.done():
+                        future.result()
+                        raise RuntimeError("ASR stream ended without completion")
+                    continue
+                if kind == "done":
+                    break
+                yield kind, data
+            await future
+        except BrokenProcessPool:
+            self._replace(executor)
+            raise
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        if self._manager is not None:
+            self._manager.shutdown()
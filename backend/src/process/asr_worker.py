@@ -1,75 +1,125 @@
 import asyncio
-import hashlib
+import contextlib
 from typing import Dict, Any, Optional
-from ..core.queue import RedisQueue
+from ..core.queue import AsyncQueueInterface, get_async_queue
+from ..core.consumer import StreamConsumer
 from ..core.logging import logger
 from ..config.settings import get_settings
-from .audio import WhisperAudioProcessor
+from concurrent.futures.process import BrokenProcessPool
+from .asr_pool import ASRProcessPool
+from .audio import whisper_compute_type
+from .audio_preprocess import AudioTooLongError
+from .transcript_cache import build_transcript_cache, hash_audio_file, transcript_cache_key
 
 settings = get_settings()
 
 class ASRWorker:
-    def __init__(self):
-        self.queue = RedisQueue()
+    def __init__(self, queue: Optional[AsyncQueueInterface] = None):
+        self.queue = queue or get_async_queue()
         self.job_stream = "asr_jobs"
         self.group = "asr_workers"
-        self.consumer = "asr_worker_1"
-        self.processor = WhisperAudioProcessor()
-        self.semaphore = asyncio.Semaphore(settings.ASR_CONCURRENCY_LIMIT)
+        # Whisper runs in a process pool (one warm model per process); backpressure lives in the pool
+        self.pool = ASRProcessPool()
+        self.compute_type = whisper_compute_type()
+        # Jobs are acked only once their result has been published. Only as many
+        # jobs as there are pool processes are taken, so none sit pending (and
+        # aging towards reclaim) behind the pool semaphore; a transcription may
+        # take up to the ASR stage timeout before it counts as stale.
+        self.runtime = StreamConsumer(
+            self.queue, self.job_stream, self.group, self.process_job,
+            consumer_prefix="asr",
+            read_count=self.pool.size,
+            block_ms=1000,
+            max_inflight=self.pool.size,
+            claim_idle_ms=settings.ASR_CLAIM_IDLE_MS,
+        )
+        self.consumer = self.runtime.consumer
         
-        # Simple in-memory cache for demo (LRU in prod)
-        self.cache: Dict[str, Dict] = {}
+        # Bounded LRU/TTL cache keyed on audio content (+ optional shared tier)
+        self.cache = build_transcript_cache()
 
-    def get_cache_key(self, file_path: str) -> str:
-        # specific to file path + model
-        return hashlib.md5(f"{file_path}:{settings.WHISPER_MODEL}".encode()).hexdigest()
+    async def get_cache_key(self, file_path: str) -> str:
+        # Content hash, so the same voice note forwarded under another path still hits
+        content_hash = await asyncio.to_thread(hash_audio_file, file_path)
+        return transcript_cache_key(content_hash, settings.WHISPER_MODEL, self.compute_type)
+
+    async def transcribe_streaming(self, file_path: str, trace_id: Optional[str]) -> Dict[str, Any]:
+        """
+        Publish each segment to asr_results as soon as it is decoded ("partial"),
+        then return the joined transcript in the same shape as predict().
+        """
+        info: Dict[str, Any] = {}
+        texts = []
+        # Closed right away if a push fails or the job is cancelled mid-stream
+        async with contextlib.aclosing(self.pool.transcribe_stream(file_path)) as events:
+            async for kind, data in events:
+                if kind == "info":
+                    info = data
+                    continue
+                texts.append(data["text"])
+                await self.queue.push("asr_results", {
+                    "trace_id": trace_id,
+                    "status": "partial",
+                    "segment_index": data["index"],
+                    "start": data["start"],
+                    "end": data["end"],
+                    "text": data["text"],
+                    "avg_logprob": data["avg_logprob"],
+                    "language": info.get("language"),
+                })
+        return {"text": " ".join(texts).strip(), **info}
 
     async def process_job(self, msg_id: str, payload: Dict[str, Any]):
         file_path = payload.get("file_path")
         trace_id = payload.get("trace_id")
-        
-        cache_key = self.get_cache_key(file_path)
+
+        try:
+            cache_key = await self.get_cache_key(file_path)
+        except Exception as e:
+            logger.error("asr_failed", error=str(e), trace_id=trace_id)
+            await self.queue.push("asr_results", {"trace_id": trace_id, "status": "failed", "error": str(e)})
+            return
         
         # Check Cache
-        if cache_key in self.cache:
+        result = await self.cache.get(cache_key)
+        if result is not None:
             logger.info("asr_cache_hit", trace_id=trace_id)
-            result = self.cache[cache_key]
             # Emit result
-            self.queue.push("asr_results", {**result, "trace_id": trace_id, "status": "completed"})
+            await self.queue.push("asr_results", {**result, "trace_id": trace_id, "status": "completed"})
             return
 
-        async with self.semaphore:
-            try:
-                logger.info("asr_start", trace_id=trace_id, file=file_path)
-                # Run CPU/GPU bound task in thread pool
-                result = await asyncio.to_thread(self.processor.predict, file_path)
-                
-                # Update Cache
-                self.cache[cache_key] = result
-                
-                self.queue.push("asr_results", {**result, "trace_id": trace_id, "status": "completed"})
-                logger.info("asr_complete", trace_id=trace_id)
-                
-            except Exception as e:
-                logger.error("asr_failed", error=str(e), trace_id=trace_id)
-                self.queue.push("asr_results", {"trace_id": trace_id, "status": "failed", "error": str(e)})
+        try:
+            logger.info("asr_start", trace_id=trace_id, file=file_path)
+            # Run CPU/GPU bound inference in the worker process pool
+            if settings.ASR_STREAM_PARTIALS:
+                result = await self.transcribe_streaming(file_path, trace_id)
+            else:
+                result = await self.pool.transcribe(file_path)
+            
+            # Update Cache
+            await self.cache.set(cache_key, result)
+            
+            await self.queue.push("asr_results", {**result, "trace_id": trace_id, "status": "completed"})
+            logger.info("asr_complete", trace_id=trace_id)
+
+        except AudioTooLongError as e:
+            # Deterministic; retrying would fail the same way
+            logger.warning("asr_rejected", error=str(e), trace_id=trace_id)
+            await self.queue.push("asr_results", {"trace_id": trace_id, "status": "rejected", "error": str(e)})
+        except BrokenProcessPool:
+            # A worker process died (possibly on this audio); leave pending for retry / dead-letter
+            raise
+        except Exception as e:
+            logger.error("asr_failed", error=str(e), trace_id=trace_id)
+            await self.queue.push("asr_results", {"trace_id": trace_id, "status": "failed", "error": str(e)})
 
     async def run(self):
-        logger.info("asr_worker_started", concurrency=settings.ASR_CONCURRENCY_LIMIT, gpu=settings.ASR_GPU_ENABLED)
-        while True:
-            try:
-                # Read from asr job stream
-                messages = self.queue.read_group(self.job_stream, self.group, self.consumer)
-                for stream, msgs in messages:
-                    for msg_id, data in msgs:
-                        # Fire and forget / background task to allow concurrency
-                        asyncio.create_task(self.process_job(msg_id, data))
-                        self.queue.ack(stream, self.group, [msg_id])
-                
-                await asyncio.sleep(0.1)
-            except Exception as e:
-                logger.error("asr_worker_loop_error", error=str(e))
-                await asyncio.sleep(1)
+        logger.info("asr_worker_started", max_inflight=self.runtime.max_inflight, pool_size=self.pool.size, gpu=settings.ASR_GPU_ENABLED)
+        try:
+            await self.pool.start()
+            await self.runtime.run()
+        finally:
+            self.pool.shutdown()
 
 if __name__ == "__main__":
     worker = ASRWorker()
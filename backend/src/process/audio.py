@@ -1,37 +1,79 @@
 import os
+import numpy as np
+from typing import Iterator, Tuple
 from ..core.model_registry import ModelRegistry, AbstractModel
 from ..config.settings import get_settings
+from .audio_preprocess import detect_speech, prepare_audio
 # import faster_whisper # Lazy import to avoid load time on startup if not needed
 
 settings = get_settings()
 
+def whisper_compute_type() -> str:
+    return "float16" if settings.ASR_GPU_ENABLED else "int8"
+
 @ModelRegistry.register("whisper")
 class WhisperAudioProcessor(AbstractModel):
     def __init__(self):
         from faster_whisper import WhisperModel
         # Use settings for model size and compute type
         device = "cuda" if settings.ASR_GPU_ENABLED else "cpu"
-        compute_type = "float16" if settings.ASR_GPU_ENABLED else "int8"
+        compute_type = whisper_compute_type()
+        self.compute_type = compute_type
         
         self.model = WhisperModel(settings.WHISPER_MODEL, device=device, compute_type=compute_type)
 
 
-    def predict(self, file_path: str) -> dict:
+    def warm_up(self):
+        """Decode one second of silence so the first real job doesn't pay for lazy initialisation."""
+        silence = np.zeros(16000, dtype=np.float32)
+        segments, _ = self.model.transcribe(silence, beam_size=1, language="en")
+        list(segments)
+        if settings.VAD_ENABLED:
+            detect_speech(silence)
+
+    def predict_stream(self, file_path: str) -> Tuple[Iterator[dict], dict]:
         """
-        Transcribe audio file.
-        Returns dict with 'text', 'language', 'confidence'.
+        Lazy transcription: returns (segments, info) like faster-whisper itself.
+        Segments are decoded as the iterator is consumed, so callers can act on
+        each one before the rest of the audio has been processed.
         """
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Audio file not found: {file_path}")
 
-        segments, info = self.model.transcribe(file_path, beam_size=5)
-        
-        # Combine segments
-        full_text = " ".join([segment.text for segment in segments])
-        
-        return {
-            "text": full_text.strip(),
+        # Decode once, enforce MAX_AUDIO_DURATION_SEC, keep only speech regions
+        audio = prepare_audio(file_path)
+        if audio.is_empty:
+            return iter(()), {"language": None, "language_probability": 0.0, "duration": audio.duration, "speech_duration": 0.0}
+
+        segments, info = self.model.transcribe(audio.samples, beam_size=5)
+        info_dict = {
             "language": info.language,
             "language_probability": info.language_probability,
-            "duration": info.duration
+            "duration": audio.duration,
+            "speech_duration": audio.speech_duration
         }
+
+        def iter_segments():
+            for index, segment in enumerate(segments):
+                # Timestamps refer to the original recording, not the trimmed audio
+                yield {
+                    "index": index,
+                    "start": audio.to_original_time(segment.start),
+                    "end": audio.to_original_time(segment.end),
+                    "text": segment.text.strip(),
+                    "avg_logprob": segment.avg_logprob,
+                }
+
+        return iter_segments(), info_dict
+
+    def predict(self, file_path: str) -> dict:
+        """
+        Transcribe audio file.
+        Returns dict with 'text', 'language', 'confidence'.
+        """
+        segments, info = self.predict_stream(file_path)
+        
+        # Combine segments
+        full_text = " ".join([segment["text"] for segment in segments])
+        
+        return {"text": full_text.strip(), **info}
@@ -0,0 +1,85 @@
+import numpy as np
+from typing import Dict, List, Optional
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+SAMPLING_RATE = 16000
+
+
+class AudioTooLongError(ValueError):
+    """Raised when a recording exceeds MAX_AUDIO_DURATION_SEC."""
+    pass
+
+
+class PreparedAudio:
+    """
+    Speech-only audio ready for Whisper, plus the map back to the original timeline.
+    `chunks` are (start, end) sample ranges in the original recording; `samples`
+    is their concatenation.
+    """
+    def __init__(self, samples: np.ndarray, chunks: List[Dict[str, int]], duration: float):
+        self.samples = samples
+        self.chunks = chunks
+        self.duration = duration
+        # Where each chunk starts inside `samples`
+        lengths = np.array([c["end"] - c["start"] for c in chunks], dtype=np.int64)
+        self._offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]]) if len(chunks) else np.zeros(0, dtype=np.int64)
+
+    @property
+    def speech_duration(self) -> float:
+        return len(self.samples) / SAMPLING_RATE
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.samples) == 0
+
+    def to_original_time(self, seconds: float) -> float:
+        """Map a timestamp in the trimmed audio to the original recording."""
+        if not self.chunks:
+            return seconds
+        sample = int(round(seconds * SAMPLING_RATE))
+        i = max(int(np.searchsorted(self._offsets, sample, side="right")) - 1, 0)
+        return (self.chunks[i]["start"] + sample - int(self._offsets[i])) / SAMPLING_RATE
+
+
+def load_audio(file_path: str) -> np.ndarray:
+    """Decode (and resample to 16 kHz mono float32) exactly once; everything downstream works on this array."""
+    from faster_whisper.audio import decode_audio
+    return decode_audio(file_path, sampling_rate=SAMPLING_RATE)
+
+
+def detect_speech(audio: np.ndarray) -> List[Dict[str, int]]:
+    """Silero VAD (bundled with faster-whisper) speech regions as sample ranges."""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    options = VadOptions(
+        threshold=settings.VAD_THRESHOLD,
+        min_silence_duration_ms=settings.VAD_MIN_SILENCE_MS,
+        speech_pad_ms=settings.VAD_SPEECH_PAD_MS,
+    )
+    return get_speech_timestamps(audio, options)
+
+
+def trim_to_speech(audio: np.ndarray, speech: List[Dict[str, int]]) -> PreparedAudio:
+    duration = len(audio) / SAMPLING_RATE
+    chunks = [{"start": int(s["start"]), "end": int(s["end"])} for s in speech if s["end"] > s["start"]]
+    if not chunks:
+        return PreparedAudio(np.zeros(0, dtype=np.float32), [], duration)
+    samples = np.concatenate([audio[c["start"]:c["end"]] for c in chunks])
+    return PreparedAudio(samples, chunks, duration)
+
+
+def prepare_audio(file_path: str, max_duration_sec: Optional[int] = None) -> PreparedAudio:
+    """
+    Decode once, enforce the duration limit, and drop silence / non-speech
+    (hold music, dial tones) so Whisper only decodes the speech regions.
+    """
+    limit = settings.MAX_AUDIO_DURATION_SEC if max_duration_sec is None else max_duration_sec
+    audio = load_audio(file_path)
+    duration = len(audio) / SAMPLING_RATE
+    if duration > limit:
+        raise AudioTooLongError(f"Audio is {duration:.0f}s, limit is {limit}s")
+
+    if not settings.VAD_ENABLED:
+        return PreparedAudio(audio, [{"start": 0, "end": len(audio)}], duration)
+    return trim_to_speech(audio, detect_speech(audio))
@@ -1,11 +1,28 @@
 import spacy
+from typing import List
 from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer.nlp_engine import SpacyNlpEngine
 from presidio_anonymizer import AnonymizerEngine
 from ..core.model_registry import ModelRegistry, AbstractModel
 from ..config.settings import get_settings
 
 settings = get_settings()
 
+PII_ENTITIES = ["PHONE_NUMBER", "EMAIL_ADDRESS", "AADHAAR"]
+PII_LANGUAGE = "en"
+
+
+class SharedSpacyNlpEngine(SpacyNlpEngine):
+    """Presidio NLP engine over an already-loaded spaCy pipeline, so the model isn't loaded twice."""
+    def __init__(self, nlp, language: str = PII_LANGUAGE):
+        super().__init__(models=[{"lang_code": language, "model_name": nlp.meta.get("name", "")}])
+        self.pipeline = nlp
+        self.language = language
+
+    def load(self) -> None:
+        self.nlp = {self.language: self.pipeline}
+
+
 @ModelRegistry.register("entity_extractor")
 class SpacyEntityExtractor(AbstractModel):
     def __init__(self):
@@ -16,32 +33,51 @@ class SpacyEntityExtractor(AbstractModel):
             # Fallback or auto-download might be risky in prod, better to error or warn
             print(f"Warning: Model {settings.NER_MODEL} not found. Ensure it is downloaded.")
             self.nlp = spacy.blank("en") # Stub
+        # Components neither our NER nor Presidio's recognizers read
+        self.disabled_pipes = [p for p in settings.NER_DISABLED_PIPES if p in self.nlp.pipe_names]
+        self.nlp.select_pipes(disable=self.disabled_pipes)
+        self.nlp.batch_size = settings.NER_BATCH_SIZE
 
-        # PII Engines
-        self.analyzer = AnalyzerEngine()
+        # PII Engines. Presidio runs our pipeline and its NlpArtifacts carry the
+        # spaCy Doc, so each text is processed once for both NER and PII.
+        self.nlp_engine = SharedSpacyNlpEngine(self.nlp)
+        self.analyzer = AnalyzerEngine(nlp_engine=self.nlp_engine, supported_languages=[PII_LANGUAGE])
         self.anonymizer = AnonymizerEngine()
 
-    def predict(self, text: str) -> dict:
-        """
-        Extract named entities and redact PII.
-        """
-        doc = self.nlp(text)
-        
+    def _extract(self, text: str, nlp_artifacts) -> dict:
         entities = []
-        for ent in doc.ents:
+        for ent in nlp_artifacts.tokens.ents:
             entities.append({
                 "text": ent.text,
                 "label": ent.label_,
                 "start": ent.start_char,
                 "end": ent.end_char
             })
-            
-        # PII Redaction
-        pii_results = self.analyzer.analyze(text=text, entities=["PHONE_NUMBER", "EMAIL_ADDRESS", "AADHAAR"], language='en')
+
+        # PII Redaction (Presidio pattern recognizers over the same Doc)
+        pii_results = self.analyzer.analyze(
+            text=text, entities=PII_ENTITIES, language=PII_LANGUAGE, nlp_artifacts=nlp_artifacts
+        )
         anonymized_result = self.anonymizer.anonymize(text=text, analyzer_results=pii_results)
-        
+
         return {
             "entities": entities,
             "redacted_text": anonymized_result.text,
             "pii_detected": [r.entity_type for r in pii_results]
         }
+
+    def predict(self, text: str) -> dict:
+        """
+        Extract named entities and redact PII.
+        """
+        return self._extract(text, self.nlp_engine.process_text(text, PII_LANGUAGE))
+
+    def predict_batch(self, texts: List[str]) -> List[dict]:
+        """
+        predict() for many texts: one nlp.pipe pass (NER_BATCH_SIZE docs per
+        batch, via Presidio's process_batch), results in input order.
+        """
+        return [
+            self._extract(text, nlp_artifacts)
+            for text, (_, nlp_artifacts) in zip(texts, self.nlp_engine.process_batch(texts, PII_LANGUAGE))
+        ]
@@ -1,18 +1,62 @@
 import asyncio
 import structlog
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, Optional
 from ..core.model_registry import ModelRegistry
 from ..config.settings import get_settings
+from .stage_graph import Stage, StageGraph
+from .batch_job import BatchReprocessor
 
 logger = structlog.get_logger()
 settings = get_settings()
 
 class PipelineOrchestrator:
-    def __init__(self):
+    """
+    Runs the complaint pipeline as a stage graph (see stage_graph.StageGraph):
+
+        asr -> extraction -> schemes / severity / embedding (in parallel)
+
+    With an ASRProcessPool, ASR runs in its worker processes; otherwise the
+    in-process Whisper model runs on the stage thread pool. Either way the
+    event loop stays free, so concurrent complaints overlap.
+    """
+    def __init__(self, asr_pool=None):
         self.audio_processor = ModelRegistry.get_model("whisper")
         self.extractor = ModelRegistry.get_model("entity_extractor")
         self.scheme_matcher = ModelRegistry.get_model("scheme_matcher")
-        
+        self.asr_pool = asr_pool
+        self.embedder = ModelRegistry.get_model("embedder") if settings.PIPELINE_EMBED_ENABLED else None
+        self.graph = self._build_graph()
+        self.segment_graph = StageGraph([
+            Stage("extraction", self.extractor.predict, inputs=["text"], executor="thread"),
+            Stage("schemes", self._match_schemes, inputs=["extraction"]),
+        ], inputs=["text"])
+
+    def _build_graph(self) -> StageGraph:
+        if self.asr_pool is not None:
+            asr = Stage("asr", self.asr_pool.transcribe, inputs=["file_path"], executor="async")
+        else:
+            asr = Stage("asr", self.audio_processor.predict, inputs=["file_path"], executor="thread")
+        stages = [
+            asr,
+            # 2. Translate (Stub for now, assume English/Hindi mixed)
+            Stage("extraction", lambda asr_result: self.extractor.predict(asr_result["text"]), inputs=["asr"], executor="thread"),
+            Stage("schemes", self._match_schemes, inputs=["extraction"]),
+            Stage("severity", self._score_severity, inputs=["extraction"], default=None),
+        ]
+        if self.embedder is not None:
+            stages.append(Stage("embedding", self._embed, inputs=["extraction"], executor="thread", default=None))
+        return StageGraph(stages, inputs=["file_path"])
+
+    def _match_schemes(self, extraction_result: Dict[str, Any]) -> list:
+        return self.scheme_matcher.predict(extraction_result["redacted_text"])["matches"]
+
+    def _score_severity(self, extraction_result: Dict[str, Any]) -> int:
+        # Severity Scoring (Stub/TODO)
+        return 3 # Placeholder
+
+    def _embed(self, extraction_result: Dict[str, Any]):
+        return self.embedder.embed_batch([extraction_result["redacted_text"]])[0]
+
     async def process_complaint_stream(self, file_path: str, metadata: Dict[str, Any]):
         """
         Real-time processing for a single complaint.
@@ -21,30 +65,17 @@ class PipelineOrchestrator:
         logger.info("pipeline_start", trace_id=trace_id, file=file_path)
         
         try:
-            # 1. ASR
-            asr_result = self.audio_processor.predict(file_path)
-            transcript = asr_result["text"]
-            
-            # 2. Translate (Stub for now, assume English/Hindi mixed)
-            # translator = ModelRegistry.get_model("translator")
-            # transcript = translator.predict(transcript)
-            
-            # 3. Extraction
-            extraction_result = self.extractor.predict(transcript)
-            
-            # 4. Scheme Matching
-            scheme_result = self.scheme_matcher.predict(extraction_result["redacted_text"])
-            
-            # 5. Severity Scoring (Stub/TODO)
-            severity_score = 3 # Placeholder
+            out = await self.graph.run(trace_id=trace_id, file_path=file_path)
+            asr_result, extraction_result = out["asr"], out["extraction"]
             
             result = {
-                "transcript": transcript,
+                "transcript": asr_result["text"],
                 "metadata": asr_result,
                 "entities": extraction_result["entities"],
                 "redacted_text": extraction_result["redacted_text"],
-                "schemes": scheme_result["matches"],
-                "severity": severity_score,
+                "schemes": out["schemes"],
+                "severity": out["severity"],
+                "embedding": out.get("embedding"),
                 "status": "processed"
             }
             
@@ -55,10 +86,85 @@ class PipelineOrchestrator:
             logger.error("pipeline_failed", trace_id=trace_id, error=str(e))
             raise e
 
-    async def run_batch_job(self):
+    async def process_complaint_segments(self, file_path: str, metadata: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of process_complaint_stream for long audio.
+        Extraction and scheme matching run on each segment as soon as Whisper
+        finishes it; yields a "partial" insight per segment, then a final
+        result in the same shape as process_complaint_stream.
+        """
+        trace_id = metadata.get("trace_id", "unknown")
+        logger.info("pipeline_stream_start", trace_id=trace_id, file=file_path)
+
+        try:
+            # Creating the stream already decodes the audio and runs VAD / language detection
+            segments, asr_info = await asyncio.to_thread(self.audio_processor.predict_stream, file_path)
+            texts, redacted, entities = [], [], []
+            schemes: Dict[str, Dict[str, Any]] = {}
+            offset = 0
+
+            while True:
+                # Decoding the next segment is blocking; keep the loop free meanwhile
+                segment = await asyncio.to_thread(next, segments, None)
+                if segment is None:
+                    break
+
+                out = await self.segment_graph.run(trace_id=trace_id, text=segment["text"])
+                extraction_result, segment_schemes = out["extraction"], out["schemes"]
+
+                # Entity offsets are relative to the joined transcript
+                segment_entities = [
+                    {**ent, "start": ent["start"] + offset, "end": ent["end"] + offset}
+                    for ent in extraction_result["entities"]
+                ]
+                entities.extend(segment_entities)
+                for match in segment_schemes:
+                    best = schemes.get(match["scheme_name"])
+                    if best is None or match["confidence_score"] > best["confidence_score"]:
+                        schemes[match["scheme_name"]] = match
+                texts.append(segment["text"])
+                redacted.append(extraction_result["redacted_text"])
+                offset += len(segment["text"]) + 1
+
+                yield {
+                    "segment": segment,
+                    "entities": segment_entities,
+                    "redacted_text": extraction_result["redacted_text"],
+                    "schemes": segment_schemes,
+                    "status": "partial"
+                }
+
+            transcript = " ".join(texts)
+            extraction_result = {"entities": entities, "redacted_text": " ".join(redacted)}
+            try:
+                severity = self._score_severity(extraction_result)
+            except Exception as e:
+                # Same degradation as the "severity" stage of the full graph
+                logger.warning("stage_degraded", stage="severity", error=repr(e), trace_id=trace_id)
+                severity = None
+            yield {
+                "transcript": transcript,
+                "metadata": {"text": transcript, **asr_info},
+                "entities": entities,
+                "redacted_text": extraction_result["redacted_text"],
+                "schemes": list(schemes.values()),
+                "severity": severity,
+                "status": "processed"
+            }
+            logger.info("pipeline_success", trace_id=trace_id, segments=len(texts))
+
+        except Exception as e:
+            logger.error("pipeline_failed", trace_id=trace_id, error=str(e))
+            raise e
+
+    async def run_batch_job(self, store=None, embedding_store=None, limit: Optional[int] = None) -> Dict[str, Any]:
         """
         Nightly batch reprocessing implementation.
+        Resumable: progress is checkpointed per micro-batch (see batch_job.BatchReprocessor).
         """
         logger.info("batch_job_start")
-        # Logic to fetch unprocessed or failed items from DB and run process_complaint_stream
-        pass
+        reprocessor = BatchReprocessor(
+            self.extractor, self.scheme_matcher,
+            embedder=self.embedder, embedding_store=embedding_store, store=store,
+        )
+        return await reprocessor.run(limit=limit)
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+from ..core.logging import logger
+from ..core.monitoring import PROCESSING_LATENCY
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+EXECUTORS = ("inline", "thread", "process", "async")
+_REQUIRED = object()
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Shared pool for GIL-releasing stages (spaCy, embedding), sized by PIPELINE_THREAD_WORKERS."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=settings.PIPELINE_THREAD_WORKERS, thread_name_prefix="stage")
+    return _thread_pool
+
+
+class StageError(RuntimeError):
+    def __init__(self, stage: str, cause: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {cause!r}")
+        self.stage = stage
+        self.cause = cause
+
+
+class Stage:
+    """
+    One node of the pipeline graph. `fn` is called with the outputs of
+    `inputs` (graph inputs or other stages), in order. Executors:
+      - inline:  sync call on the event loop (cheap work, e.g. rapidfuzz)
+      - thread:  shared thread pool (libraries that release the GIL)
+      - process: `process_pool` of the graph (fn must be picklable)
+      - async:   fn is a coroutine function with its own concurrency (e.g. ASRProcessPool)
+    A stage with a `default` degrades to it on error or timeout instead of failing the run.
+    """
+    def __init__(self, name: str, fn: Callable, inputs: Sequence[str] = (), executor: str = "inline",
+                 timeout: Optional[float] = None, default: Any = _REQUIRED):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor '{executor}' for stage '{name}'")
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.executor = executor
+        self.timeout = timeout if timeout is not None else settings.PIPELINE_STAGE_TIMEOUTS.get(name)
+        self.default = default
+
+    @property
+    def optional(self) -> bool:
+        return self.default is not _REQUIRED
+
+
+class StageGraph:
+    """
+    Runs stages as soon as their inputs are available, so independent stages
+    (e.g. scheme matching, severity and embedding after extraction) overlap,
+    and awaits everything off the event loop so one orchestrator serves many
+    complaints concurrently. Stage latencies go to PROCESSING_LATENCY.
+    """
+    def __init__(self, stages: Iterable[Stage], inputs: Sequence[str] = (), process_pool: Optional[Executor] = None):
+        self.stages: Dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages or stage.name in inputs:
+                raise ValueError(f"Duplicate stage name '{stage.name}'")
+            self.stages[stage.name] = stage
+        self.inputs = tuple(inputs)
+        self.process_pool = process_pool
+        self.order = self._toposort()
+
+    def _toposort(self) -> List[str]:
+        known = set(self.inputs) | set(self.stages)
+        for stage in self.stages.values():
+            missing = [i for i in stage.inputs if i not in known]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' depends on unknown {missing}")
+            if stage.executor == "process" and self.process_pool is None:
+                raise ValueError(f"Stage '{stage.name}' needs a process_pool")
+        order, done = [], set(self.inputs)
+        remaining = dict(self.stages)
+        while remaining:
+            ready = [name for name, s in remaining.items() if all(i in done for i in s.inputs)]
+            if not ready:
+                raise ValueError(f"Cycle between stages {sorted(remaining)}")
+            for name in ready:
+                order.append(name)
+                done.add(name)
+                del remaining[name]
+        return order
+
+    async def _call(self, stage: Stage, args: List[Any]) -> Any:
+        if stage.executor == "async":
+            return await stage.fn(*args)
+        if stage.executor == "inline":
+            return stage.fn(*args)
+        loop = asyncio.get_running_loop()
+        pool = get_thread_pool() if stage.executor == "thread" else self.process_pool
+        return await loop.run_in_executor(pool, stage.fn, *args)
+
+    async def _run_stage(self, stage: Stage, args: List[Any], trace_id: str) -> Any:
+        start = time.perf_counter()
+        try:
+            # Timed-out thread/process work can't be interrupted; its result is discarded
+            return await asyncio.wait_for(self._call(stage, args), timeout=stage.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                logger.warning("stage_timeout", stage=stage.name, timeout=stage.timeout, trace_id=trace_id)
+            if stage.optional:
+                logger.warning("stage_degraded", stage=stage.name, error=repr(e), trace_id=trace_id)
+                return stage.default
+            raise StageError(stage.name, e) from e
+        finally:
+            PROCESSING_LATENCY.labels(stage=stage.name).observe(time.perf_counter() - start)
+
+    async def run(self, trace_id: str = "unknown", **inputs: Any) -> Dict[str, Any]:
+        """Run the graph; returns the graph inputs plus every stage output, keyed by name."""
+        missing = [i for i in self.inputs if i not in inputs]
+        if missing:
+            raise ValueError(f"Missing graph inputs {missing}")
+        results: Dict[str, Any] = dict(inputs)
+        pending = [self.stages[name] for name in self.order]
+        running: Dict[asyncio.Task, str] = {}
+        try:
+            while pending or running:
+                for stage in [s for s in pending if all(i in results for i in s.inputs)]:
+                    pending.remove(stage)
+                    task = asyncio.create_task(self._run_stage(stage, [results[i] for i in stage.inputs], trace_id))
+                    running[task] = stage.name
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[running.pop(task)] = task.result()
+        finally:
+            # First failure (or cancellation of the caller) stops the rest of the run
+            for task in running:
+                task.cancel()
+        return results
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from ..core.logging import logger
+from ..config.settings import get_settings
+
+settings = get_settings()
+
+
+def hash_audio_file(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """Streaming content hash of the audio bytes; identical uploads share a key whatever their path."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def transcript_cache_key(content_hash: str, model: str, compute_type: str) -> str:
+    return f"asr:{model}:{compute_type}:{content_hash}"
+
+
+class SharedTranscriptTier(ABC):
+    """Second-level cache shared by all ASR replicas."""
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Dict[str, Any], ttl_sec: int):
+        pass
+
+
+class RedisTranscriptTier(SharedTranscriptTier):
+    def __init__(self):
+        from ..core.queue import get_async_pool
+        import redis.asyncio as aioredis
+        redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.client = aioredis.Redis(connection_pool=get_async_pool(redis_url))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = await self.client.get(key)
+        return json.loads(raw) if raw else None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_sec: int):
+        await self.client.setex(key, ttl_sec, json.dumps(value))
+
+
+class DiskTranscriptTier(SharedTranscriptTier):
+    """JSON files on a shared volume, fanned out by key prefix; expiry by file mtime."""
+    def __init__(self, cache_dir: Optional[str] = None, ttl_sec: Optional[int] = None):
+        self.cache_dir = cache_dir or settings.ASR_CACHE_DIR
+        self.ttl_sec = settings.ASR_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json")
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_sec:
+                os.remove(path)
+                return None
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_sec: int):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so readers on other replicas never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+
+
+class TranscriptCache:
+    """
+    Size-bounded LRU + TTL cache for transcripts, with an optional shared tier.
+    Local hits are served from memory; shared-tier hits are promoted locally.
+    """
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_sec: Optional[int] = None,
+        shared: Optional[SharedTranscriptTier] = None,
+    ):
+        self.max_entries = settings.ASR_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_sec = settings.ASR_CACHE_TTL_SEC if ttl_sec is None else ttl_sec
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _get_local(self, key: str) -> Optional[Dict[str, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl_sec, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self._get_local(key)
+        if value is not None or self.shared is None:
+            return value
+        try:
+            value = await self.shared.get(key)
+        except Exception as e:
+            # Shared tier is an optimisation; never fail a job because of it
+            logger.warning("asr_cache_shared_get_failed", error=str(e))
+            return None
+        if value is not None:
+            self._set_local(key, value)
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]):
+        self._set_local(key, value)
+        if self.shared is not None:
+            try:
+                await self.shared.set(key, value, self.ttl_sec)
+            except Exception as e:
+                logger.warning("asr_cache_shared_set_failed", error=str(e))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def build_transcript_cache() -> TranscriptCache:
+    """TranscriptCache with the shared tier selected by ASR_CACHE_SHARED_BACKEND ("none", "redis", "disk")."""
+    backend = settings.ASR_CACHE_SHARED_BACKEND
+    shared: Optional[SharedTranscriptTier] = None
+    if backend == "redis":
+        shared = RedisTranscriptTier()
+    elif backend == "disk":
+        shared = DiskTranscriptTier()
+    elif backend != "none":
+        raise ValueError(f"Unknown ASR_CACHE_SHARED_BACKEND '{backend}'")
+    return TranscriptCache(shared=shared)
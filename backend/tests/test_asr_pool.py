@@ -0,0 +1,48 @@
+import asyncio
+import contextlib
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.process import asr_pool
+from src.process.asr_pool import ASRProcessPool
+
+
+class ThreadManager:
+    def Queue(self):
+        return queue.Queue()
+
+
+def fake_transcribe_stream(file_path, channel):
+    channel.put(("info", {"language": "hi"}))
+    for i in range(3):
+        channel.put(("segment", {"index": i, "text": f"segment {i}"}))
+    channel.put(("done", None))
+
+
+@pytest.mark.asyncio
+async def test_stream_permit_released_when_consumer_stops_early(monkeypatch):
+    monkeypatch.setattr(asr_pool, "_transcribe_stream", fake_transcribe_stream)
+    pool = ASRProcessPool(size=1, max_pending=1)
+    pool.executor.shutdown()
+    pool.executor = ThreadPoolExecutor(1)
+    pool._manager = ThreadManager()
+
+    # One consumer fails after the first event (stream closed), another abandons
+    # its stream without closing it (still referenced, so never collected)
+    with pytest.raises(ConnectionError):
+        async with contextlib.aclosing(pool.transcribe_stream("a.wav")) as events:
+            async for _ in events:
+                raise ConnectionError("push failed")
+    abandoned = pool.transcribe_stream("b.wav")
+    await abandoned.__anext__()
+
+    # The permit comes back once the worker job ends, so the next job runs
+    async def drain():
+        return [kind async for kind, _ in pool.transcribe_stream("c.wav")]
+    events = await asyncio.wait_for(drain(), timeout=5)
+    assert events == ["info", "segment", "segment", "segment"]
+    await asyncio.sleep(0)
+    assert not pool.semaphore.locked()
+    pool.executor.shutdown()
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.process import audio_preprocess
+from src.process.audio_preprocess import SAMPLING_RATE, AudioTooLongError, prepare_audio, trim_to_speech
+
+
+def test_trim_keeps_only_speech_and_maps_timestamps():
+    audio = np.zeros(10 * SAMPLING_RATE, dtype=np.float32)
+    # Speech at 1-2s and 6-8s; the rest is silence
+    speech = [{"start": 1 * SAMPLING_RATE, "end": 2 * SAMPLING_RATE}, {"start": 6 * SAMPLING_RATE, "end": 8 * SAMPLING_RATE}]
+    audio[speech[0]["start"]:speech[0]["end"]] = 0.5
+    audio[speech[1]["start"]:speech[1]["end"]] = 0.25
+
+    prepared = trim_to_speech(audio, speech)
+    assert prepared.duration == 10.0
+    assert prepared.speech_duration == 3.0
+    assert prepared.samples[0] == 0.5 and prepared.samples[-1] == 0.25
+
+    # 0.5s into the trimmed audio is 1.5s in the recording; 1.5s is 6.5s
+    assert prepared.to_original_time(0.5) == 1.5
+    assert prepared.to_original_time(1.5) == 6.5
+    assert prepared.to_original_time(3.0) == 8.0
+
+
+def test_silence_only_is_empty():
+    prepared = trim_to_speech(np.zeros(SAMPLING_RATE, dtype=np.float32), [])
+    assert prepared.is_empty
+    assert prepared.duration == 1.0
+
+
+def test_duration_limit_enforced_after_single_decode():
+    audio = np.zeros(5 * SAMPLING_RATE, dtype=np.float32)
+    with patch.object(audio_preprocess, "load_audio", return_value=audio) as load:
+        with pytest.raises(AudioTooLongError):
+            prepare_audio("clip.wav", max_duration_sec=4)
+        load.assert_called_once_with("clip.wav")
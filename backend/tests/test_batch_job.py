@@ -0,0 +1,163 @@
+import uuid
+
+import pytest
+
+from src.process.batch_job import BatchReprocessor
+
+
+class FakeStore:
+    """In-memory stand-in for PostgresBatchStore with the same contract."""
+    def __init__(self, n):
+        self.rows = sorted(({"id": uuid.uuid4(), "raw_text": f"PMAY complaint {i}"} for i in range(n)), key=lambda r: r["id"])
+        self.status = {}
+        self.checkpoints = {}
+        self.fail_after_writes = None
+        self.writes = 0
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def load_checkpoint(self, job_name, model_version):
+        cp = self.checkpoints.get(job_name)
+        if cp and cp["model_version"] == model_version:
+            return {k: cp[k] for k in ("last_id", "processed", "failed")}
+        return {"last_id": None, "processed": 0, "failed": 0}
+
+    async def iter_pending(self, model_version, after_id=None):
+        for row in self.rows:
+            done = self.status.get(row["id"]) == ("processed", model_version)
+            if not done and (after_id is None or row["id"] > after_id):
+                yield dict(row)
+
+    async def write_batch(self, results, job_name, model_version, checkpoint):
+        if self.fail_after_writes is not None and self.writes >= self.fail_after_writes:
+            raise ConnectionError("db went away")
+        self.writes += 1
+        for r in results:
+            self.status[r["id"]] = (r["processing_status"], r["model_version"])
+        self.checkpoints[job_name] = {"model_version": model_version, **checkpoint}
+
+    async def clear_checkpoint(self, job_name):
+        self.checkpoints.pop(job_name, None)
+
+
+class Extractor:
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, text):
+        if "bad" in text:
+            raise ValueError("boom")
+        return {"entities": [], "redacted_text": text, "pii_detected": []}
+
+    def predict_batch(self, texts):
+        self.batches.append(len(texts))
+        return [self.predict(t) for t in texts]
+
+
+class Matcher:
+    def predict(self, text):
+        return {"matches": [{"scheme_name": "Pradhan Mantri Awas Yojana"}] if "PMAY" in text else []}
+
+    def predict_batch(self, texts):
+        return [self.predict(t) for t in texts]
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_checkpoint_after_interruption():
+    store = FakeStore(50)
+    store.fail_after_writes = 2
+    extractor = Extractor()
+    job = BatchReprocessor(extractor, Matcher(), store=store, model_version="2", micro_batch=10)
+    with pytest.raises(ConnectionError):
+        await job.run()
+    assert store.checkpoints["nightly_reprocess"]["processed"] == 20
+
+    store.fail_after_writes = None
+    extractor.batches.clear()
+    summary = await job.run()
+    # Only the 30 rows after the checkpoint were processed again
+    assert sum(extractor.batches) == 30
+    assert summary["processed"] == 50
+    assert all(s == ("processed", "2") for s in store.status.values())
+    assert "nightly_reprocess" not in store.checkpoints
+
+
+@pytest.mark.asyncio
+async def test_failed_rows_are_isolated_and_marked():
+    store = FakeStore(10)
+    store.rows[3]["raw_text"] = "bad row"
+    summary = await BatchReprocessor(Extractor(), Matcher(), store=store, model_version="1", micro_batch=4).run()
+    assert summary["failed"] == 1 and summary["processed"] == 9
+    assert store.status[store.rows[3]["id"]] == ("failed", "1")
+
+
+class Embedder:
+    def embed_batch(self, texts):
+        if any("unembeddable" in t for t in texts):
+            raise ValueError("embed boom")
+        return [[0.0] * 4 for _ in texts]
+
+
+class EmbeddingStore:
+    def __init__(self):
+        self.ids = []
+
+    def put(self, ids, vectors):
+        self.ids.extend(ids)
+
+
+class FlakyMatcher(Matcher):
+    def predict(self, text):
+        if "odd" in text:
+            raise ValueError("scheme boom")
+        return super().predict(text)
+
+
+@pytest.mark.asyncio
+async def test_embedding_and_scheme_failures_are_isolated_per_row():
+    store = FakeStore(8)
+    store.rows[1]["raw_text"] = "odd complaint"
+    store.rows[5]["raw_text"] = "unembeddable complaint"
+    embedding_store = EmbeddingStore()
+    summary = await BatchReprocessor(Extractor(), FlakyMatcher(), embedder=Embedder(), embedding_store=embedding_store,
+                                     store=store, model_version="1", micro_batch=4).run()
+    assert summary["processed"] == 6 and summary["failed"] == 2
+    assert store.status[store.rows[1]["id"]] == ("failed", "1")
+    assert store.status[store.rows[5]["id"]] == ("failed", "1")
+    assert sorted(embedding_store.ids) == sorted(str(r["id"]) for i, r in enumerate(store.rows) if i not in (1, 5))
+
+
+@pytest.mark.asyncio
+async def test_inflight_write_settles_before_close():
+    import asyncio
+
+    class SlowStore(FakeStore):
+        closed_with_pending = None
+
+        async def write_batch(self, *args):
+            await asyncio.sleep(0.01)
+            self.pending = False
+            await super().write_batch(*args)
+
+        async def close(self):
+            self.closed_with_pending = getattr(self, "pending", False)
+
+    class Crash(Matcher):
+        calls = 0
+
+        def predict_batch(self, texts):
+            Crash.calls += 1
+            if Crash.calls == 2:
+                raise KeyboardInterrupt
+            return super().predict_batch(texts)
+
+    store = SlowStore(8)
+    store.pending = True
+    with pytest.raises(KeyboardInterrupt):
+        await BatchReprocessor(Extractor(), Crash(), store=store, model_version="1", micro_batch=4).run()
+    assert store.closed_with_pending is False
+    assert store.writes == 1
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+from src.clustering.summary import ClusterSummaryMaterializer, InMemorySummaryStore, label_mapping
+
+TODAY = date(2025, 6, 30)
+
+
+def record(days_ago, state="Karnataka", schemes=("PM-KISAN",), quality=0.8):
+    return {
+        "created_at": datetime.combine(TODAY - timedelta(days=days_ago), datetime.min.time()),
+        "location": {"state": state},
+        "detected_scheme": list(schemes),
+        "quality_score": quality,
+    }
+
+
+def test_summaries_trend_geo_and_hot_ordering():
+    materializer = ClusterSummaryMaterializer(hot_limit=2)
+    # Cluster 0: growing (30 recent vs 5 before); cluster 1: shrinking; cluster 2: small; plus noise
+    records = [record(3) for _ in range(30)] + [record(40) for _ in range(5)]
+    records += [record(5, state="Bihar", schemes=["PDS"]) for _ in range(10)] + [record(45, state="Bihar", schemes=["PDS"]) for _ in range(20)]
+    records += [record(1, state="Odisha", schemes=[]) for _ in range(2)]
+    records += [record(2, quality=None) for _ in range(4)]
+    labels = [0] * 35 + [1] * 30 + [2] * 2 + [-1] * 4
+    materializer.reset(labels, [0.9] * len(labels), records, model_version="v1")
+
+    hot, stats = materializer.compute(today=TODAY)
+    assert [c["cluster_label"] for c in hot] == [0, 1]
+    top = hot[0]
+    assert top["trend_metrics"]["count_30d"] == 30
+    assert top["trend_metrics"]["growth_rate"] == 500.0
+    assert top["geo_distribution"] == {"Karnataka": 35}
+    assert top["linked_scheme_ids"] == ["PM-KISAN"]
+    assert top["confidence_score"] == 0.9
+    assert hot[1]["trend_metrics"]["growth_rate"] == -50.0
+
+    assert stats["total_reports"] == len(records)
+    assert stats["active_clusters"] == 3
+    assert stats["critical_clusters"] == 1
+    assert stats["avg_trust_score"] == 0.8
+
+
+def test_update_folds_in_and_reset_rebuilds():
+    store = InMemorySummaryStore()
+    materializer = ClusterSummaryMaterializer(store=store)
+    materializer.reset([0] * 5, [1.0] * 5, [record(0) for _ in range(5)], model_version="v1")
+    first_id = store.hot_clusters[0]["id"]
+
+    materializer.update([0, 0, -1], [0.5, 0.5, 0.0], [record(0) for _ in range(3)])
+    assert store.hot_clusters[0]["trend_metrics"]["count_total"] == 7
+    assert store.stats["total_reports"] == 8
+    # Ids are stable within a model version
+    assert store.hot_clusters[0]["id"] == first_id
+
+    materializer.reset([1] * 2, [1.0] * 2, [record(0) for _ in range(2)], model_version="v2")
+    assert [c["cluster_label"] for c in store.hot_clusters] == [1]
+    assert asyncio.run(store.read_dashboard_stats())["model_version"] == "v2"
+
+
+def test_relabel_moves_and_merges_aggregates():
+    store = InMemorySummaryStore()
+    materializer = ClusterSummaryMaterializer(store=store)
+    materializer.reset([0] * 4 + [1] * 3 + [2] * 2, [1.0] * 9, [record(0) for _ in range(9)], model_version="v1")
+
+    # Refit over the same points: 0 and 1 merge into 5, 2 dissolves into noise
+    mapping = label_mapping([0, 0, 1, 1, 2, -1], [5, 5, 5, 5, -1, 3])
+    assert mapping == {0: 5, 1: 5, 2: -1}
+    materializer.relabel(mapping, model_version="v2")
+
+    assert [(c["cluster_label"], c["trend_metrics"]["count_total"]) for c in store.hot_clusters] == [(5, 7)]
+    assert store.stats["total_reports"] == 9
+    assert store.stats["model_version"] == "v2"
+
+
+def test_restore_continues_persisted_totals():
+    store = InMemorySummaryStore()
+    ClusterSummaryMaterializer(store=store).reset([0] * 5, [1.0] * 5, [record(0) for _ in range(5)], model_version="v1")
+
+    # A restarted process warm-started from the v1 artifacts
+    restarted = ClusterSummaryMaterializer(store=store)
+    assert restarted.restore("v1")
+    restarted.update([0, 0], [1.0, 1.0], [record(0), record(0)])
+    assert store.stats["total_reports"] == 7
+    assert store.hot_clusters[0]["trend_metrics"]["count_total"] == 7
+
+    # No aggregates for this version: the dashboard keeps the last payload
+    other = ClusterSummaryMaterializer(store=store)
+    assert not other.restore("v2")
+    other.update([0], [1.0], [record(0)])
+    assert store.stats["total_reports"] == 7
+    other.reset([0], [1.0], [record(0)], model_version="v2")
+    assert store.stats["total_reports"] == 1
@@ -0,0 +1,171 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+pytest.importorskip("umap")
+pytest.importorskip("hdbscan")
+
+from src.clustering.artifacts import ClusterArtifactStore
+from src.clustering.engine import ClusterManager, stratified_sample_indices
+
+
+def blobs(centers, n_per, dim=32, scale=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.vstack([c + scale * rng.standard_normal((n_per, dim)) for c in centers]).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def centers():
+    rng = np.random.default_rng(42)
+    return rng.standard_normal((4, 32)) * 3
+
+
+@pytest.fixture
+def manager(centers):
+    manager = ClusterManager()
+    manager.fit_transform(blobs(centers[:3], 60))
+    return manager
+
+
+def test_incremental_batch_uses_real_strengths(manager, centers):
+    batch = blobs(centers[:3], 10, seed=1)
+    with patch.object(manager.reducer, "transform", wraps=manager.reducer.transform) as transform:
+        result = manager.fit_transform(batch)
+    # One UMAP call for the whole batch
+    assert transform.call_count == 1
+    assert len(result["labels"]) == 30
+    assert len(set(result["labels"]) - {-1}) == 3
+    # Membership strengths come from approximate_predict, not a constant
+    assert len(set(result["probabilities"])) > 1
+    assert all(0.0 <= p <= 1.0 for p in result["probabilities"])
+
+
+def test_outlier_buffer_triggers_partial_refit(manager):
+    before = manager.reference_reduced.shape[0]
+    # A new topic that lands far from every existing cluster in the reduced space
+    rng = np.random.default_rng(3)
+    far = manager.reference_reduced.max(axis=0) + 20 + 0.05 * rng.standard_normal((30, manager.reference_reduced.shape[1]))
+    noise = (np.full(30, -1), np.zeros(30), far.astype(np.float32))
+
+    with patch.object(manager.settings, "CLUSTER_OUTLIER_REFIT_THRESHOLD", 50), \
+         patch.object(manager, "predict_batch", return_value=noise):
+        first = manager.fit_transform(np.zeros((30, 32), dtype=np.float32))
+        assert set(first["labels"]) == {-1}
+        assert len(manager.outlier_buffer) == 30
+
+        second = manager.fit_transform(np.zeros((30, 32), dtype=np.float32))
+
+    # Buffer crossed the threshold: HDBSCAN refitted with the outliers, which now form a cluster
+    assert manager.reference_reduced.shape[0] == before + 60
+    assert len(manager.outlier_buffer) == 0
+    assert -1 not in second["labels"]
+    assert len(set(manager.clusterer.labels_) - {-1}) == 4
+
+
+def test_partial_refit_caps_reference(manager):
+    before = manager.reference_reduced.shape[0]
+    far = manager.reference_reduced.max(axis=0) + 20 + 0.05 * np.random.default_rng(4).standard_normal((40, manager.reference_reduced.shape[1]))
+    manager.outlier_buffer.extend(far.astype(np.float32))
+
+    with patch.object(manager.settings, "CLUSTERING_FIT_SAMPLE_SIZE", before):
+        manager.refit_with_outliers()
+
+    # All outliers kept, the reference subsampled to make room
+    assert manager.reference_reduced.shape[0] == before
+    assert np.allclose(manager.reference_reduced[-40:], far)
+    assert len(set(manager.clusterer.labels_) - {-1}) == 4
+
+
+def test_stratified_sample_keeps_rare_strata():
+    strata = ["whatsapp"] * 9900 + ["ivr"] * 100
+    idx = stratified_sample_indices(len(strata), 1000, strata, min_per_stratum=50)
+    picked = [strata[i] for i in idx]
+    assert picked.count("ivr") == 50
+    assert picked.count("whatsapp") == 990
+    assert list(idx) == sorted(set(idx))
+
+
+def test_large_input_is_sampled_not_truncated(centers):
+    data = blobs(centers[:3], 100, seed=4)
+    manager = ClusterManager()
+    with patch.object(manager.settings, "CLUSTERING_FIT_SAMPLE_SIZE", 90), \
+         patch.object(manager.settings, "CLUSTERING_BATCH_SIZE", 64):
+        result = manager.fit_transform(data)
+
+    # Every row gets a label, including the 210 outside the fit sample
+    assert len(result["labels"]) == len(data) == len(result["probabilities"])
+    assert result["reduced_data"].shape == (300, 5)
+    assert manager.reference_reduced.shape[0] == 90
+    labels = np.array(result["labels"])
+    for blob in range(3):
+        values, counts = np.unique(labels[blob * 100:(blob + 1) * 100], return_counts=True)
+        assert values[np.argmax(counts)] != -1 and counts.max() >= 90
+
+
+def test_artifacts_persist_and_hot_swap(tmp_path, centers):
+    store = ClusterArtifactStore(root=str(tmp_path), keep=2)
+    trainer = ClusterManager(artifact_store=store)
+    trainer.fit_transform(blobs(centers[:3], 60))
+    assert store.latest_version() == trainer.version
+
+    # A fresh process starts warm from the stored model, memory-mapped
+    server = ClusterManager(artifact_store=store)
+    assert server.is_fitted and server.version == trainer.version
+    assert isinstance(server.reference_reduced, np.memmap)
+    batch = blobs(centers[:3], 5, seed=7)
+    assert list(server.predict_batch(batch)[0]) == list(trainer.predict_batch(batch)[0])
+
+    # Trainer publishes a new version; the server swaps to it on its next poll
+    with patch.object(trainer.settings, "FULL_RECLUSTER", True):
+        trainer.fit_transform(blobs(centers[:3], 60, seed=8))
+        assert trainer.version != server.version
+        with patch.object(server.settings, "CLUSTER_ARTIFACT_POLL_SEC", 0):
+            server.predict_batch(batch)
+        assert server.version == trainer.version
+
+        trainer.fit_transform(blobs(centers[:3], 60, seed=9))
+    assert store.list_versions()[-1] == store.latest_version() == trainer.version
+    assert len(store.list_versions()) == 2
+
+
+def test_full_fit_is_not_hot_swapped_midway(tmp_path, centers):
+    store = ClusterArtifactStore(root=str(tmp_path), keep=3)
+    manager = ClusterManager(artifact_store=store)
+    other = ClusterManager(artifact_store=store)
+    save = manager.save_artifacts
+
+    def save_then_other_publishes():
+        # Another process publishes while this one is still assigning in chunks
+        version = save()
+        other.fit_transform(blobs(centers[:3], 60, seed=5))
+        return version
+
+    with patch.object(manager.settings, "CLUSTERING_FIT_SAMPLE_SIZE", 90), \
+         patch.object(manager.settings, "CLUSTERING_BATCH_SIZE", 64), \
+         patch.object(manager.settings, "CLUSTER_ARTIFACT_POLL_SEC", 0), \
+         patch.object(manager, "save_artifacts", side_effect=save_then_other_publishes), \
+         patch.object(manager, "load_artifacts", wraps=manager.load_artifacts) as load:
+        result = manager.fit_transform(blobs(centers[:3], 100, seed=6))
+    assert load.call_count == 0
+    assert manager.version != other.version == store.latest_version()
+    assert (np.asarray(result["labels"]) != -1).mean() > 0.9
+
+
+def test_shared_knn_graph_is_reused_across_fits(centers):
+    from src.clustering import engine
+    with patch.object(engine.get_settings(), "UMAP_KNN_BACKEND", "exact"):
+        manager = ClusterManager()
+    data = blobs(centers[:3], 60)
+    with patch.object(manager.settings, "FULL_RECLUSTER", True):
+        first = manager.fit_transform(data)
+        assert len(manager.knn_graph) == 180
+        with patch.object(manager.knn_graph.index, "search", wraps=manager.knn_graph.index.search) as search:
+            second = manager.fit_transform(data)
+        # Same corpus: neighbour lists come straight from the stored graph
+        assert search.call_count == 0
+    assert len(set(first["labels"]) - {-1}) == 3
+    assert len(set(second["labels"]) - {-1}) == 3
+
+    # Transform goes through the shared graph as well
+    labels, _, _ = manager.predict_batch(blobs(centers[:3], 5, seed=11))
+    assert len(set(labels) - {-1}) == 3
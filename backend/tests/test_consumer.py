@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from src.core.consumer import StreamConsumer, make_consumer_name, settings
+from src.core.queue import InMemoryQueue
+
+
+async def run_for(consumer: StreamConsumer, seconds: float):
+    task = asyncio.create_task(consumer.run())
+    await asyncio.sleep(seconds)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await consumer.flush_acks()
+
+
+def test_consumer_names_are_unique():
+    assert make_consumer_name("asr") != make_consumer_name("asr")
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_redelivered_then_acked():
+    queue = InMemoryQueue()
+    attempts = []
+
+    async def handler(msg_id, payload):
+        attempts.append(msg_id)
+        if len(attempts) == 1:
+            raise RuntimeError("transient")
+
+    consumer = StreamConsumer(queue, "jobs", "workers", handler, "test", block_ms=10, claim_idle_ms=0)
+    await queue.read_group("jobs", "workers", "bootstrap")
+    msg_id = await queue.push("jobs", {"n": 1})
+
+    with patch.object(settings, "CONSUMER_CLAIM_INTERVAL_SEC", 0):
+        await run_for(consumer, 0.2)
+
+    assert attempts[:2] == [msg_id, msg_id]
+    assert await queue.pending("jobs", "workers") == []
+
+
+@pytest.mark.asyncio
+async def test_poison_message_goes_to_dead_letter_stream():
+    queue = InMemoryQueue()
+
+    async def handler(msg_id, payload):
+        raise ValueError("bad payload")
+
+    consumer = StreamConsumer(queue, "jobs", "workers", handler, "test", block_ms=10, claim_idle_ms=0, max_deliveries=3)
+    await queue.read_group("jobs", "workers", "bootstrap")
+    await queue.read_group("jobs:dlq", "inspect", "bootstrap")
+    msg_id = await queue.push("jobs", {"n": 1})
+
+    with patch.object(settings, "CONSUMER_CLAIM_INTERVAL_SEC", 0):
+        await run_for(consumer, 0.3)
+
+    assert await queue.pending("jobs", "workers") == []
+    dead = await queue.read_group("jobs:dlq", "inspect", "bootstrap", count=10)
+    fields = dead[0][1][0][1]
+    assert fields["dlq_original_id"] == msg_id
+    assert fields["dlq_deliveries"] == "4"
+    assert fields["dlq_error"] == "bad payload"
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_slow_handler_from_being_reclaimed():
+    queue = InMemoryQueue()
+    started = asyncio.Event()
+    release = asyncio.Event()
+    runs = []
+
+    async def slow(msg_id, payload):
+        runs.append(msg_id)
+        started.set()
+        await release.wait()
+
+    async def fast(msg_id, payload):
+        runs.append(msg_id)
+
+    owner = StreamConsumer(queue, "jobs", "workers", slow, "owner", block_ms=10, heartbeat_sec=0.02)
+    other = StreamConsumer(queue, "jobs", "workers", fast, "other", block_ms=10, claim_idle_ms=100)
+    await queue.read_group("jobs", "workers", "bootstrap")
+    await queue.push("jobs", {"n": 1})
+
+    owner_task = asyncio.create_task(owner.run())
+    await started.wait()
+    with patch.object(settings, "CONSUMER_CLAIM_INTERVAL_SEC", 0):
+        # Handler runs well past the other replica's claim_idle_ms
+        await run_for(other, 0.4)
+    release.set()
+    await asyncio.sleep(0.05)
+    owner_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await owner_task
+
+    assert len(runs) == 1
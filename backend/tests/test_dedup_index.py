@@ -0,0 +1,160 @@
+import asyncio
+import pytest
+from src.ingest.dedup_index import DedupIndex, SimHashIndex, MinHashLSHIndex
+from src.ingest.dedup import FingerprintService
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DedupIndex(snapshot_path=str(tmp_path / "dedup.pkl"))
+
+
+def test_simhash_index_hamming_lookup():
+    idx = SimHashIndex(max_distance=3)
+    base = 0xDEADBEEFCAFEBABE
+    idx.insert("a", base)
+    idx.insert("b", base ^ 0b1111111)  # 7 bits away
+
+    # 3 bits flipped across different blocks still matches "a"
+    results = idx.query(base ^ (1 | (1 << 20) | (1 << 63)))
+    assert [doc_id for doc_id, _ in results] == ["a"]
+    assert results[0][1] == 3
+
+
+def test_minhash_lsh_finds_overlap():
+    idx = MinHashLSHIndex(num_perm=128, bands=32, threshold=0.5)
+    text = "ration shop in ward 12 closed for three days no grain distributed to card holders"
+    idx.insert("a", FingerprintService.compute_minhash(text))
+    results = idx.query(FingerprintService.compute_minhash(text + " again"))
+    assert results and results[0][0] == "a"
+
+
+def test_check_and_insert_skips_duplicates(index):
+    text = "Pension not credited for three months in Tumkur district, office refuses to respond"
+    assert index.check_and_insert("c1", text) is None
+    match = index.check_and_insert("c2", text)
+    assert match["doc_id"] == "c1"
+    assert len(index) == 1
+
+    assert index.check_and_insert("c3", "Water supply pipeline broken near the primary school") is None
+    assert len(index) == 2
+
+
+def test_short_texts_are_not_collapsed(index):
+    assert index.check_and_insert("a", "pension late") is None
+    assert index.check_and_insert("b", "road broken") is None
+    assert index.check_and_insert("c", "") is None
+    assert len(index) == 2
+
+
+def test_snapshot_roundtrip(index):
+    texts = ["Ration card biometric failure at the fair price shop", "Mid-day meal quality very poor in school"]
+    for i, t in enumerate(texts):
+        index.insert(f"c{i}", t)
+    index.snapshot()
+
+    restored = DedupIndex.load(index.snapshot_path)
+    assert len(restored) == 2
+    assert [m["doc_id"] for m in restored.batch_query(texts)] == ["c0", "c1"]
+
+
+def test_batch_fingerprints_match_single():
+    texts = [
+        "Government ration shop closed for 3 days",
+        "PM Kisan installment not received this year",
+        "ok",
+        "",
+    ]
+    simhashes = FingerprintService.compute_simhash_batch(texts)
+    assert [int(h) for h in simhashes] == [int(FingerprintService.compute_simhash(t)) for t in texts]
+
+    minhashes = FingerprintService.compute_minhash_batch(texts, num_perm=64)
+    for row, text in zip(minhashes, texts):
+        assert list(row) == FingerprintService.compute_minhash(text, num_perm=64)
+
+
+def test_hamming_distance_matrix():
+    hashes = [0, 0b1011, (1 << 64) - 1]
+    dist = FingerprintService.hamming_distance_matrix(hashes)
+    assert dist.tolist() == [[0, 3, 64], [3, 0, 61], [64, 61, 0]]
+    assert FingerprintService.find_duplicate_pairs(hashes, threshold=3).tolist() == [[0, 1]]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_async_defers_inserts(index):
+    index.insert("a", "Ration card biometric failure at the fair price shop")
+    snapshot = asyncio.create_task(index.snapshot_async())
+    await asyncio.sleep(0)
+    assert index.check_and_insert("b", "Mid-day meal quality very poor in school") is None
+    # Deferred inserts are still matched while the file is being written
+    assert index.query("Mid-day meal quality very poor in school")["doc_id"] == "b"
+    await snapshot
+
+    assert len(index) == 2
+    assert len(DedupIndex.load(index.snapshot_path)) == 1
+
+
+@pytest.mark.asyncio
+async def test_retried_job_is_not_matched_against_itself(tmp_path, monkeypatch):
+    from src.core.queue import InMemoryQueue
+    from src.ingest.registry import ScraperRegistry
+    from src.ingest.scraper import BaseScraper
+    from src.ingest.worker import IngestionWorker
+    from src.schemas.models import Complaint
+
+    texts = ["Pension not credited for three months in Tumkur district", "Water supply pipeline broken near the primary school"]
+
+    class FixedScraper(BaseScraper):
+        source_type = "news"
+
+        async def run(self):
+            # Fresh ids on every run, as with a real re-scrape
+            return [Complaint(trace_id="t", source="news", raw_text=t) for t in texts + texts[:1]]
+
+    monkeypatch.setitem(ScraperRegistry._registry, "fixed_test", FixedScraper)
+    queue = InMemoryQueue()
+    worker = IngestionWorker(queue)
+    worker.dedup_index = DedupIndex(snapshot_path=str(tmp_path / "dedup.pkl"))
+
+    push_many = queue.push_many
+
+    async def failing_push(stream, payloads):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(queue, "push_many", failing_push)
+    with pytest.raises(ConnectionError):
+        await worker.process_job("1-0", {"scraper": "fixed_test", "config": {}})
+    assert len(worker.dedup_index) == 0
+
+    pushed = []
+
+    async def recording_push(stream, payloads):
+        pushed.extend(payloads)
+        return await push_many(stream, payloads)
+
+    monkeypatch.setattr(queue, "push_many", recording_push)
+    await worker.process_job("1-0", {"scraper": "fixed_test", "config": {}})
+    # In-job duplicate dropped, the rest pushed and indexed
+    assert [p["raw_text"] for p in pushed] == texts
+    assert len(worker.dedup_index) == 2
+
+
+@pytest.mark.asyncio
+async def test_redis_index_is_shared_across_replicas():
+    fakeredis = pytest.importorskip("fakeredis")
+    from src.ingest.dedup_index import RedisDedupIndex
+
+    server = fakeredis.FakeServer()
+    replica_a, replica_b = (
+        RedisDedupIndex(fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)) for _ in range(2)
+    )
+    text = "Pension not credited for three months in Tumkur district, bank says file pending at taluk office"
+    await replica_a.add_many_async([("a", replica_a.fingerprint(text))])
+
+    # The other replica sees it: identical text via SimHash, reworded text via MinHash
+    match = await replica_b.match_async(replica_b.fingerprint(text.upper()))
+    assert match["doc_id"] == "a" and match["method"] == "simhash"
+    reworded = await replica_b.match_async(replica_b.fingerprint(text + " again"))
+    assert reworded is not None and reworded["doc_id"] == "a"
+    assert await replica_b.match_async(replica_b.fingerprint("Mid-day meal quality very poor in school")) is None
+    assert await replica_b.size() == 1
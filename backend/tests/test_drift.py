@@ -0,0 +1,130 @@
+import asyncio
+import numpy as np
+import pytest
+
+from src.clustering.drift import DriftDetector
+
+
+def sample(n, shift=0.0, seed=0, dim=64):
+    rng = np.random.default_rng(seed)
+    base = np.ones(dim, dtype=np.float32)
+    x = base + rng.standard_normal((n, dim)).astype(np.float32)
+    x[:, :8] += shift
+    return x
+
+
+def test_matches_scipy_cosine_and_flags_shift():
+    from scipy.spatial.distance import cosine
+
+    ref = sample(2000)
+    detector = DriftDetector(ref)
+    centroid = np.mean(ref / np.linalg.norm(ref, axis=1, keepdims=True), axis=0)
+    expected = [cosine(e, centroid) for e in ref[:50]]
+    assert np.allclose(detector.distances(ref[:50]), expected, atol=1e-5)
+
+    same = detector.detect_drift(sample(500, seed=1))
+    assert not same["drift_detected"]
+    drifted = detector.detect_drift(sample(500, shift=1.5, seed=2))
+    assert drifted["drift_detected"] and drifted["ks_drift"] and drifted["mmd_drift"]
+    assert drifted["centroid_shift"] > same["centroid_shift"]
+
+
+def test_streaming_window_rolls_over():
+    detector = DriftDetector(sample(2000))
+    assert detector.evaluate()["reason"] == "No data in window"
+    for i in range(detector.window.maxlen):
+        detector.update(sample(200, seed=10 + i))
+    assert not detector.evaluate()["drift_detected"]
+    # Once the window is full of shifted batches the verdict flips
+    for i in range(detector.window.maxlen):
+        detector.update(sample(200, shift=1.5, seed=100 + i))
+    result = detector.evaluate()
+    assert result["drift_detected"]
+    assert result["sample_size"] == 200 * detector.window.maxlen
+
+
+def test_window_weights_batches_by_size():
+    detector = DriftDetector(sample(2000))
+    # A small shifted burst next to a large in-distribution batch (beyond the reservoir caps)
+    detector.update(sample(1000, shift=1.5, seed=3))
+    detector.update(sample(50000, seed=4))
+    result = detector.evaluate()
+    # ~2% of the window is shifted; unweighted, the burst would be a third of the KS
+    # sample and half of the MMD sample
+    assert not result["drift_detected"] and result["statistic"] < 0.05
+    assert result["sample_size"] == 51000
+
+
+def test_no_reference():
+    assert DriftDetector().detect_drift(sample(10))["reason"] == "No reference data"
+
+
+class FakeEmbedder:
+    def __init__(self):
+        self.shift = 0.0
+        self.seed = 0
+
+    def embed_batch(self, texts):
+        self.seed += 1
+        return sample(len(texts), shift=self.shift, seed=self.seed)
+
+
+def test_monitor_segments_export_and_refit():
+    from unittest.mock import MagicMock, patch
+    from src.clustering.drift_monitor import DriftMonitor
+    from prometheus_client import REGISTRY
+
+    manager = MagicMock(is_fitted=True, version="v1")
+    manager.predict_batch.side_effect = lambda x: (np.arange(len(x)) % 2, np.ones(len(x)), None)
+    embedder = FakeEmbedder()
+    monitor = DriftMonitor(embedder, manager, queue=MagicMock())
+
+    def events(n):
+        return [{"raw_text": f"t{i}", "source": "twitter" if i % 2 else "news",
+                 "transcript_metadata": '{"language": "hi"}'} for i in range(n)]
+
+    with patch("src.clustering.drift_monitor.settings.DRIFT_REFERENCE_SIZE", 400), \
+         patch("src.clustering.drift_monitor.settings.DRIFT_MIN_WINDOW_SIZE", 100):
+        monitor.observe(events(800))  # references
+        monitor.observe(events(800))
+        results = monitor.run_once()
+        assert {("all", "all"), ("cluster", "0"), ("cluster", "1"), ("source", "news"),
+                ("source", "twitter"), ("language", "hi")} <= set(results)
+        assert not any(r["drift_detected"] for r in results.values())
+        manager.fit_transform.assert_not_called()
+
+        assert REGISTRY.get_sample_value("embedding_drift_detected", {"segment": "source", "key": "news"}) == 0
+
+        embedder.shift = 1.5
+        monitor.observe(events(800))
+        results = monitor.run_once()
+        assert results[("source", "news")]["drift_detected"]
+        manager.fit_transform.assert_called_once()
+        assert manager.fit_transform.call_args.kwargs["full"] is True
+        assert monitor.segments == {}
+        # Dropped segments stop exporting their last values
+        assert REGISTRY.get_sample_value("embedding_drift_detected", {"segment": "source", "key": "news"}) is None
+
+
+@pytest.mark.asyncio
+async def test_schedule_swaps_buffer_on_the_loop():
+    from unittest.mock import MagicMock, patch
+    from src.clustering.drift_monitor import DriftMonitor
+
+    monitor = DriftMonitor(FakeEmbedder(), None, queue=MagicMock())
+    await monitor.handle_event("1-0", {"raw_text": "a"})
+    seen = []
+
+    class Stop(BaseException):
+        pass
+
+    def run_once(events):
+        seen.append(events)
+        raise Stop  # ends the schedule loop after one round
+
+    with patch.object(monitor, "run_once", side_effect=run_once), \
+         patch("src.clustering.drift_monitor.settings.DRIFT_EVAL_INTERVAL_SEC", 0):
+        with pytest.raises(Stop):
+            await monitor.schedule()
+    assert seen == [[{"raw_text": "a"}]]
+    assert monitor.buffer == []
@@ -0,0 +1,62 @@
+import numpy as np
+from unittest.mock import MagicMock
+from src.clustering.embedding_cache import EmbeddingCache, embedding_key
+from src.clustering.embedder import EmbedderService, length_buckets
+
+
+def make_embedder(cache):
+    """EmbedderService around a fake encoder (no transformer download in tests)."""
+    embedder = EmbedderService.__new__(EmbedderService)
+    embedder.model_name = "test-model"
+    embedder.dim = 4
+    embedder.cache = cache
+    embedder.model = MagicMock()
+    embedder.model.max_seq_length = 128
+    embedder.model.encode.side_effect = lambda texts, **kw: np.array(
+        [[len(t), t.count(" "), 1.0, 0.5] for t in texts], dtype=np.float32
+    )
+    return embedder
+
+
+def encoded_texts(embedder):
+    return [t for call in embedder.model.encode.call_args_list for t in call.args[0]]
+
+
+def test_cache_roundtrip_and_reload(tmp_path):
+    cache = EmbeddingCache("m/one", dim=3, cache_dir=str(tmp_path), dtype="float16")
+    keys = [embedding_key(t, "m/one") for t in ["a", "b"]]
+    cache.put_many(keys, np.array([[1, 2, 3], [4, 5, 6]], dtype=np.float32))
+
+    reopened = EmbeddingCache("m/one", dim=3, cache_dir=str(tmp_path), dtype="float16")
+    vectors, hit = reopened.get_many([keys[1], embedding_key("c", "m/one"), keys[0]])
+    assert hit.tolist() == [True, False, True]
+    assert vectors.tolist() == [[4, 5, 6], [1, 2, 3]]
+    assert isinstance(reopened.vectors, np.memmap)
+
+    # Keys are model-specific
+    assert embedding_key("a", "m/one") != embedding_key("a", "m/two")
+
+
+def test_length_buckets_respect_token_budget():
+    texts = ["x" * 400] * 4 + ["short"] * 10
+    batches = length_buckets(texts, max_seq_length=128, token_budget=256, max_batch_size=8)
+    assert sorted(i for b in batches for i in b) == list(range(len(texts)))
+    # Short texts first and batched together; long ones (102 tokens) at most 2 per batch
+    assert batches[0] == list(range(4, 12))
+    assert all(len(b) <= 2 for b in batches if b[0] < 4)
+
+
+def test_embed_batch_dedups_and_skips_cached(tmp_path):
+    cache = EmbeddingCache("test-model", dim=4, cache_dir=str(tmp_path), dtype="float32")
+    embedder = make_embedder(cache)
+
+    texts = ["road broken", "no water", "road broken", "ration card not issued"]
+    first = embedder.embed_batch(texts)
+    assert first.shape == (4, 4)
+    assert np.array_equal(first[0], first[2])
+    assert sorted(encoded_texts(embedder)) == sorted(set(texts))
+
+    embedder.model.encode.reset_mock()
+    second = embedder.embed_batch(texts + ["pension delayed"])
+    assert encoded_texts(embedder) == ["pension delayed"]
+    assert np.array_equal(second[:4], first)
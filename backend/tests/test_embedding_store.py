@@ -0,0 +1,53 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from src.clustering.drift import DriftDetector
+from src.clustering.embedding_store import EmbeddingStore
+from src.genai.active_learning import ActiveLearningSampler
+
+
+def vectors(n, dim=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+@pytest.mark.parametrize("dtype,atol,row_bytes", [("float16", 1e-2, 64), ("int8", 4e-2, 36)])
+def test_roundtrip_and_lazy_views(tmp_path, dtype, atol, row_bytes):
+    store = EmbeddingStore("docs", 32, store_dir=str(tmp_path), dtype=dtype)
+    ids = [str(uuid.uuid4()) for _ in range(100)] + ["tweet:123"]
+    data = vectors(101)
+    store.put(ids, data)
+    assert store.row_bytes == row_bytes
+
+    assert np.allclose(store.get(ids[::-1]), data[::-1], atol=atol)
+    full = store.matrix()
+    assert full.shape == (101, 32)
+    assert np.allclose(full[10:20], data[10:20], atol=atol)
+    assert np.allclose(np.asarray(full), data, atol=atol)
+
+    subset = store.matrix([ids[5], ids[100], ids[1]])
+    assert np.allclose(subset[1], data[100], atol=atol)
+    assert np.allclose(subset[np.array([2, 0])], data[[1, 5]], atol=atol)
+
+    # Reopened (another process) sees the same rows
+    assert np.allclose(EmbeddingStore("docs", 32, store_dir=str(tmp_path), dtype=dtype).get([ids[7]]), data[[7]], atol=atol)
+    with pytest.raises(KeyError):
+        store.rows(["missing"])
+
+
+def test_drift_and_active_learning_read_store_views(tmp_path):
+    store = EmbeddingStore("docs", 32, store_dir=str(tmp_path))
+    ref = vectors(1000) + 1.0
+    new = np.vstack([vectors(95, seed=1) + 1.0, vectors(5, seed=2) - 1.0])
+    ref_ids = [f"r{i}" for i in range(1000)]
+    new_ids = [f"n{i}" for i in range(100)]
+    store.put(ref_ids + new_ids, np.vstack([ref, new]))
+
+    from_store = DriftDetector(store.matrix(ref_ids))
+    in_memory = DriftDetector(ref)
+    assert np.allclose(from_store.ref_dists, in_memory.ref_dists, atol=1e-3)
+
+    picked = ActiveLearningSampler().sample_from_store(
+        new_ids, store.matrix(new_ids), np.ones(100), drift_detector=from_store, batch_size=5)
+    assert {p["id"] for p in picked} == {f"n{i}" for i in range(95, 100)}
@@ -0,0 +1,37 @@
+import pytest
+
+pytest.importorskip("spacy")
+pytest.importorskip("presidio_analyzer")
+
+from src.process.extraction import SpacyEntityExtractor
+
+
+@pytest.fixture(scope="module")
+def extractor():
+    return SpacyEntityExtractor()
+
+
+def test_predict_batch_matches_predict(extractor):
+    texts = [
+        "Ration not given in Patna, call me at 9876543210",
+        "Write to help@example.com about the pension",
+        "",
+        "No PII here",
+    ]
+    extractor.nlp.batch_size = 2  # Batches split across the inputs
+    batch = extractor.predict_batch(texts)
+    assert batch == [extractor.predict(t) for t in texts]
+    assert "help@example.com" not in batch[1]["redacted_text"]
+    assert "EMAIL_ADDRESS" in batch[1]["pii_detected"]
+
+
+def test_presidio_shares_the_pipeline():
+    extractor = SpacyEntityExtractor()
+    assert extractor.analyzer.nlp_engine.nlp["en"] is extractor.nlp
+    ruler = extractor.nlp.add_pipe("entity_ruler")
+    ruler.add_patterns([{"label": "GPE", "pattern": "Patna"}])
+
+    text = "Ration not given in Patna, call me at 9876543210"
+    expected = [{"text": "Patna", "label": "GPE", "start": 20, "end": 25}]
+    assert extractor.predict(text)["entities"] == expected
+    assert extractor.predict_batch([text, "No PII here"])[0]["entities"] == expected
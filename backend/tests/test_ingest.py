@@ -14,10 +14,17 @@ def test_phone_hashing():
     assert hash_phone_number(p1) == hash_phone_number(p2)
 
 def test_simhash_similarity():
-    t1 = "Government ration shop closed for 3 days"
-    t2 = "Government ration shop closed since 3 days"
-    
+    t1 = ("Government ration shop in our village has been closed for 3 days and the dealer is not answering calls, "
+          "families are not getting their wheat and rice under the public distribution scheme")
+    t2 = t1.replace("closed for 3 days", "closed since 3 days")
+    t3 = "Hospital staff demanded a bribe before admitting my mother under Ayushman Bharat and the doctor was absent"
+
     h1 = FingerprintService.compute_simhash(t1)
     h2 = FingerprintService.compute_simhash(t2)
-    
-    assert FingerprintService.is_duplicate_simhash(h1, h2)
+    h3 = FingerprintService.compute_simhash(t3)
+
+    # Resubmissions differing only in case/punctuation hash identically
+    assert FingerprintService.compute_simhash(t1.upper() + "!!") == h1
+    # A one-word edit changes 3 word-shingles; it stays far closer than an unrelated complaint
+    assert FingerprintService.is_duplicate_simhash(h1, h2, threshold=8)
+    assert not FingerprintService.is_duplicate_simhash(h1, h3, threshold=8)
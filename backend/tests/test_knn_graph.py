@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from unittest.mock import patch
+from src.clustering.knn_graph import ExactCosineIndex, HNSWIndex, KNNGraph
+
+
+def exact_knn(data, k):
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    dist = 1 - unit @ unit.T
+    np.fill_diagonal(dist, np.inf)
+    return np.argsort(dist, axis=1)[:, :k]
+
+
+@pytest.fixture
+def data():
+    return np.random.default_rng(0).standard_normal((300, 16)).astype(np.float32)
+
+
+def test_incremental_extend_matches_full_build(data):
+    graph = KNNGraph(ExactCosineIndex(), k=10)
+    graph.extend(data[:100])
+    graph.extend(data[100:250])
+    graph.extend(data[250:])
+
+    # Reverse updates keep the early rows' lists current after later inserts
+    truth = exact_knn(data, 10)
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(graph.indices, truth)])
+    assert recall > 0.98
+    assert np.all(np.diff(graph.dists, axis=1) >= 0)
+
+
+def test_extend_skips_known_rows(data):
+    graph = KNNGraph(ExactCosineIndex(), k=5)
+    rows = graph.extend(data[:50])
+    with patch.object(graph.index, "search", wraps=graph.index.search) as search:
+        again = graph.extend(data[:50])
+    assert search.call_count == 0
+    assert np.array_equal(rows, again)
+
+
+def test_subset_knn_restricted_to_members(data):
+    graph = KNNGraph(ExactCosineIndex(), k=10)
+    graph.extend(data)
+    rows = np.arange(0, 300, 3)
+    knn_ids, knn_dists, search_index = graph.subset(rows, k=10)
+    # UMAP layout: the point itself first at distance 0, then its k - 1 nearest members
+    assert knn_ids.shape == (len(rows), 10)
+    assert np.array_equal(knn_ids[:, 0], np.arange(len(rows)))
+    assert np.all(knn_dists[:, 0] == 0)
+    assert np.array_equal(knn_ids[:, 1:], exact_knn(data[rows], 9))
+    assert np.all(np.diff(knn_dists, axis=1) >= 0)
+
+    # Transform-time search only returns fitted rows, in fit positions
+    ids, _ = search_index.query(data[1:4], 5)
+    unit = data / np.linalg.norm(data, axis=1, keepdims=True)
+    expected = np.argsort(-(unit[1:4] @ unit[rows].T), axis=1)[:, :5]
+    assert np.array_equal(ids, expected)
+
+
+def test_hnsw_recall(data):
+    pytest.importorskip("hnswlib")
+    graph = KNNGraph(HNSWIndex(m=16, ef_construction=200, ef_search=100), k=10)
+    graph.extend(data[:150])
+    graph.extend(data[150:])
+    truth = exact_knn(data, 10)
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(graph.indices, truth)])
+    assert recall > 0.95
+
+
+def test_pruned_keeps_recent_rows_and_leaves_old_graph_searchable(data):
+    graph = KNNGraph(ExactCosineIndex(), k=10)
+    graph.extend(data)
+    _, _, search_index = graph.subset(np.arange(300), k=5)
+
+    pruned = graph.pruned(100)
+    assert len(pruned) == 100
+    assert np.array_equal(pruned.extend(data[200:]), np.arange(100))
+    assert np.array_equal(pruned.indices, exact_knn(data[200:], 10))
+    # Reducers fitted on the old graph keep working against it
+    assert len(graph) == 300
+    assert search_index.query(data[:2], 5)[0].shape == (2, 5)
+
+
+def test_search_during_extend(data):
+    import threading
+
+    pytest.importorskip("hnswlib")
+    graph = KNNGraph(HNSWIndex(m=8, ef_construction=50, ef_search=50), k=5)
+    graph.extend(data[:20])
+    _, _, search_index = graph.subset(np.arange(20), k=5)
+    errors = []
+
+    def search():
+        try:
+            for _ in range(200):
+                search_index.query(data[:4], 5)
+        except Exception as e:
+            errors.append(e)
+
+    reader = threading.Thread(target=search)
+    reader.start()
+    # Inserts (and neighbour-list updates) while the reader searches
+    for start in range(20, 300, 10):
+        graph.extend(data[start:start + 10])
+    reader.join()
+    assert not errors
@@ -81,3 +81,42 @@ class TestMLPipeline:
             assert result["status"] == "processed"
             mock_audio.predict.assert_called_once()
             mock_extract.predict.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_orchestrator_segment_stream(self):
+        """Insights are produced per segment before the transcript is complete."""
+        segments = [
+            {"index": 0, "start": 0.0, "end": 4.2, "text": "my PMAY house is incomplete", "avg_logprob": -0.2},
+            {"index": 1, "start": 4.2, "end": 9.0, "text": "call me on my number", "avg_logprob": -0.4},
+        ]
+        mock_audio = MagicMock()
+        mock_audio.predict_stream.return_value = (iter(segments), {"language": "en", "duration": 9.0})
+
+        mock_extract = MagicMock()
+        mock_extract.predict.side_effect = lambda text: {
+            "entities": [{"text": "number", "label": "MISC", "start": text.find("number"), "end": text.find("number") + 6}] if "number" in text else [],
+            "redacted_text": text,
+            "pii_detected": []
+        }
+
+        with patch.object(ModelRegistry, 'get_model') as mock_get:
+            def side_effect(name):
+                if name == "whisper": return mock_audio
+                if name == "entity_extractor": return mock_extract
+                if name == "scheme_matcher": return SchemeMatcher()
+                return MagicMock()
+
+            mock_get.side_effect = side_effect
+
+            orchestrator = PipelineOrchestrator()
+            events = [e async for e in orchestrator.process_complaint_segments("dummy.mp3", {"trace_id": "123"})]
+
+            assert [e["status"] for e in events] == ["partial", "partial", "processed"]
+            assert "Pradhan Mantri Awas Yojana" in [m["scheme_name"] for m in events[0]["schemes"]]
+
+            final = events[-1]
+            assert final["transcript"] == "my PMAY house is incomplete call me on my number"
+            ent = final["entities"][0]
+            assert final["transcript"][ent["start"]:ent["end"]] == "number"
+            assert final["metadata"]["language"] == "en"
+            assert final["severity"] == orchestrator._score_severity(final)
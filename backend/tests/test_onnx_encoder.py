@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+from src.clustering.onnx_encoder import check_parity, mean_pool
+
+
+def fake_encoder(vectors):
+    encoder = MagicMock()
+    encoder.encode.return_value = np.asarray(vectors, dtype=np.float32)
+    return encoder
+
+
+def test_mean_pool_ignores_padding():
+    tokens = np.array([[[1.0, 1.0], [3.0, 3.0], [100.0, 100.0]]])
+    mask = np.array([[1, 1, 0]])
+    assert mean_pool(tokens, mask).tolist() == [[2.0, 2.0]]
+
+
+def test_check_parity_threshold():
+    reference = fake_encoder([[1.0, 0.0], [0.0, 1.0]])
+    assert check_parity(fake_encoder([[2.0, 0.01], [0.0, 3.0]]), reference, texts=["a", "b"], threshold=0.99) > 0.99
+    with pytest.raises(ValueError):
+        check_parity(fake_encoder([[1.0, 1.0], [0.0, 1.0]]), reference, texts=["a", "b"], threshold=0.99)
+
+
+def test_onnx_matches_pytorch(tmp_path):
+    """Full export + int8 parity against the PyTorch model (needs the model download)."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+    from sentence_transformers import SentenceTransformer
+    from src.clustering.onnx_encoder import export_onnx, OnnxSentenceEncoder, settings
+
+    path = export_onnx(settings.EMBEDDING_MODEL, str(tmp_path), quantize=True)
+    assert check_parity(OnnxSentenceEncoder(path, str(tmp_path)), SentenceTransformer(settings.EMBEDDING_MODEL)) >= 0.99
@@ -0,0 +1,40 @@
+import random
+
+from src.core.pii import PIIRedactor
+
+TEXT = (
+    "Ration card 1234 5678 9012 rejected. Call +91 98765 43210 or 987-654-3210, "
+    "mail ravi.k@example.org. Order no 12345678 is fine."
+)
+
+
+def test_single_pass_redacts_every_class():
+    redactor = PIIRedactor()
+    assert redactor.redact_text(TEXT) == (
+        "Ration card [REDACTED_AADHAAR] rejected. Call [REDACTED_PHONE] or [REDACTED_PHONE], "
+        "mail [REDACTED_EMAIL]. Order no 12345678 is fine."
+    )
+    assert [f["type"] for f in redactor.find(TEXT)] == ["aadhaar", "phone", "phone", "email"]
+    assert redactor.redact_many([TEXT, "no pii"]) == [redactor.redact_text(TEXT), "no pii"]
+
+
+def test_stream_matches_whole_text_redaction():
+    redactor = PIIRedactor(stream_overlap=64)
+    transcript = " ".join([TEXT] * 40)
+    rng = random.Random(0)
+    cuts = sorted(rng.sample(range(1, len(transcript)), 150))
+    chunks = [transcript[a:b] for a, b in zip([0] + cuts, cuts + [len(transcript)])]
+    assert "".join(redactor.redact_stream(chunks)) == redactor.redact_text(transcript)
+
+
+def test_process_document_copies_only_on_change():
+    redactor = PIIRedactor()
+    clean = {"text": "nothing here", "id": 1}
+    assert redactor.process_document(clean) is clean
+
+    doc = {"text": "mail a@b.com", "description": "ok"}
+    out = redactor.process_document(doc)
+    assert out is not doc and doc["text"] == "mail a@b.com"
+    assert out["text"] == "mail [REDACTED_EMAIL]"
+    assert redactor.process_document(doc, inplace=True) is doc
+    assert doc["text"] == "mail [REDACTED_EMAIL]"
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from src.core.queue import InMemoryQueue
+
+
+@pytest.fixture
+def queue():
+    return InMemoryQueue(maxlen=1000)
+
+
+@pytest.mark.asyncio
+async def test_consumer_group_delivery_and_ack(queue):
+    # Group is created at "$", like XGROUP CREATE ... $ MKSTREAM
+    assert await queue.read_group("jobs", "workers", "c1") == []
+
+    ids = await queue.push_many("jobs", [{"n": 1}, {"n": 2, "config": {"a": 1}}])
+    messages = await queue.read_group("jobs", "workers", "c1", count=10)
+    assert messages[0][0] == "jobs"
+    delivered = messages[0][1]
+    assert [msg_id for msg_id, _ in delivered] == ids
+    # Payloads are flattened to strings, as in Redis
+    assert delivered[1][1]["config"] == '{"a": 1}'
+    assert "trace_id" in delivered[0][1]
+
+    # New entries are only delivered once per group
+    assert await queue.read_group("jobs", "workers", "c2", count=10) == []
+
+    pending = await queue.pending("jobs", "workers")
+    assert [p["message_id"] for p in pending] == ids
+    assert all(p["consumer"] == "c1" and p["times_delivered"] == 1 for p in pending)
+
+    assert await queue.ack("jobs", "workers", ids) == 2
+    assert await queue.pending("jobs", "workers") == []
+
+
+@pytest.mark.asyncio
+async def test_claim_redelivers_idle_entries(queue):
+    await queue.read_group("jobs", "workers", "c1")
+    msg_id = await queue.push("jobs", {"n": 1})
+    await queue.read_group("jobs", "workers", "c1")
+
+    # Not idle long enough yet
+    assert await queue.claim("jobs", "workers", "c2", min_idle_time=60_000) == []
+
+    claimed = await queue.claim("jobs", "workers", "c2", min_idle_time=0)
+    assert [c[0] for c in claimed] == [msg_id]
+    pending = await queue.pending("jobs", "workers", consumer="c2")
+    assert pending[0]["times_delivered"] == 2
+
+
+@pytest.mark.asyncio
+async def test_blocking_read_wakes_on_push(queue):
+    await queue.read_group("jobs", "workers", "c1")
+
+    async def producer():
+        await asyncio.sleep(0.05)
+        await queue.push("jobs", {"n": 1})
+
+    task = asyncio.create_task(producer())
+    messages = await queue.read_group("jobs", "workers", "c1", block=2000)
+    await task
+    assert len(messages[0][1]) == 1
+
+    # Times out with nothing to read
+    assert await queue.read_group("jobs", "workers", "c1", block=20) == []
+
+
+@pytest.mark.asyncio
+async def test_maxlen_trims_oldest():
+    queue = InMemoryQueue(maxlen=2)
+    await queue.read_group("s", "g", "c")
+    await queue.push_many("s", [{"n": i} for i in range(3)])
+    messages = await queue.read_group("s", "g", "c", count=10)
+    assert [fields["n"] for _, fields in messages[0][1]] == ["1", "2"]
@@ -0,0 +1,45 @@
+from src.matching.scheme_matcher import SchemeMatcher, TokenAutomaton
+
+
+def names(result):
+    return {m["scheme_name"]: m["confidence_score"] for m in result["matches"]}
+
+
+def test_automaton_finds_overlapping_phrases():
+    automaton = TokenAutomaton({("pm", "kisan"): "a", ("kisan", "samman", "nidhi"): "b", ("nidhi",): "c"})
+    tokens = "the pm kisan samman nidhi money".split()
+    assert sorted(automaton.iter_matches(tokens)) == [(1, 3, "a"), (2, 5, "b"), (4, 5, "c")]
+
+
+def test_multi_word_alias_and_exact_name():
+    matcher = SchemeMatcher()
+    found = names(matcher.predict("PM-Kisan installment not credited, also applied for Jal Jeevan Mission"))
+    assert found["PM Kisan Samman Nidhi"] == 100.0
+    assert found["Jal Jeevan Mission"] == 100.0
+    # Alias tokens inside other words don't match
+    assert names(matcher.predict("the pmaysomething office")) == {}
+
+
+def test_fuzzy_match_on_misspelled_name():
+    found = names(SchemeMatcher().predict("ayushmann bharath card rejected at hospital"))
+    assert 70 <= found["Ayushman Bharat"] < 100
+
+
+def test_batch_matches_single_predictions():
+    matcher = SchemeMatcher()
+    texts = [
+        "Funds not received for PMAY scheme",
+        "mnrega payment stuck",
+        "swach bharat mision toilet not built",
+        "road is broken",
+        "",
+    ]
+    assert matcher.predict_batch(texts) == [matcher.predict(t) for t in texts]
+
+
+def test_large_catalog_only_scores_anchor_windows():
+    schemes = [f"Scheme Number{i} Yojana" for i in range(1500)] + ["Pradhan Mantri Awas Yojana"]
+    matcher = SchemeMatcher(schemes=schemes, aliases={"PMAY": "Pradhan Mantri Awas Yojana"})
+    found = names(matcher.predict("house under pradhan mantri awaas yojna not sanctioned, number1234 yojana"))
+    assert "Pradhan Mantri Awas Yojana" in found
+    assert len(found) <= 4
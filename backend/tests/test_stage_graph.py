@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from src.process.stage_graph import Stage, StageError, StageGraph
+
+
+def slow(value, delay=0.2):
+    time.sleep(delay)
+    return value
+
+
+@pytest.mark.asyncio
+async def test_independent_stages_overlap():
+    graph = StageGraph([
+        Stage("extraction", lambda text: text.upper(), inputs=["text"]),
+        Stage("schemes", lambda ext: slow(ext + "-s"), inputs=["extraction"], executor="thread"),
+        Stage("embedding", lambda ext: slow(ext + "-e"), inputs=["extraction"], executor="thread"),
+        Stage("merge", lambda s, e: (s, e), inputs=["schemes", "embedding"]),
+    ], inputs=["text"])
+
+    start = time.perf_counter()
+    out = await graph.run(text="a")
+    assert time.perf_counter() - start < 0.35
+    assert out["merge"] == ("A-s", "A-e")
+
+    # Concurrent runs share the loop instead of queueing behind each other
+    start = time.perf_counter()
+    await asyncio.gather(*[graph.run(text=str(i)) for i in range(4)])
+    assert time.perf_counter() - start < 0.6
+
+
+@pytest.mark.asyncio
+async def test_timeouts_defaults_and_failures():
+    async def hang(text):
+        await asyncio.sleep(5)
+
+    graph = StageGraph([
+        Stage("severity", hang, inputs=["text"], executor="async", timeout=0.05, default=None),
+        Stage("ok", lambda text: text, inputs=["text"]),
+    ], inputs=["text"])
+    assert (await graph.run(text="x"))["severity"] is None
+
+    failing = StageGraph([Stage("asr", hang, inputs=["file_path"], executor="async", timeout=0.05)], inputs=["file_path"])
+    with pytest.raises(StageError) as err:
+        await failing.run(file_path="a.wav")
+    assert err.value.stage == "asr"
+
+
+def test_graph_validation():
+    with pytest.raises(ValueError, match="unknown"):
+        StageGraph([Stage("a", len, inputs=["missing"])])
+    with pytest.raises(ValueError, match="Cycle"):
+        StageGraph([Stage("a", len, inputs=["b"]), Stage("b", len, inputs=["a"])])
@@ -0,0 +1,38 @@
+import pytest
+from unittest.mock import patch
+from src.process.transcript_cache import TranscriptCache, DiskTranscriptTier, hash_audio_file
+
+
+def test_content_hash_ignores_path(tmp_path):
+    a = tmp_path / "a.ogg"
+    b = tmp_path / "forwarded" / "b.ogg"
+    b.parent.mkdir()
+    a.write_bytes(b"\x00voice-note" * 1000)
+    b.write_bytes(b"\x00voice-note" * 1000)
+    assert hash_audio_file(str(a), chunk_size=64) == hash_audio_file(str(b))
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction_and_ttl():
+    cache = TranscriptCache(max_entries=2, ttl_sec=60)
+    await cache.set("a", {"text": "a"})
+    await cache.set("b", {"text": "b"})
+    assert await cache.get("a") is not None  # a becomes most recent
+    await cache.set("c", {"text": "c"})
+    assert await cache.get("b") is None
+    assert len(cache) == 2
+
+    with patch("src.process.transcript_cache.time.monotonic", return_value=1e12):
+        assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_shared_disk_tier_is_promoted(tmp_path):
+    shared = DiskTranscriptTier(cache_dir=str(tmp_path), ttl_sec=60)
+    writer = TranscriptCache(max_entries=10, ttl_sec=60, shared=shared)
+    await writer.set("k", {"text": "hello"})
+
+    # Another replica with a cold local cache
+    reader = TranscriptCache(max_entries=10, ttl_sec=60, shared=shared)
+    assert await reader.get("k") == {"text": "hello"}
+    assert len(reader) == 1
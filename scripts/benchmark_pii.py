@@ -0,0 +1,76 @@
+"""
+PII redaction benchmark: per-pattern re.sub (previous PIIRedactor) vs the
+single-pass compiled engine, on synthetic complaint texts.
+
+    cd backend && python ../scripts/benchmark_pii.py --docs 20000
+"""
+import argparse
+import random
+import re
+import sys
+import time
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from src.core.pii import PIIRedactor
+
+# Patterns of the previous implementation
+LEGACY_PATTERNS = {
+    "email": r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    "phone": r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b',
+    "aadhaar": r'\b\d{4}\s\d{4}\s\d{4}\b',
+}
+
+WORDS = "ration shop closed pension not received hospital refused treatment water pipe broken since days".split()
+
+
+def legacy_redact(text: str) -> str:
+    # Previous implementation: one re.sub (pattern cache lookup + full scan) per PII class
+    for name, pattern in LEGACY_PATTERNS.items():
+        text = re.sub(pattern, f"[REDACTED_{name.upper()}]", text)
+    return text
+
+
+def make_docs(n: int, words: int, seed: int = 0):
+    rng = random.Random(seed)
+    # Formats both implementations cover, so outputs can be compared
+    pii = [lambda: f"{rng.randint(6, 9)}{rng.randint(10**8, 10**9 - 1)}",
+           lambda: f"user{rng.randint(1, 999)}@mail.com",
+           lambda: f"{rng.randint(1000, 9999)} {rng.randint(1000, 9999)} {rng.randint(1000, 9999)}"]
+    docs = []
+    for _ in range(n):
+        tokens = [rng.choice(WORDS) for _ in range(words)]
+        for _ in range(rng.randint(0, 2)):
+            tokens.insert(rng.randrange(len(tokens)), rng.choice(pii)())
+        docs.append(" ".join(tokens))
+    return docs
+
+
+def timed(label: str, fn, docs):
+    start = time.perf_counter()
+    out = fn(docs)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed * 1000:8.1f} ms  {len(docs) / elapsed:10.0f} docs/s")
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--words", type=int, default=60)
+    args = parser.parse_args()
+
+    docs = make_docs(args.docs, args.words)
+    redactor = PIIRedactor()
+    legacy = timed("per-pattern re.sub", lambda d: [legacy_redact(t) for t in d], docs)
+    single = timed("single pass (redact_text)", lambda d: [redactor.redact_text(t) for t in d], docs)
+    batch = timed("single pass (redact_many)", redactor.redact_many, docs)
+    streamed = timed("redact_stream (1 transcript)", lambda d: ["".join(redactor.redact_stream(t + " " for t in d))], docs)
+
+    assert legacy == single == batch, "implementations disagree"
+    assert streamed[0] == redactor.redact_text("".join(t + " " for t in docs))
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()